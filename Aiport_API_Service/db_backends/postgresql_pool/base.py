@@ -0,0 +1,147 @@
+"""
+PostgreSQL backend that checks connections out of an in-process pool.
+
+Django opens a new connection in ``connect()`` and drops it in ``close()``;
+this backend hands out an idle pooled connection instead and returns it to
+the pool when Django closes it, so ``CONN_MAX_AGE = 0`` no longer costs a
+TCP/TLS handshake and backend start-up per request. Pool sizing is read
+from ``OPTIONS["pool"]``::
+
+    "OPTIONS": {"pool": {"min_size": 2, "max_size": 10, "timeout": 30}}
+
+A pooled connection that was closed or left in a transaction is replaced
+on checkout; with ``CONN_HEALTH_CHECKS`` it is also pinged first, so a
+database restart does not fail one request per stale pooled connection.
+"""
+import functools
+import os
+import threading
+from typing import Any
+
+import psycopg2.extensions
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+
+from Aiport_API_Service.db_backends.postgresql_pool.pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_stats() -> dict:
+    """Return usage and wait counters of every pool of this process"""
+    return {
+        "/".join(str(part) for part in key): pool.stats()
+        for key, pool in list(_pools.items())
+    }
+
+
+def connection_usable(connection: Any, ping: bool) -> bool:
+    """Whether an idle pooled connection can be handed out"""
+    if connection.closed or (
+        connection.info.transaction_status
+        != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    ):
+        return False
+    if not ping:
+        return True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if (
+            connection.info.transaction_status
+            != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        ):
+            connection.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity) -> None:
+        # Idle pooled connections would keep the test database in use.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    _pool = None
+
+    def get_connection_params(self) -> dict:
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def _get_pool(self, conn_params: dict) -> ConnectionPool:
+        key = (
+            self.alias,
+            conn_params.get("host"),
+            conn_params.get("port"),
+            conn_params.get("dbname"),
+            conn_params.get("user"),
+        )
+        pool = _pools.get(key)
+        if pool is not None and pool.pid == os.getpid():
+            return pool
+
+        with _pools_lock:
+            pool = _pools.get(key)
+            # A pool inherited through fork() shares sockets with the parent.
+            if pool is None or pool.pid != os.getpid():
+                options = self.settings_dict["OPTIONS"].get("pool", {})
+                pool = ConnectionPool(
+                    lambda: super(DatabaseWrapper, self).get_new_connection(
+                        conn_params
+                    ),
+                    min_size=options.get("min_size", 1),
+                    max_size=options.get("max_size", 10),
+                    timeout=options.get("timeout", 30),
+                    check=functools.partial(
+                        connection_usable,
+                        ping=self.settings_dict["CONN_HEALTH_CHECKS"],
+                    ),
+                )
+                _pools[key] = pool
+        return pool
+
+    def get_new_connection(self, conn_params: dict):
+        if self.alias == NO_DB_ALIAS:
+            self._pool = None
+            return super().get_new_connection(conn_params)
+
+        self._pool = self._get_pool(conn_params)
+        connection = self._pool.getconn()
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        self.isolation_level = (
+            base.IsolationLevel.READ_COMMITTED
+            if isolation_level is None
+            else base.IsolationLevel(isolation_level)
+        )
+        return connection
+
+    def _close(self) -> None:
+        if self.connection is None or self._pool is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            connection, pool = self.connection, self._pool
+            discard = bool(connection.closed)
+            if not discard and (
+                connection.info.transaction_status
+                != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+            ):
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    discard = True
+            pool.putconn(connection, discard=discard)
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from django.db.utils import OperationalError
+
+
+def is_open(connection: Any) -> bool:
+    return not connection.closed
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections for a single process.
+
+    Callers block up to ``timeout`` seconds for a free connection once
+    ``max_size`` connections are checked out. An idle connection failing
+    ``check`` on checkout, e.g. after a database restart, is closed and
+    replaced by a new one. The pool keeps counters of checkouts, waits,
+    time spent waiting and replaced connections for ``stats()``.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30,
+        check: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(
+                "Pool sizes must satisfy 0 <= min_size <= max_size, "
+                "max_size >= 1"
+            )
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._check = check or is_open
+        self.pid = os.getpid()
+
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._timeouts = 0
+        self._replaced = 0
+
+        for _ in range(min_size):
+            self._idle.append(self._connect())
+            self._size += 1
+
+    def getconn(self) -> Any:
+        started = time.monotonic()
+        waited = False
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise OperationalError(
+                        f"No database connection available in the pool "
+                        f"after {self.timeout} seconds"
+                    )
+                self._condition.wait(remaining)
+
+            self._checkouts += 1
+            if waited:
+                wait_seconds = time.monotonic() - started
+                self._waits += 1
+                self._wait_seconds += wait_seconds
+                self._max_wait_seconds = max(
+                    self._max_wait_seconds, wait_seconds
+                )
+
+            if self._idle:
+                connection = self._idle.pop()
+            else:
+                connection = None
+                self._size += 1
+
+        if connection is not None:
+            if self._check(connection):
+                return connection
+            self._close_quietly(connection)
+            with self._condition:
+                self._replaced += 1
+        try:
+            return self._connect()
+        except BaseException:
+            self._discard_slot()
+            raise
+
+    def putconn(self, connection: Any, discard: bool = False) -> None:
+        if discard or connection.closed:
+            if not connection.closed:
+                self._close_quietly(connection)
+            self._discard_slot()
+            return
+
+        with self._condition:
+            self._idle.append(connection)
+            self._condition.notify()
+
+    @staticmethod
+    def _close_quietly(connection: Any) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _discard_slot(self) -> None:
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def closeall(self) -> None:
+        with self._condition:
+            while self._idle:
+                self._idle.pop().close()
+                self._size -= 1
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_seconds": self._wait_seconds,
+                "max_wait_seconds": self._max_wait_seconds,
+                "timeouts": self._timeouts,
+                "replaced": self._replaced,
+            }
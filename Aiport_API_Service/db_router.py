@@ -0,0 +1,223 @@
+"""
+Routing of read queries to PostgreSQL replicas.
+
+``ReplicaRoutingMiddleware`` picks one replica for every GET/HEAD request
+and ``ReplicaRouter`` sends that request's reads to it; everything else,
+including management commands and writes, uses the primary. A client that
+has just placed an ``Order`` is pinned to the primary for
+``REPLICA_PIN_SECONDS`` so it reads its own booking back: by a cookie,
+and by user in the (shared) cache for clients that drop cookies. Replicas
+that cannot be reached (or lag too far behind with the ``least_lag``
+strategy) are skipped for ``REPLICA_RETRY_SECONDS``, and a request whose
+replica fails midway is run again on the primary.
+"""
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    InterfaceError,
+    OperationalError,
+    connections,
+)
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE_NAME = "replica_pin"
+
+_read_alias = ContextVar("read_alias", default=None)
+_pin_requested = ContextVar("pin_requested", default=False)
+
+
+class ReplicaSelector:
+    """Choose a healthy replica alias per request"""
+
+    def __init__(self) -> None:
+        self._counter = itertools.count()
+        self._unavailable_until = {}
+        self._lag = {}
+        self._lock = threading.Lock()
+
+    def select(self) -> Optional[str]:
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if self._unavailable_until.get(alias, 0) <= time.monotonic()
+        ]
+        if settings.REPLICA_SELECTION == "least_lag":
+            candidates = sorted(replicas, key=self.lag)
+            candidates = [
+                alias for alias in candidates
+                if self.lag(alias) <= settings.REPLICA_MAX_LAG_SECONDS
+            ]
+        else:
+            if replicas:
+                start = next(self._counter) % len(replicas)
+                replicas = replicas[start:] + replicas[:start]
+            candidates = replicas
+
+        for alias in candidates:
+            if self.is_available(alias):
+                return alias
+            self.mark_unavailable(alias)
+        return None
+
+    def mark_unavailable(self, alias: str) -> None:
+        with self._lock:
+            self._unavailable_until[alias] = (
+                time.monotonic() + settings.REPLICA_RETRY_SECONDS
+            )
+            self._lag.pop(alias, None)
+
+    @staticmethod
+    def is_available(alias: str) -> bool:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            return False
+        return True
+
+    def lag(self, alias: str) -> float:
+        """Replication lag in seconds, re-measured every few seconds"""
+        measured_at, lag = self._lag.get(alias, (None, 0.0))
+        now = time.monotonic()
+        if (
+            measured_at is not None
+            and now - measured_at < settings.REPLICA_LAG_CHECK_SECONDS
+        ):
+            return lag
+
+        lag = float("inf")
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    "SELECT COALESCE(EXTRACT(EPOCH FROM "
+                    "now() - pg_last_xact_replay_timestamp()), 0)"
+                )
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError:
+            pass
+        with self._lock:
+            self._lag[alias] = (now, lag)
+        return lag
+
+
+selector = ReplicaSelector()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model: Any, **hints: Any) -> Optional[str]:
+        return _read_alias.get()
+
+    def db_for_write(self, model: Any, **hints: Any) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> bool:
+        return True
+
+    def allow_migrate(
+        self, db: str, app_label: str, model_name=None, **hints: Any
+    ) -> bool:
+        return db not in settings.DATABASE_REPLICAS
+
+
+def _pin_key(user_id: Any) -> str:
+    return f"replica-pin:user:{user_id}"
+
+
+def _is_pinned(request: HttpRequest) -> bool:
+    pinned_until = request.COOKIES.get(PIN_COOKIE_NAME)
+    if pinned_until:
+        try:
+            if float(pinned_until) > time.time():
+                return True
+        except ValueError:
+            pass
+    # Clients that drop cookies are pinned by user in the shared cache.
+    from user.authentication import request_user
+
+    user = request_user(request)
+    return user is not None and bool(cache.get(_pin_key(user.pk)))
+
+
+def _replica_broken(alias: str) -> bool:
+    connection = connections[alias]
+    return connection.connection is None or not connection.is_usable()
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        alias = None
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in ("GET", "HEAD")
+            and not _is_pinned(request)
+        ):
+            alias = selector.select()
+
+        alias_token = _read_alias.set(alias)
+        pin_token = _pin_requested.set(False)
+        try:
+            response = self.get_response(request)
+            if _pin_requested.get():
+                self._pin(request, response)
+        finally:
+            _read_alias.reset(alias_token)
+            _pin_requested.reset(pin_token)
+        return response
+
+    @staticmethod
+    def _pin(request: HttpRequest, response: HttpResponse) -> None:
+        pin_seconds = settings.REPLICA_PIN_SECONDS
+        # The view replaced request.user with the user DRF authenticated.
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            cache.set(_pin_key(user.pk), True, pin_seconds)
+        response.set_cookie(
+            PIN_COOKIE_NAME,
+            str(time.time() + pin_seconds),
+            max_age=pin_seconds,
+            httponly=True,
+            samesite="Lax",
+        )
+
+    def process_exception(
+        self, request: HttpRequest, exception: Exception
+    ) -> Optional[HttpResponse]:
+        """
+        Run a read-only request again on the primary when its replica
+        failed in the middle of it.
+        """
+        alias = _read_alias.get()
+        if (
+            alias is None
+            or not isinstance(exception, (OperationalError, InterfaceError))
+            or not _replica_broken(alias)
+        ):
+            return None
+        logger.warning("Replica %s failed, retrying on primary", alias)
+        selector.mark_unavailable(alias)
+        try:
+            connections[alias].close()
+        except DatabaseError:
+            pass
+        _read_alias.set(None)
+        match = request.resolver_match
+        return match.func(request, *match.args, **match.kwargs)
+
+
+@receiver(post_save, sender="airport.Order")
+def pin_client_to_primary(**kwargs: Any) -> None:
+    _pin_requested.set(True)
@@ -52,10 +52,13 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "Aiport_API_Service.db_router.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "airport.profiling.ProfilingMiddleware",
+    "airport.slow_queries.SlowQueryMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -84,14 +87,81 @@ WSGI_APPLICATION = "Aiport_API_Service.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# With POSTGRES_POOL enabled connections are borrowed from an in-process
+# pool and handed back at the end of every request, otherwise Django keeps
+# one connection per thread for POSTGRES_CONN_MAX_AGE seconds.
+POSTGRES_POOL = os.getenv("POSTGRES_POOL", "False") == "True"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            "Aiport_API_Service.db_backends.postgresql_pool"
+            if POSTGRES_POOL
+            else "django.db.backends.postgresql"
+        ),
         "NAME": os.getenv("POSTGRES_DB"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
+        "CONN_MAX_AGE": (
+            0 if POSTGRES_POOL
+            else int(os.getenv("POSTGRES_CONN_MAX_AGE", 60))
+        ),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": (
+            {
+                "pool": {
+                    "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", 1)),
+                    "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10)),
+                    "timeout": float(os.getenv("POSTGRES_POOL_TIMEOUT", 30)),
+                }
+            }
+            if POSTGRES_POOL
+            else {}
+        ),
+    }
+}
+
+# Read replicas of the default database, e.g. "replica1:5432,replica2:5432".
+# Safe requests read from them, see Aiport_API_Service/db_router.py.
+DATABASE_REPLICAS = []
+for number, replica_host in enumerate(
+    filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")), 1
+):
+    host, _, port = replica_host.strip().partition(":")
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port,
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["Aiport_API_Service.db_router.ReplicaRouter"]
+
+# "round_robin" or "least_lag"
+REPLICA_SELECTION = os.getenv("REPLICA_SELECTION", "round_robin")
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+REPLICA_RETRY_SECONDS = int(os.getenv("REPLICA_RETRY_SECONDS", 30))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 10))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", 5))
+
+# Response cache versions, replica pins and slow-query rate limits must be
+# shared by all processes: set REDIS_URL, e.g. "redis://redis:6379/0".
+# Without it every process keeps its own in-memory cache, which is only
+# fit for development.
+REDIS_URL = os.getenv("REDIS_URL")
+
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+        if REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
 }
 
 
@@ -145,6 +215,77 @@ STATIC_URL = "static/"
 MEDIA_ROOT = "/vol/web/media"
 MEDIA_URL = "/media/"
 
+AIRPLANE_IMAGE_MAX_SIZE = int(
+    os.getenv("AIRPLANE_IMAGE_MAX_SIZE", 5 * 1024 * 1024)
+)
+AIRPLANE_IMAGE_MAX_DIMENSION = int(
+    os.getenv("AIRPLANE_IMAGE_MAX_DIMENSION", 4096)
+)
+# Airplane images stored or reused more recently than this are only
+# deleted by gc_airplane_images, never right after being released.
+AIRPLANE_IMAGE_GRACE_SECONDS = int(
+    os.getenv("AIRPLANE_IMAGE_GRACE_SECONDS", 3600)
+)
+
+# Largest list accepted by the batch create endpoints (airport/bulk.py)
+AIRPORT_MAX_BATCH_SIZE = int(os.getenv("AIRPORT_MAX_BATCH_SIZE", 1000))
+
+# The change feed (airport/changes.py) holds back changes younger than
+# this, it must exceed the longest write transaction and replica lag.
+CHANGE_FEED_SETTLE_SECONDS = float(
+    os.getenv("CHANGE_FEED_SETTLE_SECONDS", 15)
+)
+
+# Flight and order lists are cached with their gzip and brotli encodings
+# (airport/response_cache.py), smaller bodies are not compressed.
+RESPONSE_CACHE_SECONDS = int(os.getenv("RESPONSE_CACHE_SECONDS", 10))
+RESPONSE_COMPRESSION_MIN_SIZE = int(
+    os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", 1024)
+)
+
+# How often a process checks that its nearest-airport index
+# (airport/spatial.py) still matches the airport table.
+NEAREST_AIRPORT_RECHECK_SECONDS = float(
+    os.getenv("NEAREST_AIRPORT_RECHECK_SECONDS", 5)
+)
+
+# Background jobs of the outbox (airport/outbox.py), run by run_worker
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", 5))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+
+# Mail sent by the outbox jobs, e.g. order confirmations. The console
+# backend only prints it; set EMAIL_BACKEND to
+# "django.core.mail.backends.smtp.EmailBackend" and the EMAIL_HOST*
+# variables to deliver it.
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
+)
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", 25))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "False") == "True"
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "webmaster@localhost")
+
+# Commit orders in batches of up to ORDER_BATCH_SIZE, waiting at most
+# ORDER_BATCH_WAIT_MS for a batch to fill (airport/group_commit.py).
+ORDER_GROUP_COMMIT = os.getenv("ORDER_GROUP_COMMIT", "False") == "True"
+ORDER_BATCH_SIZE = int(os.getenv("ORDER_BATCH_SIZE", 32))
+ORDER_BATCH_WAIT_MS = float(os.getenv("ORDER_BATCH_WAIT_MS", 5))
+
+# Fraction of all requests profiled by airport/profiling.py besides the
+# ones staff ask for with X-Profile, and how many profiles are kept.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 500))
+
+# Queries of the airport and user views slower than this are logged by
+# airport/slow_queries.py (0 turns it off) and explained by the outbox
+# worker, each normalized query at most once per
+# SLOW_QUERY_EXPLAIN_SECONDS.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_EXPLAIN_SECONDS = int(os.getenv("SLOW_QUERY_EXPLAIN_SECONDS", 60))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -153,12 +294,12 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "airport.throttling.SharedAnonRateThrottle",
+        "airport.throttling.SharedUserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "10/day", "user": "1000/day"},
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -180,4 +321,10 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=200),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER":
+        "user.serializers.ClaimsTokenObtainPairSerializer",
 }
+
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", 30))
+JWT_USER_CACHE_SIZE = 10000
+JWT_VERIFIED_TOKEN_CACHE_SIZE = 10000
@@ -1,4 +1,8 @@
 from django.contrib import admin
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 
 from airport.models import (
     AirplaneType,
@@ -8,8 +12,13 @@ from airport.models import (
     Route,
     Flight,
     Order,
+    OutboxJob,
+    RequestProfile,
+    ScheduleTemplate,
+    SlowQuery,
     Ticket
 )
+from airport.profiling import summary
 
 
 class TicketInline(admin.TabularInline):
@@ -17,6 +26,115 @@ class TicketInline(admin.TabularInline):
     extra = 1
 
 
+@admin.register(OutboxJob)
+class OutboxJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "attempts", "run_at", "created_at")
+    list_filter = ("status", "kind")
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "user",
+        "sampled",
+        "download",
+    )
+    list_filter = ("sampled", "method")
+    search_fields = ("path", "request_id")
+    exclude = ("stats",)
+    readonly_fields = (
+        "request_id",
+        "method",
+        "path",
+        "user",
+        "sampled",
+        "status_code",
+        "duration_ms",
+        "created_at",
+        "download",
+        "top_functions",
+    )
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(self, request: HttpRequest, obj=None) -> bool:
+        return False
+
+    def get_urls(self) -> list:
+        return [
+            path(
+                "<int:object_id>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="airport_requestprofile_download",
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request: HttpRequest, object_id: int):
+        profile = get_object_or_404(RequestProfile, pk=object_id)
+        if not self.has_view_permission(request, profile):
+            return HttpResponse(status=403)
+        response = HttpResponse(
+            bytes(profile.stats), content_type="application/octet-stream"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{profile.request_id}.prof"'
+        )
+        return response
+
+    @admin.display(description="Profile")
+    def download(self, profile: RequestProfile) -> str:
+        return format_html(
+            '<a href="{}">{}.prof</a>',
+            reverse(
+                "admin:airport_requestprofile_download", args=[profile.pk]
+            ),
+            profile.request_id,
+        )
+
+    @admin.display(description="Top functions")
+    def top_functions(self, profile: RequestProfile) -> str:
+        return format_html("<pre>{}</pre>", summary(profile))
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "duration_ms", "view", "caller", "short_sql")
+    list_filter = ("view", "database")
+    search_fields = ("sql", "caller", "fingerprint")
+    exclude = ("plan",)
+    readonly_fields = (
+        "created_at",
+        "duration_ms",
+        "view",
+        "caller",
+        "database",
+        "fingerprint",
+        "sql",
+        "params",
+        "query_plan",
+    )
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(self, request: HttpRequest, obj=None) -> bool:
+        return False
+
+    @admin.display(description="SQL")
+    def short_sql(self, query: SlowQuery) -> str:
+        return query.sql[:120]
+
+    @admin.display(description="Plan")
+    def query_plan(self, query: SlowQuery) -> str:
+        return format_html("<pre>{}</pre>", query.plan)
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     inlines = (TicketInline, )
@@ -28,4 +146,5 @@ admin.site.register(Crew)
 admin.site.register(Airport)
 admin.site.register(Route)
 admin.site.register(Flight)
+admin.site.register(ScheduleTemplate)
 admin.site.register(Ticket)
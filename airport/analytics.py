@@ -0,0 +1,185 @@
+"""
+Daily load factor per route and airplane type.
+
+Aggregating tickets on every request scans the whole ticket table, so the
+numbers are kept in ``RouteLoadFactor``. Every change to a ticket, flight
+or airplane appends the affected departure days to ``LoadFactorChange``
+(an append-only log, so concurrent bookings never wait on each other) and
+``refresh_load_factors`` recomputes only those days.
+"""
+import datetime
+from typing import Any, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import (
+    Count,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from airport.models import (
+    Airplane,
+    Flight,
+    LoadFactorChange,
+    RouteLoadFactor,
+    Ticket,
+)
+
+GROUPS = ("day", "route", "airplane__airplane_type")
+
+
+def departure_day(moment: Any) -> datetime.date:
+    # Instances may still hold the string they were created with.
+    moment = Flight._meta.get_field("departure_time").to_python(moment)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment.astimezone(datetime.timezone.utc).date()
+
+
+def days_filter(days: Iterable[datetime.date]) -> Q:
+    """
+    Departure ranges covering ``days``, consecutive days are merged so
+    the filter stays short and PostgreSQL can prune flight partitions.
+    """
+    ranges = []
+    for day in sorted(set(days)):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + datetime.timedelta(days=1)
+        else:
+            ranges.append([day, day + datetime.timedelta(days=1)])
+
+    condition = Q(pk__in=[])
+    for first, end in ranges:
+        condition |= Q(
+            departure_time__gte=_midnight(first),
+            departure_time__lt=_midnight(end),
+        )
+    return condition
+
+
+def _midnight(day: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(
+        day, datetime.time(), tzinfo=datetime.timezone.utc
+    )
+
+
+def load_factor_rows(flights: QuerySet[Flight]) -> QuerySet:
+    """Aggregate ``flights`` and their tickets by day, route and type"""
+    tickets_sold = (
+        Ticket.objects.filter(
+            flight=OuterRef("pk"), departure_time=OuterRef("departure_time")
+        )
+        .order_by()
+        .values("flight")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return (
+        flights.annotate(
+            day=TruncDate("departure_time", tzinfo=datetime.timezone.utc),
+            sold=Coalesce(Subquery(tickets_sold), Value(0)),
+        )
+        .order_by()
+        .values(*GROUPS)
+        .annotate(
+            flights=Count("id"),
+            seats=Sum(F("airplane__rows") * F("airplane__seats_in_row")),
+            tickets_sold=Sum("sold"),
+        )
+    )
+
+
+def _store(rows: Iterable[dict]) -> int:
+    created = RouteLoadFactor.objects.bulk_create(
+        [
+            RouteLoadFactor(
+                day=row["day"],
+                route_id=row["route"],
+                airplane_type_id=row["airplane__airplane_type"],
+                flights=row["flights"],
+                seats=row["seats"],
+                tickets_sold=row["tickets_sold"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+    return len(created)
+
+
+def refresh_load_factors(full: bool = False) -> int:
+    """
+    Recompute the load factors of the changed days, or of every day with
+    ``full``. Returns the number of summary rows written.
+    """
+    with transaction.atomic():
+        last_change = LoadFactorChange.objects.aggregate(last=Max("id"))[
+            "last"
+        ]
+        # Locking the consumed log rows serializes concurrent refreshes.
+        changes = LoadFactorChange.objects.select_for_update().filter(
+            id__lte=last_change or 0
+        )
+        days = set(changes.values_list("day", flat=True))
+        changes.delete()
+
+        if full:
+            RouteLoadFactor.objects.all().delete()
+            return _store(load_factor_rows(Flight.objects.all()))
+
+        if not days:
+            return 0
+        RouteLoadFactor.objects.filter(day__in=days).delete()
+        return _store(
+            load_factor_rows(Flight.objects.filter(days_filter(days)))
+        )
+
+
+def mark_changed(days: Iterable[Optional[datetime.date]]) -> None:
+    LoadFactorChange.objects.bulk_create(
+        [LoadFactorChange(day=day) for day in set(days) if day is not None]
+    )
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def ticket_changed(instance: Ticket, **kwargs: Any) -> None:
+    mark_changed([departure_day(instance.departure_time)])
+
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+def flight_changed(instance: Flight, **kwargs: Any) -> None:
+    # Flight.save() updates _loaded_departure_time after this signal, so it
+    # still holds the day the flight is moved away from.
+    previous = instance._loaded_departure_time
+    mark_changed(
+        [
+            departure_day(instance.departure_time),
+            departure_day(previous) if previous else None,
+        ]
+    )
+
+
+@receiver(post_save, sender=Airplane)
+def airplane_changed(
+    instance: Airplane, created: bool, **kwargs: Any
+) -> None:
+    if created:
+        return
+    mark_changed(
+        departure_day(departure_time)
+        for departure_time in instance.flights.values_list(
+            "departure_time", flat=True
+        )
+    )
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AirportConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "airport"
+
+    def ready(self) -> None:
+        from airport import (  # noqa: F401
+            analytics,
+            changes,
+            jobs,
+            response_cache,
+            seat_events,
+        )
@@ -0,0 +1,78 @@
+"""
+Reference data the frontend needs at start-up, in one response.
+
+The airplane types, airports, routes, crew and airplanes are serialized
+as their list endpoints do, compressed and hashed once, and kept per
+process until the fingerprint of the underlying tables changes. The
+fingerprint is the row count and the latest ``updated_at`` of every
+table, read with a single query on indexed columns; the count catches
+deletes, the timestamp inserts and updates.
+"""
+import threading
+
+from django.db import connections, router
+
+from airport.compression import Payload
+from airport.models import AirplaneType, Airplane, Airport, Crew, Route
+from airport.serializers import (
+    AirplaneListSerializer,
+    AirplaneTypeSerializer,
+    AirportListSerializer,
+    CrewSerializer,
+    RouteListSerializer,
+)
+
+DATASETS = {
+    "airplane_types": (AirplaneType.objects.all(), AirplaneTypeSerializer),
+    "airports": (Airport.objects.all(), AirportListSerializer),
+    "routes": (
+        Route.objects.select_related("destination", "source"),
+        RouteListSerializer,
+    ),
+    "crew": (Crew.objects.all(), CrewSerializer),
+    "airplanes": (Airplane.objects.all(), AirplaneListSerializer),
+}
+
+_lock = threading.Lock()
+_cached = (None, None)
+
+
+def fingerprint() -> tuple:
+    sql = "SELECT " + ", ".join(
+        f'(SELECT count(*) FROM "{queryset.model._meta.db_table}"), '
+        f'(SELECT max(updated_at) FROM "{queryset.model._meta.db_table}")'
+        for queryset, _ in DATASETS.values()
+    )
+    alias = router.db_for_read(AirplaneType)
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql)
+        return tuple(cursor.fetchone())
+
+
+def build_payload() -> Payload:
+    data = {
+        name: serializer(queryset.order_by("pk"), many=True).data
+        for name, (queryset, serializer) in DATASETS.items()
+    }
+    return Payload.from_data(data)
+
+
+def bootstrap_payload() -> Payload:
+    global _cached
+
+    version = fingerprint()
+    cached_version, payload = _cached
+    if cached_version == version:
+        return payload
+
+    with _lock:
+        cached_version, payload = _cached
+        if cached_version != version:
+            payload = build_payload()
+            _cached = (version, payload)
+    return payload
+
+
+def clear_cache() -> None:
+    global _cached
+    _cached = (None, None)
@@ -0,0 +1,183 @@
+"""
+Creating many objects with one POST of a JSON list.
+
+``BulkCreateModelMixin`` validates the list with the serializer's
+``BulkCreateListSerializer``, which loads every referenced object with one
+query per related model before the items are validated and inserts the
+items and their many-to-many links with ``bulk_create``. Errors are
+reported per item, in the order of the payload.
+
+Child serializers may define ``batch_errors(items)``, returning one error
+dict per item for checks that span the whole batch, ``lock_batch(items)``
+to lock rows and check again inside the saving transaction, and
+``after_bulk_create(instances)`` for what ``save()`` would otherwise do.
+"""
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from rest_framework import mixins, serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.response import Response
+
+from airport.response_cache import invalidate_on_commit
+
+RELATED_CACHE_KEY = "related_instances"
+BULK_INSERT_SIZE = 1000
+
+
+class BatchPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves primary keys from the objects preloaded for the batch"""
+
+    def to_internal_value(self, data: Any) -> Any:
+        instances = self.context.get(RELATED_CACHE_KEY, {}).get(
+            self.get_queryset().model
+        )
+        if instances is None:
+            return super().to_internal_value(data)
+        if str(data) in instances:
+            return instances[str(data)]
+        # Unknown keys were looked up with the batch, so only malformed
+        # ones need the default handling.
+        if _to_pk(self.get_queryset().model, data) is not None:
+            self.fail("does_not_exist", pk_value=data)
+        return super().to_internal_value(data)
+
+
+def _to_pk(model: Any, value: Any) -> Any:
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        return model._meta.pk.to_python(value)
+    except DjangoValidationError:
+        return None
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    def _related_fields(self) -> list:
+        fields = []
+        for name, field in self.child.fields.items():
+            if field.read_only:
+                continue
+            if isinstance(field, ManyRelatedField):
+                fields.append((name, field.child_relation, True))
+            elif isinstance(field, RelatedField):
+                fields.append((name, field, False))
+        return fields
+
+    def _preload_related(self, data: list) -> None:
+        # Fields of the same model (route source and destination) share
+        # one query.
+        querysets = {}
+        keys = {}
+        for name, field, many in self._related_fields():
+            if not isinstance(field, BatchPrimaryKeyRelatedField):
+                continue
+            model = field.get_queryset().model
+            querysets.setdefault(model, field.get_queryset())
+            for item in data:
+                if not isinstance(item, dict) or item.get(name) is None:
+                    continue
+                values = item[name] if many else [item[name]]
+                if not isinstance(values, list):
+                    values = [values]
+                for value in values:
+                    pk = _to_pk(model, value)
+                    if pk is not None:
+                        keys.setdefault(model, set()).add(pk)
+
+        self.context[RELATED_CACHE_KEY] = {
+            model: {
+                str(instance.pk): instance
+                for instance in querysets[model].filter(pk__in=pks)
+            }
+            for model, pks in keys.items()
+        }
+
+    def to_internal_value(self, data: Any) -> list:
+        if isinstance(data, list):
+            self._preload_related(data)
+        items = super().to_internal_value(data)
+
+        if hasattr(self.child, "batch_errors"):
+            errors = self.child.batch_errors(items)
+            if any(errors):
+                raise ValidationError(errors)
+        return items
+
+    def create(self, validated_data: list) -> list:
+        model = self.child.Meta.model
+        many_to_many = [
+            name for name, _, many in self._related_fields() if many
+        ]
+
+        with transaction.atomic():
+            if hasattr(self.child, "lock_batch"):
+                self.child.lock_batch(validated_data)
+
+            instances = model.objects.bulk_create(
+                [
+                    model(
+                        **{
+                            name: value
+                            for name, value in item.items()
+                            if name not in many_to_many
+                        }
+                    )
+                    for item in validated_data
+                ],
+                batch_size=BULK_INSERT_SIZE,
+            )
+            for name in many_to_many:
+                self._create_links(model, name, instances, validated_data)
+
+            if hasattr(self.child, "after_bulk_create"):
+                self.child.after_bulk_create(instances)
+            # bulk_create sends no post_save signal.
+            invalidate_on_commit()
+
+        if many_to_many:
+            prefetch_related_objects(instances, *many_to_many)
+        return instances
+
+    @staticmethod
+    def _create_links(
+        model: Any, name: str, instances: list, validated_data: list
+    ) -> None:
+        field = model._meta.get_field(name)
+        through = getattr(model, name).through
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        through.objects.bulk_create(
+            [
+                through(
+                    **{
+                        f"{source}_id": instance.pk,
+                        f"{target}_id": related.pk,
+                    }
+                )
+                for instance, item in zip(instances, validated_data)
+                for related in item.get(name, [])
+            ],
+            batch_size=BULK_INSERT_SIZE,
+        )
+
+
+class BulkCreateModelMixin(mixins.CreateModelMixin):
+    """Create one object from a JSON object or many from a JSON list"""
+
+    def create(self, request: Any, *args, **kwargs) -> Response:
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            max_length=settings.AIRPORT_MAX_BATCH_SIZE,
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,150 @@
+"""
+Incremental change feed of flights, routes, airports and airplanes.
+
+Every row carries an indexed ``updated_at`` and deletes leave a
+``Tombstone``, so ``?since=<cursor>`` reads only what changed after the
+cursor with one keyset query per table. Changes are ordered by
+``(updated_at, kind, id)``, which is stable across pages, and the cursor
+is that key of the last change returned.
+
+``updated_at`` is taken when a row is saved, not when its transaction
+commits, so a slow transaction can commit rows older than a cursor that
+was already handed out. The feed therefore only returns changes older
+than ``CHANGE_FEED_SETTLE_SECONDS``.
+"""
+import base64
+import binascii
+import datetime
+import heapq
+import json
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport.models import Airplane, Airport, Crew, Flight, Route, Tombstone
+
+TRACKED_MODELS = (Airport, Airplane, Route, Flight)
+# Rank of every kind in the order of changes with the same timestamp.
+TOMBSTONE_RANK = len(TRACKED_MODELS)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(key: tuple) -> str:
+    moment, rank, pk = key
+    raw = json.dumps([moment.isoformat(), rank, pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        moment, rank, pk = json.loads(raw)
+        moment = parse_datetime(moment)
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    if moment is None or not isinstance(rank, int) or not isinstance(pk, int):
+        raise InvalidCursor(cursor)
+    return moment, rank, pk
+
+
+def _after(
+    field: str, rank: int, cursor: Optional[tuple]
+) -> Q:
+    """Rows of the kind ranked ``rank`` that sort after ``cursor``"""
+    if cursor is None:
+        return Q()
+    moment, cursor_rank, pk = cursor
+    if rank > cursor_rank:
+        return Q(**{f"{field}__gte": moment})
+    if rank < cursor_rank:
+        return Q(**{f"{field}__gt": moment})
+    return Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "pk__gt": pk})
+
+
+def _changed(
+    queryset: QuerySet, rank: int, cursor: Optional[tuple], horizon: Any,
+    limit: int,
+) -> Iterator[tuple]:
+    rows = (
+        queryset.filter(_after("updated_at", rank, cursor))
+        .filter(updated_at__lte=horizon)
+        .order_by("updated_at", "pk")[:limit]
+    )
+    for row in rows:
+        yield (row.updated_at, rank, row.pk), row
+
+
+def _deleted(
+    cursor: Optional[tuple], horizon: Any, limit: int
+) -> Iterator[tuple]:
+    rows = (
+        Tombstone.objects.filter(_after("deleted_at", TOMBSTONE_RANK, cursor))
+        .filter(deleted_at__lte=horizon)
+        .order_by("deleted_at", "pk")[:limit]
+    )
+    for row in rows:
+        yield (row.deleted_at, TOMBSTONE_RANK, row.pk), row
+
+
+def changes_since(
+    cursor: Optional[tuple], limit: int, querysets: dict
+) -> tuple:
+    """
+    Up to ``limit`` changes after ``cursor`` as ``(key, row)`` pairs in
+    feed order, and whether more are waiting. ``querysets`` maps each
+    tracked model to the queryset its rows are read from.
+    """
+    horizon = timezone.now() - datetime.timedelta(
+        seconds=settings.CHANGE_FEED_SETTLE_SECONDS
+    )
+    sources = [
+        _changed(querysets[model], rank, cursor, horizon, limit + 1)
+        for rank, model in enumerate(TRACKED_MODELS)
+    ]
+    sources.append(_deleted(cursor, horizon, limit + 1))
+
+    changes = []
+    for change in heapq.merge(*sources, key=lambda change: change[0]):
+        if len(changes) == limit:
+            return changes, True
+        changes.append(change)
+    return changes, False
+
+
+def touch_flights(flights: QuerySet) -> None:
+    flights.update(updated_at=timezone.now())
+
+
+@receiver(post_delete)
+def record_tombstone(sender: Any, instance: Any, **kwargs) -> None:
+    if sender in TRACKED_MODELS:
+        Tombstone.objects.create(
+            model=sender._meta.model_name, object_id=instance.pk
+        )
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def crew_changed(
+    sender: Any, instance: Any, action: str, reverse: bool, pk_set: Any,
+    **kwargs
+) -> None:
+    if not reverse:
+        if action.startswith("post_"):
+            touch_flights(Flight.objects.filter(pk=instance.pk))
+    elif action in ("post_add", "post_remove"):
+        touch_flights(Flight.objects.filter(pk__in=pk_set))
+    elif action == "pre_clear":
+        touch_flights(Flight.objects.filter(crew=instance))
+
+
+@receiver(pre_delete, sender=Crew)
+def crew_deleted(sender: Any, instance: Crew, **kwargs) -> None:
+    touch_flights(Flight.objects.filter(crew=instance))
@@ -0,0 +1,112 @@
+"""
+Responses built once and served as stored bytes.
+
+A ``Payload`` keeps the JSON body together with its gzip and brotli
+encodings and a content hash, so serving it costs neither serialization
+nor compression and clients revalidate with ``If-None-Match`` instead of
+downloading it again. Brotli is used when the ``brotli`` package is
+installed.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Optional
+
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred first when a client accepts several.
+ENCODINGS = ("br", "gzip")
+
+
+def accepted_encodings(header: str) -> set:
+    """Codings of an ``Accept-Encoding`` header not refused with q=0"""
+    accepted = set()
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    if "*" in accepted:
+        accepted.update(ENCODINGS)
+    return accepted
+
+
+class Payload:
+    def __init__(
+        self,
+        body: bytes,
+        min_size: int = 0,
+        gzip_level: int = 9,
+        brotli_quality: int = 11,
+    ) -> None:
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.etag = f'"{self.digest}"'
+        # Small bodies gain less from compression than the headers cost.
+        self.encodings = {}
+        if len(body) >= min_size:
+            self.encodings["gzip"] = gzip.compress(body, gzip_level, mtime=0)
+            if brotli is not None:
+                self.encodings["br"] = brotli.compress(
+                    body, quality=brotli_quality
+                )
+
+    @classmethod
+    def from_data(cls, data: Any, **kwargs) -> "Payload":
+        return cls(
+            json.dumps(
+                data, cls=JSONEncoder, ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode(),
+            **kwargs,
+        )
+
+    def response(
+        self, request: HttpRequest, response: Optional[HttpResponse] = None
+    ) -> HttpResponse:
+        """
+        Serve the payload in the best encoding ``request`` accepts, as
+        ``response`` (an already rendered response of it) if given.
+        """
+        if self.etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            accepted = accepted_encodings(
+                request.headers.get("Accept-Encoding", "")
+            )
+            encoding = next(
+                (
+                    encoding
+                    for encoding in ENCODINGS
+                    if encoding in accepted and encoding in self.encodings
+                ),
+                None,
+            )
+            if response is None:
+                response = HttpResponse(content_type="application/json")
+            response.content = (
+                self.encodings[encoding] if encoding else self.body
+            )
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = self.etag
+        # Every user may read it, but only with a token.
+        response["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(
+            response, ("Accept", "Accept-Encoding", "Authorization")
+        )
+        return response
@@ -0,0 +1,168 @@
+"""
+Sparse fieldsets: ``?fields=id,departure_time`` or ``?exclude=crew``.
+
+``SparseFieldsetMixin`` drops the other fields from the serializer and
+builds the queryset from what the remaining fields need, so unused
+columns are not selected, unused relations are neither joined nor
+prefetched and unused annotations are not computed.
+
+What a field needs is derived from its ``source`` (``airplane.name``
+joins the airplane and loads its name) and can be declared in the
+serializer's ``Meta.field_requirements`` for sources the derivation
+cannot see through, like properties, ``__str__`` or annotations::
+
+    field_requirements = {
+        "route": {
+            "select": ["route__source", "route__destination"],
+            "only": ["route__source__name", "route__destination__name"],
+        },
+        "tickets_available": {"annotate": ["tickets_available"]},
+    }
+"""
+from typing import Any, Callable, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        description="Only return these fields (ex. ?fields=id,name)",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="exclude",
+        description="Leave out these fields (ex. ?exclude=crew)",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+]
+
+
+class SparseFieldsetSerializerMixin:
+    """Serializer accepting ``fieldset``, the names of fields to keep"""
+
+    def __init__(self, *args, fieldset: Optional[set] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fieldset is not None:
+            for name in set(self.fields) - fieldset:
+                self.fields.pop(name)
+
+
+def field_requirements(serializer: Any, name: str) -> dict:
+    declared = getattr(serializer.Meta, "field_requirements", {})
+    if name in declared:
+        return declared[name]
+
+    field = serializer.fields[name]
+    if field.source == "*":
+        return {}
+    path = field.source.split(".")
+    lookup = "__".join(path)
+    if len(path) > 1:
+        return {"select": ["__".join(path[:-1])], "only": [lookup]}
+
+    try:
+        model_field = serializer.Meta.model._meta.get_field(lookup)
+    except FieldDoesNotExist:
+        return {}
+    if model_field.many_to_many or model_field.one_to_many:
+        return {"prefetch": [lookup]}
+    if model_field.is_relation and not isinstance(
+        field, serializers.PrimaryKeyRelatedField
+    ):
+        return {"select": [lookup]}
+    return {"only": [lookup]}
+
+
+def trim_queryset(
+    queryset: QuerySet,
+    serializer: Any,
+    annotations: dict[str, Callable[[QuerySet], QuerySet]],
+) -> QuerySet:
+    """Reduce ``queryset`` to what the fields of ``serializer`` need"""
+    only, select, prefetch, annotate = set(), set(), set(), set()
+    for name in serializer.fields:
+        requirements = field_requirements(serializer, name)
+        only.update(requirements.get("only", ()))
+        select.update(requirements.get("select", ()))
+        prefetch.update(requirements.get("prefetch", ()))
+        annotate.update(requirements.get("annotate", ()))
+
+    # A joined relation must not be deferred.
+    only.update(
+        relation for relation in select
+        if not any(lookup.startswith(f"{relation}__") for lookup in only)
+    )
+    queryset = (
+        queryset.select_related(None)
+        .prefetch_related(None)
+        .prefetch_related(*sorted(prefetch))
+        .only(*sorted(only) or ["pk"])
+    )
+    if select:
+        # select_related() without arguments would follow every relation.
+        queryset = queryset.select_related(*sorted(select))
+    for name in sorted(annotate):
+        queryset = annotations[name](queryset)
+    return queryset
+
+
+class SparseFieldsetMixin:
+    """
+    Viewset mixin applying ``?fields=`` and ``?exclude=`` to the
+    serializer and queryset of safe requests. Views build their queryset
+    from ``get_base_queryset()`` and list the annotation helpers that
+    ``Meta.field_requirements`` refer to in ``queryset_annotations``.
+    """
+
+    queryset_annotations: dict[str, Callable[[QuerySet], QuerySet]] = {}
+
+    def get_fieldset(self) -> Optional[set]:
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+
+        fields = request.query_params.get("fields")
+        exclude = request.query_params.get("exclude")
+        if not fields and not exclude:
+            return None
+
+        available = set(self.get_serializer_class()().fields)
+        fieldset = set(available)
+        for param, value in (("fields", fields), ("exclude", exclude)):
+            if not value:
+                continue
+            names = {name.strip() for name in value.split(",") if name}
+            unknown = names - available
+            if unknown:
+                raise ValidationError(
+                    {param: f"Unknown field(s): {', '.join(sorted(unknown))}"}
+                )
+            if param == "fields":
+                fieldset &= names
+            else:
+                fieldset -= names
+        return fieldset
+
+    def get_serializer(self, *args, **kwargs) -> Any:
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            kwargs["fieldset"] = fieldset
+        return super().get_serializer(*args, **kwargs)
+
+    def get_base_queryset(self) -> QuerySet:
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return self.queryset.all()
+        return trim_queryset(
+            self.queryset.model._default_manager.all(),
+            self.get_serializer_class()(fieldset=fieldset),
+            self.queryset_annotations,
+        )
@@ -0,0 +1,70 @@
+"""
+Great-circle distances between airports.
+
+``haversine_km`` works on NumPy arrays, so the distances of every route
+are computed in a few vectorized operations instead of a Python loop,
+and on plain numbers for a single route.
+"""
+from typing import Any, Iterator, Optional
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+# Half the circumference, no two points are further apart.
+MAX_DISTANCE_KM = np.pi * EARTH_RADIUS_KM
+
+
+def haversine_km(
+    latitude_1: Any, longitude_1: Any, latitude_2: Any, longitude_2: Any
+) -> Any:
+    """Distance in kilometres between points given in degrees"""
+    latitude_1, longitude_1, latitude_2, longitude_2 = (
+        np.radians(np.asarray(value, dtype=np.float64))
+        for value in (latitude_1, longitude_1, latitude_2, longitude_2)
+    )
+    half_chord = (
+        np.sin((latitude_2 - latitude_1) / 2) ** 2
+        + np.cos(latitude_1)
+        * np.cos(latitude_2)
+        * np.sin((longitude_2 - longitude_1) / 2) ** 2
+    )
+    # Rounding can push ``half_chord`` just above 1 for antipodal points.
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(half_chord, 0, 1)))
+
+
+def route_distance(source: Any, destination: Any) -> Optional[int]:
+    """Rounded distance between two airports, None without coordinates"""
+    coordinates = (
+        source.latitude,
+        source.longitude,
+        destination.latitude,
+        destination.longitude,
+    )
+    if any(value is None for value in coordinates):
+        return None
+    return int(np.rint(haversine_km(*coordinates)))
+
+
+def route_distances(rows: list) -> tuple:
+    """
+    Ids and rounded distances of ``(id, source latitude, source
+    longitude, destination latitude, destination longitude)`` rows, rows
+    with a missing coordinate are left out.
+    """
+    table = np.array(rows, dtype=np.float64).reshape(-1, 5)
+    table = table[~np.isnan(table).any(axis=1)]
+    distances = haversine_km(
+        table[:, 1], table[:, 2], table[:, 3], table[:, 4]
+    )
+    return table[:, 0].astype(np.int64), np.rint(distances).astype(np.int64)
+
+
+def chunks(rows: Iterator, size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
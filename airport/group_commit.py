@@ -0,0 +1,169 @@
+"""
+Group commit of orders for booking bursts.
+
+With ``ORDER_GROUP_COMMIT`` enabled, a validated order is handed to the
+process-wide ``order_batcher`` instead of being saved by the request.
+Its committer thread collects orders until ``ORDER_BATCH_SIZE`` are
+waiting or ``ORDER_BATCH_WAIT_MS`` passed since the first one, and saves
+them all in one transaction, so a burst pays one commit (and fsync) per
+batch instead of one per order. Every order is saved in its own
+savepoint: an order losing a seat to another order of the same batch is
+rolled back alone and its request gets a 400, the others commit.
+
+Batching only helps when requests of a process run concurrently
+(threaded or ASGI servers); a single-threaded worker only adds the wait.
+A request whose order is still queued after ``RESULT_TIMEOUT_SECONDS``
+gets a 503 and the order is dropped; once the committer took the order,
+the request waits for its outcome instead.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, close_old_connections, transaction
+from rest_framework import serializers
+from rest_framework.exceptions import APIException, ValidationError
+
+from Aiport_API_Service.db_router import pin_client_to_primary
+
+logger = logging.getLogger(__name__)
+
+# How long a request waits for its batch to be taken before giving up.
+RESULT_TIMEOUT_SECONDS = 30
+
+QUEUED = "queued"
+TAKEN = "taken"
+ABANDONED = "abandoned"
+
+
+class BatchUnavailable(APIException):
+    status_code = 503
+    default_detail = "The order could not be committed in time."
+    default_code = "batch_unavailable"
+
+
+class PendingSave:
+    def __init__(self, serializer: serializers.Serializer, **kwargs) -> None:
+        self.serializer = serializer
+        self.kwargs = kwargs
+        self.error = None
+        # Changed under the batcher's lock only.
+        self.state = QUEUED
+        self.done = threading.Event()
+
+
+def save_batch(batch: list) -> None:
+    """
+    Save the serializers of ``batch`` in one transaction, each in its own
+    savepoint, and record the error of every one that failed.
+    """
+    try:
+        with transaction.atomic():
+            for pending in batch:
+                try:
+                    with transaction.atomic():
+                        pending.serializer.save(**pending.kwargs)
+                except (
+                    DatabaseError, DjangoValidationError, ValidationError
+                ) as error:
+                    pending.error = error
+    except DatabaseError as error:
+        # The commit itself failed, none of the orders was saved.
+        for pending in batch:
+            pending.error = pending.error or error
+
+
+def as_api_error(error: Exception) -> Exception:
+    if isinstance(error, ValidationError):
+        return error
+    if isinstance(error, DjangoValidationError):
+        return ValidationError(error.messages)
+    logger.info("Order rolled back in its batch: %s", error)
+    return ValidationError(
+        "One of the seats was taken by another order, please retry."
+    )
+
+
+class OrderBatcher:
+    def __init__(self) -> None:
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def save(self, serializer: serializers.Serializer, **kwargs) -> Any:
+        """Queue ``serializer`` for the next batch and wait for the commit"""
+        self._ensure_thread()
+        pending = PendingSave(serializer, **kwargs)
+        self._queue.put(pending)
+        if not pending.done.wait(RESULT_TIMEOUT_SECONDS):
+            with self._lock:
+                if pending.state == QUEUED:
+                    pending.state = ABANDONED
+            if pending.state == ABANDONED:
+                raise BatchUnavailable()
+            # The committer is saving the order, it may already be saved.
+            pending.done.wait()
+        if pending.error is not None:
+            raise as_api_error(pending.error)
+        # The post_save receiver ran in the committer thread.
+        pin_client_to_primary()
+        return serializer.instance
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="order-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + settings.ORDER_BATCH_WAIT_MS / 1000
+        while len(batch) < settings.ORDER_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _take(self, batch: list) -> list:
+        """Mark the orders of ``batch`` taken, dropping abandoned ones"""
+        with self._lock:
+            for pending in batch:
+                if pending.state == QUEUED:
+                    pending.state = TAKEN
+        return [pending for pending in batch if pending.state == TAKEN]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take(self._collect())
+            if not batch:
+                continue
+            close_old_connections()
+            try:
+                save_batch(batch)
+            except Exception as error:
+                logger.exception("Order batch failed")
+                for pending in batch:
+                    pending.error = pending.error or error
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+
+order_batcher = OrderBatcher()
+
+
+def save_order(serializer: serializers.Serializer, **kwargs) -> Any:
+    """Save an order in the next batch, or right away when disabled"""
+    if settings.ORDER_GROUP_COMMIT:
+        return order_batcher.save(serializer, **kwargs)
+    return serializer.save(**kwargs)
@@ -0,0 +1,46 @@
+"""
+Handlers of the outbox jobs (airport/outbox.py).
+
+They run at least once, possibly more often, and must tolerate that.
+"""
+from django.core.mail import send_mail
+
+from airport.models import Order, SlowQuery
+from airport.outbox import handler
+from airport.slow_queries import explain
+
+
+@handler("order_confirmation")
+def send_order_confirmation(order_id: int) -> None:
+    order = (
+        Order.objects.select_related("user")
+        .prefetch_related(
+            "tickets__flight__route__source",
+            "tickets__flight__route__destination",
+        )
+        .filter(pk=order_id)
+        .first()
+    )
+    if order is None:
+        return
+
+    lines = [
+        f"{ticket.flight.route}, "
+        f"{ticket.flight.departure_time:%Y-%m-%d %H:%M} UTC, "
+        f"row {ticket.row}, seat {ticket.seat}"
+        for ticket in order.tickets.all()
+    ]
+    send_mail(
+        f"Order #{order.id} confirmed",
+        "Your tickets:\n" + "\n".join(lines),
+        None,
+        [order.user.email],
+    )
+
+
+@handler("explain_slow_query")
+def explain_slow_query(
+    slow_query_id: int, database: str, sql: str, params: list
+) -> None:
+    plan = explain(database, sql, params)
+    SlowQuery.objects.filter(pk=slow_query_id).update(plan=plan)
@@ -0,0 +1,89 @@
+import datetime
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport.models import Flight
+from airport.scheduling import (
+    airplane_import_conflicts,
+    airplane_schedule_conflicts,
+)
+
+
+class Command(BaseCommand):
+    help_ = (
+        "Lists airplanes booked for overlapping flights, in the stored "
+        "schedule or in a JSON file of flights to import"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--import_file",
+            help=(
+                "JSON list of flights with airplane, departure_time and "
+                "arrival_time, checked against each other and the schedule"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["import_file"]:
+            messages = self._check_import(options["import_file"])
+        else:
+            messages = [
+                f"Airplane {airplane_id}: flight {flight_id} overlaps "
+                f"flight {other_flight_id}"
+                for airplane_id, flight_id, other_flight_id
+                in airplane_schedule_conflicts(Flight.objects.all())
+            ]
+
+        for message in messages:
+            self.stdout.write(message)
+        if messages:
+            raise CommandError(f"Found {len(messages)} airplane conflict(s)")
+        self.stdout.write(self.style.SUCCESS("No airplane conflicts"))
+
+    @staticmethod
+    def _field(row: dict, index: int, name: str) -> object:
+        try:
+            return row[name]
+        except (KeyError, TypeError):
+            raise CommandError(f"Entry {index} has no {name}")
+
+    @classmethod
+    def _time(cls, row: dict, index: int, name: str) -> datetime.datetime:
+        """``name`` of an import entry, naive times taken as local time"""
+        value = cls._field(row, index, name)
+        try:
+            parsed = parse_datetime(value)
+        except (TypeError, ValueError):
+            parsed = None
+        if parsed is None:
+            raise CommandError(f"Entry {index} has an invalid {name}: {value}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    @classmethod
+    def _check_import(cls, path: str) -> list:
+        with open(path) as import_file:
+            rows = json.load(import_file)
+        flights = [
+            Flight(
+                airplane_id=cls._field(row, index, "airplane"),
+                departure_time=cls._time(row, index, "departure_time"),
+                arrival_time=cls._time(row, index, "arrival_time"),
+            )
+            for index, row in enumerate(rows)
+        ]
+        messages = []
+        for airplane_id, index, other in airplane_import_conflicts(flights):
+            other = (
+                f"flight {other[1]}" if isinstance(other, tuple)
+                else f"entry {other}"
+            )
+            messages.append(
+                f"Airplane {airplane_id}: entry {index} overlaps {other}"
+            )
+        return messages
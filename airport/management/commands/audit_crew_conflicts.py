@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.models import Flight
+from airport.scheduling import schedule_conflicts
+
+
+class Command(BaseCommand):
+    help_ = "Lists crew members assigned to overlapping flights"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date_from",
+            help="Only audit flights departing on or after this date",
+        )
+        parser.add_argument(
+            "--date_to",
+            help="Only audit flights departing before this date",
+        )
+
+    def handle(self, *args, **options):
+        flights = Flight.objects.all()
+        if options["date_from"]:
+            flights = flights.filter(departure_time__gte=options["date_from"])
+        if options["date_to"]:
+            flights = flights.filter(departure_time__lt=options["date_to"])
+
+        conflicts = 0
+        for crew_id, flight_id, other_flight_id in schedule_conflicts(flights):
+            conflicts += 1
+            self.stdout.write(
+                f"Crew {crew_id}: flight {flight_id} overlaps "
+                f"flight {other_flight_id}"
+            )
+
+        if conflicts:
+            raise CommandError(f"Found {conflicts} crew conflict(s)")
+        self.stdout.write(self.style.SUCCESS("No crew conflicts"))
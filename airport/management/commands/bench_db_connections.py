@@ -0,0 +1,76 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from airport.models import AirplaneType
+
+
+class Command(BaseCommand):
+    help_ = (
+        "Measures the per-request cost of opening a database connection "
+        "compared to reusing a persistent or pooled one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        original_max_age = connection.settings_dict["CONN_MAX_AGE"]
+        self.stdout.write(f"Engine: {connection.settings_dict['ENGINE']}")
+
+        means = {}
+        try:
+            for label, max_age in (
+                ("CONN_MAX_AGE=0", 0),
+                ("CONN_MAX_AGE=600", 600),
+            ):
+                connection.close()
+                connection.settings_dict["CONN_MAX_AGE"] = max_age
+                timings = self._simulate_requests(options["requests"])
+                means[label] = statistics.mean(timings)
+                self.stdout.write(
+                    f"{label}: mean {means[label]:.3f} ms, "
+                    f"p50 {statistics.median(timings):.3f} ms, "
+                    f"p95 {self._percentile(timings, 95):.3f} ms"
+                )
+        finally:
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = original_max_age
+
+        saving = means["CONN_MAX_AGE=0"] - means["CONN_MAX_AGE=600"]
+        self.stdout.write(
+            self.style.SUCCESS(f"Saving per request: {saving:.3f} ms")
+        )
+
+        if hasattr(connection, "_get_pool"):
+            from Aiport_API_Service.db_backends.postgresql_pool.base import (
+                pool_stats,
+            )
+
+            for key, stats in pool_stats().items():
+                self.stdout.write(f"Pool {key}: {stats}")
+
+    def _simulate_requests(self, count: int) -> list:
+        """
+        Run a trivial query wrapped in the request signals, which is where
+        Django closes connections that outlived CONN_MAX_AGE.
+        """
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            AirplaneType.objects.exists()
+            request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    @staticmethod
+    def _percentile(values: list, percent: int) -> float:
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, round(percent / 100 * len(ordered)))
+        return ordered[index]
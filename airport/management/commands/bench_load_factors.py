@@ -0,0 +1,56 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from airport.analytics import load_factor_rows
+from airport.models import Flight, RouteLoadFactor
+
+
+class Command(BaseCommand):
+    help_ = (
+        "Compares reading daily route load factors from the summary table "
+        "to aggregating flights and tickets on every request"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+
+    def handle(self, *args, **options):
+        def naive():
+            return list(load_factor_rows(Flight.objects.all()))
+
+        def summary():
+            return list(
+                RouteLoadFactor.objects.order_by("day", "route")
+                .values("day", "route")
+                .annotate(
+                    flights=Sum("flights"),
+                    seats=Sum("seats"),
+                    tickets_sold=Sum("tickets_sold"),
+                )
+            )
+
+        means = {}
+        for label, query in (("naive aggregate", naive), ("summary", summary)):
+            timings = []
+            for _ in range(options["requests"]):
+                started = time.perf_counter()
+                rows = query()
+                timings.append((time.perf_counter() - started) * 1000)
+            means[label] = statistics.mean(timings)
+            self.stdout.write(
+                f"{label}: {len(rows)} row(s), "
+                f"mean {means[label]:.3f} ms, "
+                f"p50 {statistics.median(timings):.3f} ms, "
+                f"max {max(timings):.3f} ms"
+            )
+
+        if means["summary"]:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Speedup: "
+                    f"{means['naive aggregate'] / means['summary']:.1f}x"
+                )
+            )
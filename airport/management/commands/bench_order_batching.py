@@ -0,0 +1,142 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test import override_settings
+from django.utils import timezone
+
+from airport.group_commit import save_order
+from airport.models import (
+    Airplane,
+    Airport,
+    Flight,
+    Order,
+    OutboxJob,
+    Route,
+)
+from airport.serializers import OrderSerializer
+
+SEATS_IN_ROW = 6
+
+
+class Command(BaseCommand):
+    help_ = (
+        "Measures orders per second placed by concurrent clients when every "
+        "order commits its own transaction and with group commit"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=1000)
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=16,
+            help="Number of threads placing orders at the same time",
+        )
+
+    def handle(self, *args, **options):
+        orders = max(options["orders"], 1)
+        clients = max(options["clients"], 1)
+        user = get_user_model().objects.create_user(
+            f"bench-{time.time_ns()}@example.com", None
+        )
+        source = Airport.objects.create(name="Bench source")
+        destination = Airport.objects.create(name="Bench destination")
+        route = Route.objects.create(
+            source=source, destination=destination, distance=100
+        )
+        airplane = Airplane.objects.create(
+            name="Bench airplane",
+            rows=orders // SEATS_IN_ROW + 1,
+            seats_in_row=SEATS_IN_ROW,
+        )
+        departure = timezone.now() + datetime.timedelta(days=1)
+        rates = {}
+        try:
+            for label, group_commit in (
+                ("transaction per order", False),
+                ("group commit", True),
+            ):
+                flight = Flight.objects.create(
+                    route=route,
+                    airplane=airplane,
+                    departure_time=departure,
+                    arrival_time=departure + datetime.timedelta(hours=1),
+                )
+                with override_settings(ORDER_GROUP_COMMIT=group_commit):
+                    elapsed, failed = self._place_orders(
+                        user, flight, orders, clients
+                    )
+                rates[label] = (orders - failed) / elapsed
+                self.stdout.write(
+                    f"{label}: {rates[label]:.0f} orders/s "
+                    f"({orders} orders, {clients} clients, "
+                    f"{failed} failed)"
+                )
+        finally:
+            order_ids = list(
+                Order.objects.filter(user=user).values_list("id", flat=True)
+            )
+            OutboxJob.objects.filter(
+                kind="order_confirmation", payload__order_id__in=order_ids
+            ).delete()
+            user.delete()
+            Flight.objects.filter(route=route).delete()
+            route.delete()
+            airplane.delete()
+            source.delete()
+            destination.delete()
+
+        if rates["transaction per order"]:
+            gain = rates["group commit"] / rates["transaction per order"]
+            self.stdout.write(self.style.SUCCESS(f"Gain: {gain:.1f}x"))
+
+    @staticmethod
+    def _place_orders(user, flight, orders, clients):
+        failed = []
+        lock = threading.Lock()
+
+        def place(number):
+            row, seat = divmod(number, SEATS_IN_ROW)
+            serializer = OrderSerializer(
+                data={
+                    "tickets": [
+                        {
+                            "row": row + 1,
+                            "seat": seat + 1,
+                            "flight": flight.id,
+                        }
+                    ]
+                }
+            )
+            try:
+                serializer.is_valid(raise_exception=True)
+                save_order(serializer, user=user)
+            except Exception:
+                with lock:
+                    failed.append(number)
+
+        def client(numbers):
+            close_old_connections()
+            try:
+                for number in numbers:
+                    place(number)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(
+                pool.map(
+                    client,
+                    [
+                        range(start, orders, clients)
+                        for start in range(clients)
+                    ],
+                )
+            )
+        return time.perf_counter() - started, len(failed)
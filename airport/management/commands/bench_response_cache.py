@@ -0,0 +1,79 @@
+import gzip
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from airport.views import FlightViewSet, OrderViewSet
+
+
+class Command(BaseCommand):
+    help_ = (
+        "Measures the CPU time per flight and order list request when the "
+        "response is compressed every time and when it is served from the "
+        "precompressed response cache"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--email", help="User whose orders are listed (default: first)"
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.all()
+        if options["email"]:
+            users = users.filter(email=options["email"])
+        user = users.order_by("id").first()
+        if user is None:
+            self.stderr.write("No user to list orders for.")
+            return
+
+        factory = APIRequestFactory()
+        views = {
+            "flight list": FlightViewSet.as_view({"get": "list"}),
+            "order list": OrderViewSet.as_view({"get": "list"}),
+        }
+
+        def per_request(view, compress):
+            request = factory.get(
+                "/", HTTP_HOST="localhost", HTTP_ACCEPT_ENCODING="gzip, br"
+            )
+            force_authenticate(request, user=user)
+            response = view(request)
+            if hasattr(response, "render"):
+                response.render()
+            if compress:
+                # What a compressing middleware or proxy would do.
+                gzip.compress(response.content)
+
+        modes = (("compressed per request", 0), ("cached", 60))
+        for label, view in views.items():
+            means = {}
+            for mode, seconds in modes:
+                cache.clear()
+                with override_settings(RESPONSE_CACHE_SECONDS=seconds):
+                    per_request(view, not seconds)
+                    timings = []
+                    for _ in range(options["requests"]):
+                        started = time.process_time()
+                        per_request(view, not seconds)
+                        timings.append(
+                            (time.process_time() - started) * 1000
+                        )
+                means[mode] = statistics.mean(timings)
+                self.stdout.write(
+                    f"{label}, {mode}: CPU mean {means[mode]:.3f} ms, "
+                    f"p50 {statistics.median(timings):.3f} ms, "
+                    f"max {max(timings):.3f} ms"
+                )
+            if means["cached"]:
+                saving = means["compressed per request"] / means["cached"]
+                self.stdout.write(
+                    self.style.SUCCESS(f"{label} CPU saving: {saving:.1f}x")
+                )
+        cache.clear()
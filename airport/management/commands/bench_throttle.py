@@ -0,0 +1,48 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import AnonRateThrottle
+
+from airport.throttling import SharedAnonRateThrottle, store
+
+
+class Command(BaseCommand):
+    help_ = (
+        "Measures the per-request overhead of the shared throttle store "
+        "compared to DRF's per-process cache throttle"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--clients", type=int, default=100)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        requests = [
+            factory.get("/", REMOTE_ADDR=f"10.0.{i // 256}.{i % 256}")
+            for i in range(options["clients"])
+        ]
+        for request in requests:
+            request.user = AnonymousUser()
+
+        for label, throttle_class in (
+            ("cache (per process)", AnonRateThrottle),
+            ("shared store", SharedAnonRateThrottle),
+        ):
+            throttle_class.rate = "1000000/day"
+            timings = []
+            for i in range(options["requests"]):
+                request = requests[i % len(requests)]
+                started = time.perf_counter()
+                throttle_class().allow_request(request, None)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"{label}: mean {statistics.mean(timings):.3f} ms, "
+                f"p50 {statistics.median(timings):.3f} ms, "
+                f"max {max(timings):.3f} ms"
+            )
+
+        store.prune(0)
@@ -0,0 +1,130 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from airport.geo import chunks, route_distances
+from airport.models import Route
+from airport.response_cache import invalidate_on_commit
+
+CHUNK_SIZE = 100_000
+COLUMNS = (
+    "id",
+    "source__latitude",
+    "source__longitude",
+    "destination__latitude",
+    "destination__longitude",
+)
+
+
+def write_distances(ids: np.ndarray, distances: np.ndarray) -> None:
+    # Neither statement sets updated_at, the change feed needs it.
+    now = timezone.now()
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE "{Route._meta.db_table}" AS route '
+                f"SET distance = new.distance, updated_at = %s "
+                f"FROM unnest(%s::bigint[], %s::integer[]) "
+                f"AS new (id, distance) WHERE route.id = new.id",
+                [now, ids.tolist(), distances.tolist()],
+            )
+    else:
+        Route.objects.bulk_update(
+            [
+                Route(id=route_id, distance=distance, updated_at=now)
+                for route_id, distance in zip(
+                    ids.tolist(), distances.tolist()
+                )
+            ],
+            ["distance", "updated_at"],
+            batch_size=1000,
+        )
+    invalidate_on_commit()
+
+
+class Command(BaseCommand):
+    help_ = (
+        "Computes the great-circle distance of routes from the coordinates "
+        "of their airports, filling missing distances or checking them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--overwrite",
+            action="store_true",
+            help="Recompute routes that already have a distance",
+        )
+        parser.add_argument(
+            "--validate",
+            action="store_true",
+            help="Only report stored distances off by more than --tolerance",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=5.0,
+            help="Allowed difference in percent for --validate",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        routes = Route.objects.exclude(
+            Q(source__latitude=None)
+            | Q(source__longitude=None)
+            | Q(destination__latitude=None)
+            | Q(destination__longitude=None)
+        )
+        if options["validate"]:
+            routes = routes.exclude(distance=None)
+            self._validate(routes, options["tolerance"])
+        else:
+            if not options["overwrite"]:
+                routes = routes.filter(distance=None)
+            self._fill(routes)
+        self.stdout.write(f"Took {time.perf_counter() - started:.2f} s")
+
+    def _fill(self, routes):
+        updated = 0
+        rows = routes.order_by("id").values_list(*COLUMNS).iterator(
+            chunk_size=CHUNK_SIZE
+        )
+        for chunk in chunks(rows, CHUNK_SIZE):
+            ids, distances = route_distances(chunk)
+            with transaction.atomic():
+                write_distances(ids, distances)
+            updated += len(ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Distance of {updated} route(s) set")
+        )
+
+    def _validate(self, routes, tolerance):
+        checked = 0
+        mismatches = 0
+        rows = routes.order_by("id").values_list(
+            *COLUMNS, "distance"
+        ).iterator(chunk_size=CHUNK_SIZE)
+        for chunk in chunks(rows, CHUNK_SIZE):
+            stored = np.array([row[-1] for row in chunk], dtype=np.int64)
+            ids, distances = route_distances([row[:-1] for row in chunk])
+            allowed = np.maximum(distances * tolerance / 100, 1)
+            wrong = np.abs(stored - distances) > allowed
+            for route_id, got, expected in zip(
+                ids[wrong].tolist(),
+                stored[wrong].tolist(),
+                distances[wrong].tolist(),
+            ):
+                self.stdout.write(
+                    f"Route {route_id}: distance {got} km, "
+                    f"computed {expected} km"
+                )
+            checked += len(ids)
+            mismatches += int(wrong.sum())
+
+        style = self.style.WARNING if mismatches else self.style.SUCCESS
+        self.stdout.write(
+            style(f"{mismatches} of {checked} route distance(s) differ")
+        )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from airport.partitioning import (
+    PARTITIONED_TABLES,
+    create_partition,
+    is_partitioned,
+    month_start,
+    months_between,
+    next_month,
+)
+
+
+class Command(BaseCommand):
+    help_ = "Creates the monthly flight and ticket partitions ahead of time"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months_ahead",
+            type=int,
+            default=12,
+            help="Number of months after the current one to cover",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write("Partitioning is only used on PostgreSQL")
+            return
+
+        first = month_start(timezone.now())
+        last = first
+        for _ in range(options["months_ahead"]):
+            last = next_month(last)
+
+        created = 0
+        with connection.cursor() as cursor:
+            for table, column in PARTITIONED_TABLES.items():
+                if not is_partitioned(cursor, table):
+                    self.stdout.write(
+                        self.style.WARNING(f"{table} is not partitioned")
+                    )
+                    continue
+                for month in months_between(first, last):
+                    with transaction.atomic():
+                        created += create_partition(
+                            cursor, table, column, month
+                        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created} partition(s)")
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from airport.models import ScheduleTemplate
+from airport.scheduling import expand_template
+
+
+class Command(BaseCommand):
+    help_ = "Creates the missing flights of all current schedule templates"
+
+    def handle(self, *args, **options):
+        created = 0
+        templates = ScheduleTemplate.objects.filter(
+            valid_until__gte=timezone.now().date()
+        )
+        for template in templates:
+            try:
+                created += len(expand_template(template))
+            except ValidationError as error:
+                self.stderr.write(
+                    f"Schedule template {template.id}: {error.detail}"
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} flight(s)"))
@@ -0,0 +1,52 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from airport.models import Airplane
+from airport.storage import airplane_image_storage
+
+AIRPLANE_IMAGE_DIRECTORY = "upload/airplane"
+
+
+class Command(BaseCommand):
+    help_ = "Deletes stored airplane images no airplane references anymore"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace_seconds",
+            type=float,
+            default=settings.AIRPLANE_IMAGE_GRACE_SECONDS,
+            help="Keep files younger than this to spare in-flight uploads",
+        )
+        parser.add_argument("--dry_run", action="store_true")
+
+    def handle(self, *args, **options):
+        root = airplane_image_storage.path(AIRPLANE_IMAGE_DIRECTORY)
+        referenced = set(
+            Airplane.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .values_list("image", flat=True)
+        )
+        cutoff = time.time() - options["grace_seconds"]
+
+        deleted = 0
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(directory, filename)
+                name = os.path.relpath(
+                    full_path, airplane_image_storage.location
+                ).replace("\\", "/")
+                if name in referenced or os.path.getmtime(full_path) > cutoff:
+                    continue
+                if not options["dry_run"]:
+                    airplane_image_storage.delete(name)
+                deleted += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would delete' if options['dry_run'] else 'Deleted'} "
+                f"{deleted} unreferenced airplane image(s)"
+            )
+        )
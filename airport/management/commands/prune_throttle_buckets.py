@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from airport.throttling import store
+
+
+class Command(BaseCommand):
+    help_ = "Deletes throttle buckets of clients that have been idle"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--idle_seconds",
+            type=float,
+            default=86400,
+            help="Longest throttle period, idle buckets are full again",
+        )
+
+    def handle(self, *args, **options):
+        deleted = store.prune(options["idle_seconds"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} idle throttle bucket(s)")
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from airport.analytics import refresh_load_factors
+
+
+class Command(BaseCommand):
+    help_ = "Recomputes the route load factors of days with changed tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild the load factors of every day",
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_load_factors(full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {written} load factor row(s)")
+        )
@@ -0,0 +1,109 @@
+import json
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from airport.outbox import claim, queue_stats, run_job
+
+
+class Command(BaseCommand):
+    help_ = (
+        "Runs the jobs of the outbox on a thread pool until stopped, "
+        "retrying failed jobs with backoff"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument(
+            "--poll_seconds",
+            type=float,
+            default=1,
+            help="Wait between looks at an empty queue",
+        )
+        parser.add_argument(
+            "--stats_seconds",
+            type=float,
+            default=60,
+            help="Interval of the queue depth and lag log line",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the due jobs in this thread and exit",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print queue depth and lag as JSON and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(queue_stats()))
+            return
+        if options["once"]:
+            self._run_once(max(options["threads"], 1))
+            return
+        self._run_forever(
+            max(options["threads"], 1),
+            options["poll_seconds"],
+            options["stats_seconds"],
+        )
+
+    def _run_once(self, batch_size):
+        succeeded = failed = 0
+        while True:
+            jobs = claim(batch_size)
+            if not jobs:
+                break
+            for job in jobs:
+                if run_job(job):
+                    succeeded += 1
+                else:
+                    failed += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"{succeeded} job(s) done, {failed} failed")
+        )
+
+    @staticmethod
+    def _run_in_thread(job):
+        close_old_connections()
+        try:
+            return run_job(job)
+        finally:
+            close_old_connections()
+
+    def _run_forever(self, threads, poll_seconds, stats_seconds):
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write("Stopping after the running jobs...")
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        self.stdout.write(f"Worker started with {threads} thread(s)")
+        running = set()
+        stats_at = 0.0
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            while not stop.is_set():
+                if time.monotonic() >= stats_at:
+                    self.stdout.write(json.dumps(queue_stats()))
+                    stats_at = time.monotonic() + stats_seconds
+
+                running = {future for future in running if not future.done()}
+                jobs = claim(threads - len(running))
+                running.update(
+                    pool.submit(self._run_in_thread, job) for job in jobs
+                )
+                if len(running) == threads:
+                    wait(running, poll_seconds, FIRST_COMPLETED)
+                elif not jobs:
+                    stop.wait(poll_seconds)
+            wait(running)
+        close_old_connections()
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:24
+
+import airport.models
+import airport.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="airplane",
+            name="image",
+            field=models.ImageField(
+                db_index=True,
+                null=True,
+                storage=airport.storage.ContentAddressedStorage(),
+                upload_to=airport.models.airplane_image_file_path,
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0002_airplane_image_content_addressed"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThrottleBucket",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("tokens", models.FloatField()),
+                ("allowed", models.BooleanField(default=True)),
+                ("updated_at", models.FloatField(db_index=True)),
+            ],
+        ),
+    ]
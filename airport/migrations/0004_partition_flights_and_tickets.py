@@ -0,0 +1,76 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+from airport.partitioning import PARTITIONED_TABLES, rebuild_table
+
+
+def copy_departure_times(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    Ticket.objects.using(schema_editor.connection.alias).update(
+        departure_time=Subquery(
+            Flight.objects.filter(pk=OuterRef("flight_id")).values(
+                "departure_time"
+            )[:1]
+        )
+    )
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES.items():
+            rebuild_table(cursor, table, column, partitioned=True)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES.items():
+            rebuild_table(cursor, table, column, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0003_throttlebucket"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="departure_time",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(copy_departure_times, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="ticket",
+            name="departure_time",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name="ticket",
+            name="flight",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tickets",
+                to="airport.flight",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="flight",
+            name="crew",
+            field=models.ManyToManyField(
+                blank=True, db_constraint=False, to="airport.crew"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="ticket",
+            unique_together={("flight", "row", "seat", "departure_time")},
+        ),
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0004_partition_flights_and_tickets"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoadFactorChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RouteLoadFactor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(db_index=True)),
+                ("flights", models.IntegerField()),
+                ("seats", models.IntegerField()),
+                ("tickets_sold", models.IntegerField()),
+                (
+                    "airplane_type",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="load_factors",
+                        to="airport.airplanetype",
+                    ),
+                ),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="load_factors",
+                        to="airport.route",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["day", "route"],
+            },
+        ),
+    ]
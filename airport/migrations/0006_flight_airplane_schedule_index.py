@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0005_route_load_factors"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["airplane", "departure_time", "arrival_time"],
+                name="flight_airplane_schedule_idx",
+            ),
+        ),
+    ]
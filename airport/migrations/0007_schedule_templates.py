@@ -0,0 +1,87 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:46
+
+import airport.models
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0006_flight_airplane_schedule_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleTemplate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "weekdays",
+                    models.CharField(
+                        max_length=7,
+                        validators=[
+                            django.core.validators.RegexValidator(
+                                "^[1-7]{1,7}$",
+                                "ISO weekday numbers, e.g. 135 for Mon, Wed and Fri",
+                            )
+                        ],
+                    ),
+                ),
+                ("departure_time", models.TimeField()),
+                ("arrival_time", models.TimeField()),
+                ("arrival_day_offset", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "time_zone",
+                    models.CharField(
+                        default="UTC",
+                        max_length=64,
+                        validators=[airport.models.validate_time_zone],
+                    ),
+                ),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField()),
+                (
+                    "airplane",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedule_templates",
+                        to="airport.airplane",
+                    ),
+                ),
+                ("crew", models.ManyToManyField(blank=True, to="airport.crew")),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedule_templates",
+                        to="airport.route",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="schedule_template",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="flights",
+                to="airport.scheduletemplate",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="flight",
+            unique_together={("schedule_template", "departure_time")},
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0008_change_feed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="airplanetype",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="crew",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="airplanetype",
+            index=models.Index(
+                fields=["updated_at"], name="airport_air_updated_7abe0e_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="crew",
+            index=models.Index(
+                fields=["updated_at"], name="airport_cre_updated_96d357_idx"
+            ),
+        ),
+    ]
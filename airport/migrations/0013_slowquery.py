@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0012_requestprofile"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("fingerprint", models.CharField(max_length=40)),
+                ("sql", models.TextField()),
+                ("params", models.TextField(blank=True)),
+                ("duration_ms", models.FloatField()),
+                ("database", models.CharField(max_length=64)),
+                ("view", models.CharField(max_length=255)),
+                ("caller", models.CharField(blank=True, max_length=255)),
+                ("plan", models.TextField(blank=True)),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["fingerprint", "created_at"],
+                        name="airport_slo_fingerp_9ee263_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0013_slowquery"),
+    ]
+
+    operations = [
+        # The through model takes over the table of the automatic one.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="FlightCrew",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "crew",
+                            models.ForeignKey(
+                                db_constraint=False,
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="airport.crew",
+                            ),
+                        ),
+                        (
+                            "flight",
+                            models.ForeignKey(
+                                db_constraint=False,
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="airport.flight",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "airport_flight_crew",
+                        "unique_together": {("flight", "crew")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="flight",
+                    name="crew",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        through="airport.FlightCrew",
+                        to="airport.crew",
+                    ),
+                ),
+            ],
+        ),
+        # The crew table is not partitioned and gets its constraint back.
+        migrations.AlterField(
+            model_name="flightcrew",
+            name="crew",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                to="airport.crew",
+            ),
+        ),
+    ]
@@ -1,24 +1,40 @@
 import uuid
+import zoneinfo
 from typing import Any
 
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import (
+    MaxValueValidator,
+    MinValueValidator,
+    RegexValidator,
+)
+from django.db import models, transaction
 from rest_framework.exceptions import ValidationError
 import os
-from Aiport_API_Service import settings
+from django.utils import timezone
 from django.utils.text import slugify
 
+from airport.storage import airplane_image_storage
+
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return self.name
 
+    class Meta:
+        indexes = [models.Index(fields=["updated_at"])]
+
 
 def airplane_image_file_path(instance: Any, filename: str) -> str:
     _, ext = os.path.splitext(filename)
 
-    filename = f"{slugify(instance.name)}-{uuid.uuid4()}.{ext}"
+    # airplane_image_storage renames the file after its content hash, only
+    # the directory and the extension of this name are kept.
+    filename = f"{slugify(instance.name)}-{uuid.uuid4()}{ext}"
     return os.path.join("upload/airplane", filename)
 
 
@@ -33,7 +49,15 @@ class Airplane(models.Model):
         blank=True,
         null=True
     )
-    image = models.ImageField(null=True, upload_to=airplane_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=airplane_image_file_path,
+        storage=airplane_image_storage,
+        db_index=True,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    _loaded_image = None
 
     @property
     def capacity(self) -> int:
@@ -42,23 +66,92 @@ class Airplane(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values) -> "Airplane":
+        instance = super().from_db(db, field_names, values)
+        if "image" in field_names:
+            instance._loaded_image = instance.image.name
+        return instance
+
+    @staticmethod
+    def image_reference_count(name: str) -> int:
+        return Airplane.objects.filter(image=name).count()
+
+    @staticmethod
+    def release_image(name: str) -> None:
+        """
+        Delete a stored image once no airplane references it anymore. The
+        count runs after the commit, and files stored or reused within
+        AIRPLANE_IMAGE_GRACE_SECONDS are left to gc_airplane_images, so a
+        concurrent upload of the same content keeps its file.
+        """
+        if name:
+            transaction.on_commit(
+                lambda: Airplane._delete_unreferenced_image(name)
+            )
+
+    @staticmethod
+    def _delete_unreferenced_image(name: str) -> None:
+        if Airplane.image_reference_count(name):
+            return
+        try:
+            modified = airplane_image_storage.get_modified_time(name)
+        except FileNotFoundError:
+            return
+        age = timezone.now() - modified
+        if age.total_seconds() >= settings.AIRPLANE_IMAGE_GRACE_SECONDS:
+            airplane_image_storage.delete(name)
+
+    def save(self, *args, **kwargs) -> None:
+        super().save(*args, **kwargs)
+        previous_image = self._loaded_image
+        self._loaded_image = self.image.name
+        if previous_image and previous_image != self.image.name:
+            Airplane.release_image(previous_image)
+
+    def delete(self, *args, **kwargs) -> Any:
+        result = super().delete(*args, **kwargs)
+        Airplane.release_image(self.image.name)
+        return result
+
+    class Meta:
+        indexes = [models.Index(fields=["updated_at", "id"])]
+
 
 class Crew(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.first_name} {self.last_name}"
 
+    class Meta:
+        indexes = [models.Index(fields=["updated_at"])]
+
 
 class Airport(models.Model):
     name = models.CharField(max_length=255)
     closest_big_cite = models.CharField(max_length=255, blank=True)
     country = models.CharField(max_length=255, blank=True)
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return self.name
 
+    class Meta:
+        indexes = [models.Index(fields=["updated_at", "id"])]
+
 
 class Route(models.Model):
     source = models.ForeignKey(
@@ -68,12 +161,68 @@ class Route(models.Model):
         "Airport", on_delete=models.CASCADE, related_name="destination_routes"
     )
     distance = models.IntegerField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.source.name} - {self.destination.name}"
 
+    class Meta:
+        indexes = [models.Index(fields=["updated_at", "id"])]
+
+
+def validate_time_zone(value: str) -> None:
+    if value not in zoneinfo.available_timezones():
+        raise DjangoValidationError(f"Unknown time zone: {value}")
+
+
+class ScheduleTemplate(models.Model):
+    """
+    Flight repeated on some weekdays at the same local time, expanded into
+    Flight rows by airport/scheduling.py.
+    """
+
+    route = models.ForeignKey(
+        "Route", on_delete=models.CASCADE, related_name="schedule_templates"
+    )
+    airplane = models.ForeignKey(
+        "Airplane",
+        on_delete=models.CASCADE,
+        related_name="schedule_templates",
+    )
+    weekdays = models.CharField(
+        max_length=7,
+        validators=[
+            RegexValidator(
+                r"^[1-7]{1,7}$",
+                "ISO weekday numbers, e.g. 135 for Mon, Wed and Fri",
+            )
+        ],
+    )
+    departure_time = models.TimeField()
+    arrival_time = models.TimeField()
+    arrival_day_offset = models.PositiveSmallIntegerField(default=0)
+    time_zone = models.CharField(
+        max_length=64,
+        default="UTC",
+        validators=[validate_time_zone],
+    )
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    crew = models.ManyToManyField(Crew, blank=True)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.route} on {self.weekdays} at {self.departure_time} "
+            f"({self.valid_from} - {self.valid_until})"
+        )
+
 
 class Flight(models.Model):
+    """
+    On PostgreSQL the table is partitioned by departure month (see
+    airport/partitioning.py), relations to it need db_constraint=False.
+    """
+
     route = models.ForeignKey(
         "Route",
         on_delete=models.CASCADE,
@@ -84,18 +233,76 @@ class Flight(models.Model):
     )
     departure_time = models.DateTimeField(auto_now_add=False)
     arrival_time = models.DateTimeField(auto_now_add=False)
-    crew = models.ManyToManyField(Crew, blank=True)
+    crew = models.ManyToManyField(Crew, blank=True, through="FlightCrew")
+    schedule_template = models.ForeignKey(
+        "ScheduleTemplate",
+        on_delete=models.SET_NULL,
+        related_name="flights",
+        null=True,
+        blank=True,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    _loaded_departure_time = None
 
     def __str__(self) -> str:
         return (f"{self.route.source} - {self.route.destination},"
                 f" Airplane: {self.airplane.name}")
 
+    @classmethod
+    def from_db(cls, db, field_names, values) -> "Flight":
+        instance = super().from_db(db, field_names, values)
+        if "departure_time" in field_names:
+            instance._loaded_departure_time = instance.departure_time
+        return instance
+
+    def save(self, *args, **kwargs) -> None:
+        super().save(*args, **kwargs)
+        if (
+            self._loaded_departure_time is not None
+            and self._loaded_departure_time != self.departure_time
+        ):
+            # Tickets are partitioned by the departure of their flight.
+            self.tickets.update(departure_time=self.departure_time)
+        self._loaded_departure_time = self.departure_time
+
+    class Meta:
+        # Keeps expanding a schedule template idempotent.
+        unique_together = ("schedule_template", "departure_time")
+        indexes = [
+            # Overlap checks of airplane bookings (airport/scheduling.py).
+            models.Index(
+                fields=["airplane", "departure_time", "arrival_time"],
+                name="flight_airplane_schedule_idx",
+            ),
+            models.Index(fields=["updated_at", "id"]),
+        ]
+
+
+class FlightCrew(models.Model):
+    """
+    Crew member assigned to a flight. Only the relation to the partitioned
+    flight table goes without a foreign key constraint.
+    """
+
+    flight = models.ForeignKey(
+        "Flight", on_delete=models.CASCADE, db_constraint=False
+    )
+    crew = models.ForeignKey("Crew", on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "airport_flight_crew"
+        unique_together = ("flight", "crew")
+
 
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
     flight = models.ForeignKey(
-        "Flight", on_delete=models.CASCADE, related_name="tickets"
+        "Flight",
+        on_delete=models.CASCADE,
+        related_name="tickets",
+        db_constraint=False,
     )
     order = models.ForeignKey(
         "Order",
@@ -103,6 +310,8 @@ class Ticket(models.Model):
         related_name="tickets",
         default=None
     )
+    # Copy of flight.departure_time, the partition key of the table.
+    departure_time = models.DateTimeField(editable=False)
 
     def __str__(self) -> str:
         return f"Number: {self.flight}, row: {self.row}, seat: {self.seat}"
@@ -139,13 +348,14 @@ class Ticket(models.Model):
         using=None,
         update_fields=None,
     ) -> None:
+        self.departure_time = self.flight.departure_time
         self.full_clean()
         return super(Ticket, self).save(
             force_insert, force_update, using, update_fields
         )
 
     class Meta:
-        unique_together = ("flight", "row", "seat")
+        unique_together = ("flight", "row", "seat", "departure_time")
         ordering = ["row", "seat"]
 
 
@@ -161,3 +371,127 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+
+
+class ThrottleBucket(models.Model):
+    """Token bucket of one throttling key, shared by all workers"""
+
+    key = models.CharField(max_length=255, primary_key=True)
+    tokens = models.FloatField()
+    allowed = models.BooleanField(default=True)
+    updated_at = models.FloatField(db_index=True)
+
+
+class RouteLoadFactor(models.Model):
+    """
+    Seats offered and tickets sold per departure day (UTC), route and
+    airplane type, maintained by airport/analytics.py.
+    """
+
+    day = models.DateField(db_index=True)
+    route = models.ForeignKey(
+        "Route", on_delete=models.CASCADE, related_name="load_factors"
+    )
+    airplane_type = models.ForeignKey(
+        "AirplaneType",
+        on_delete=models.CASCADE,
+        related_name="load_factors",
+        null=True,
+    )
+    flights = models.IntegerField()
+    seats = models.IntegerField()
+    tickets_sold = models.IntegerField()
+
+    class Meta:
+        ordering = ["day", "route"]
+
+
+class LoadFactorChange(models.Model):
+    """Departure day whose load factors must be recomputed"""
+
+    day = models.DateField()
+
+
+class Tombstone(models.Model):
+    """Deleted object, reported by the change feed (airport/changes.py)"""
+
+    model = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["deleted_at", "id"])]
+
+
+class OutboxJob(models.Model):
+    """
+    Work to run after a transaction commits, written in that transaction
+    and claimed by ``manage.py run_worker`` (airport/outbox.py)
+    """
+
+    PENDING = "pending"
+    FAILED = "failed"
+    STATUS_CHOICES = ((PENDING, "Pending"), (FAILED, "Failed"))
+
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.id}"
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_at"])]
+
+
+class RequestProfile(models.Model):
+    """cProfile statistics of one request (airport/profiling.py)"""
+
+    request_id = models.CharField(max_length=64, unique=True)
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=255)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    sampled = models.BooleanField(default=False)
+    status_code = models.IntegerField()
+    duration_ms = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # The statistics in the format of cProfile's dump_stats.
+    stats = models.BinaryField()
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path} ({self.request_id})"
+
+    class Meta:
+        ordering = ["-created_at"]
+
+
+class SlowQuery(models.Model):
+    """Query of a view slower than SLOW_QUERY_MS (airport/slow_queries.py)"""
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    fingerprint = models.CharField(max_length=40)
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    duration_ms = models.FloatField()
+    database = models.CharField(max_length=64)
+    view = models.CharField(max_length=255)
+    caller = models.CharField(max_length=255, blank=True)
+    plan = models.TextField(blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.duration_ms:.0f} ms in {self.view}"
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["fingerprint", "created_at"])]
@@ -0,0 +1,126 @@
+"""
+Transactional outbox of background jobs.
+
+``enqueue`` writes an ``OutboxJob`` in the caller's transaction, so a job
+exists exactly when the change that asked for it was committed, and the
+request does not wait for the work itself. ``manage.py run_worker``
+claims due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number
+of workers share the queue without handing out a job twice, and runs
+them on a thread pool outside of any transaction.
+
+Claiming a job moves its ``run_at`` past ``OUTBOX_LEASE_SECONDS``: a
+worker that dies mid-job leaves it to be claimed again once the lease
+ran out, so jobs run at least once and handlers must be idempotent. A
+failing job is retried with exponential backoff and kept as failed after
+``OUTBOX_MAX_ATTEMPTS``.
+"""
+import datetime
+import logging
+import random
+import traceback
+from typing import Callable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from airport.models import OutboxJob
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+MAX_BACKOFF_SECONDS = 3600
+
+
+def handler(kind: str) -> Callable:
+    """Register the function running jobs of ``kind``"""
+
+    def register(function: Callable) -> Callable:
+        HANDLERS[kind] = function
+        return function
+
+    return register
+
+
+def enqueue(kind: str, **payload) -> OutboxJob:
+    if kind not in HANDLERS:
+        raise ValueError(f"No handler for {kind} jobs.")
+    return OutboxJob.objects.create(kind=kind, payload=payload)
+
+
+def claim(limit: int) -> list:
+    """Lease up to ``limit`` due jobs, oldest first"""
+    if limit < 1:
+        return []
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            OutboxJob.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxJob.PENDING, run_at__lte=now)
+            .order_by("run_at", "id")[:limit]
+        )
+        if jobs:
+            OutboxJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                run_at=now
+                + datetime.timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+                attempts=F("attempts") + 1,
+            )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def backoff(attempts: int) -> float:
+    delay = min(
+        settings.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1),
+        MAX_BACKOFF_SECONDS,
+    )
+    # Jitter keeps jobs that failed together from retrying together.
+    return delay * random.uniform(1, 1.25)
+
+
+def run_job(job: OutboxJob) -> bool:
+    """Run a claimed job, returns whether it succeeded"""
+    try:
+        HANDLERS[job.kind](**job.payload)
+    except Exception as error:
+        failed = job.attempts >= settings.OUTBOX_MAX_ATTEMPTS
+        logger.warning(
+            "Outbox job %s failed (attempt %s)%s: %s",
+            job,
+            job.attempts,
+            ", giving up" if failed else "",
+            error,
+        )
+        OutboxJob.objects.filter(pk=job.pk).update(
+            status=OutboxJob.FAILED if failed else OutboxJob.PENDING,
+            run_at=timezone.now()
+            + datetime.timedelta(seconds=backoff(job.attempts)),
+            last_error=traceback.format_exc(),
+        )
+        return False
+    else:
+        OutboxJob.objects.filter(pk=job.pk).delete()
+        return True
+
+
+def queue_stats() -> dict:
+    """Queue depth and the age of the oldest job waiting to run"""
+    now = timezone.now()
+    stats = OutboxJob.objects.aggregate(
+        pending=Count("id", filter=Q(status=OutboxJob.PENDING)),
+        due=Count(
+            "id", filter=Q(status=OutboxJob.PENDING, run_at__lte=now)
+        ),
+        failed=Count("id", filter=Q(status=OutboxJob.FAILED)),
+        oldest_due=Min(
+            "created_at",
+            filter=Q(status=OutboxJob.PENDING, run_at__lte=now),
+        ),
+    )
+    oldest_due = stats.pop("oldest_due")
+    stats["lag_seconds"] = (
+        round((now - oldest_due).total_seconds(), 3) if oldest_due else 0
+    )
+    return stats
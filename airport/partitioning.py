@@ -0,0 +1,206 @@
+"""
+Monthly range partitioning of the flight and ticket tables on PostgreSQL.
+
+Both tables are partitioned by departure time (tickets through their
+denormalized ``departure_time``), one partition per calendar month in UTC
+plus a default partition for anything outside the created months. The
+primary keys become ``(id, departure_time)`` because PostgreSQL requires
+the partition key in every unique constraint, and nothing can hold a
+database foreign key to a partitioned table, so relations pointing at
+``Flight`` use ``db_constraint=False``.
+"""
+import datetime
+from typing import Any, Iterator
+
+PARTITIONED_TABLES = {
+    "airport_flight": "departure_time",
+    "airport_ticket": "departure_time",
+}
+
+
+def month_start(moment: datetime.datetime) -> datetime.date:
+    return datetime.date(moment.year, moment.month, 1)
+
+
+def next_month(month: datetime.date) -> datetime.date:
+    if month.month == 12:
+        return datetime.date(month.year + 1, 1, 1)
+    return datetime.date(month.year, month.month + 1, 1)
+
+
+def months_between(
+    first: datetime.date, last: datetime.date
+) -> Iterator[datetime.date]:
+    month = first
+    while month <= last:
+        yield month
+        month = next_month(month)
+
+
+def partition_name(table: str, month: datetime.date) -> str:
+    return f"{table}_p{month.year}_{month.month:02d}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def _bounds(month: datetime.date) -> tuple:
+    return (
+        f"{month.isoformat()} 00:00:00+00",
+        f"{next_month(month).isoformat()} 00:00:00+00",
+    )
+
+
+def _table_exists(cursor: Any, name: str) -> bool:
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def is_partitioned(cursor: Any, table: str) -> bool:
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass(%s))",
+        [table],
+    )
+    return cursor.fetchone()[0]
+
+
+def create_partition(
+    cursor: Any, table: str, column: str, month: datetime.date
+) -> bool:
+    """
+    Attach the partition of ``month`` unless it exists, moving rows of
+    that month out of the default partition first.
+    """
+    name = partition_name(table, month)
+    if _table_exists(cursor, name):
+        return False
+
+    default = default_partition_name(table)
+    lower, upper = _bounds(month)
+    cursor.execute(
+        f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS)'
+    )
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{default}" '
+        f'WHERE "{column}" >= %s AND "{column}" < %s RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [lower, upper],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" '
+        f"FOR VALUES FROM (%s) TO (%s)",
+        [lower, upper],
+    )
+    return True
+
+
+def _constraints(cursor: Any, table: str) -> list:
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) "
+        "FROM pg_constraint WHERE conrelid = to_regclass(%s) "
+        "AND contype IN ('p', 'u', 'f', 'c')",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _indexes(cursor: Any, table: str) -> list:
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes i WHERE tablename = %s "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c "
+        "WHERE c.conname = i.indexname AND c.conrelid = to_regclass(%s))",
+        [table, table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _drop_referencing_foreign_keys(cursor: Any, table: str) -> None:
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE contype = 'f' AND confrelid = to_regclass(%s) "
+        "AND conrelid <> confrelid",
+        [table],
+    )
+    for referencing_table, name in cursor.fetchall():
+        cursor.execute(
+            f'ALTER TABLE {referencing_table} DROP CONSTRAINT "{name}"'
+        )
+
+
+def rebuild_table(
+    cursor: Any,
+    table: str,
+    column: str,
+    partitioned: bool,
+    months_ahead: int = 12,
+) -> None:
+    """
+    Recreate ``table`` with the same columns, data, indexes and
+    constraints, either partitioned by month on ``column`` or as a plain
+    table. The id column keeps its sequence position.
+    """
+    constraints = _constraints(cursor, table)
+    indexes = _indexes(cursor, table)
+    old = f"{table}_old"
+    sequence = f"{table}_id_seq"
+
+    _drop_referencing_foreign_keys(cursor, table)
+    cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id DROP DEFAULT')
+    cursor.execute(
+        f'ALTER TABLE "{table}" ALTER COLUMN id DROP IDENTITY IF EXISTS'
+    )
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+
+    if partitioned:
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE ("{column}")'
+        )
+        cursor.execute(
+            f'CREATE TABLE "{default_partition_name(table)}" '
+            f'PARTITION OF "{table}" DEFAULT'
+        )
+        cursor.execute(f'SELECT min("{column}"), now() FROM "{old}"')
+        first, now = cursor.fetchone()
+        last = month_start(now)
+        for _ in range(months_ahead):
+            last = next_month(last)
+        for month in months_between(month_start(first or now), last):
+            lower, upper = _bounds(month)
+            cursor.execute(
+                f'CREATE TABLE "{partition_name(table, month)}" '
+                f'PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)',
+                [lower, upper],
+            )
+    else:
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS)'
+        )
+
+    cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{old}"')
+    cursor.execute(f'DROP TABLE "{old}" CASCADE')
+
+    for name, kind, definition in constraints:
+        if kind == "p":
+            definition = (
+                f'PRIMARY KEY (id, "{column}")' if partitioned
+                else "PRIMARY KEY (id)"
+            )
+        cursor.execute(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}'
+        )
+    for definition in indexes:
+        cursor.execute(definition)
+
+    cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{table}".id')
+    cursor.execute(
+        f'SELECT setval(%s, COALESCE((SELECT max(id) FROM "{table}"), 0) '
+        f"+ 1, false)",
+        [sequence],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{table}" ALTER COLUMN id '
+        f"SET DEFAULT nextval('\"{sequence}\"')"
+    )
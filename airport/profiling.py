@@ -0,0 +1,120 @@
+"""
+Profiling of production requests.
+
+``ProfilingMiddleware`` runs a request under ``cProfile`` when a staff
+user sends ``X-Profile: 1`` or the request falls in the
+``PROFILE_SAMPLE_RATE`` fraction, and stores the statistics as a
+``RequestProfile`` under a new request id, returned in ``X-Profile-Id``.
+Other requests only pay for a header lookup (and a random number when
+sampling is on). Staff list the profiles in the admin and download them
+for ``python -m pstats`` or snakeviz; only the newest ``PROFILE_KEEP``
+are kept.
+"""
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import random
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.http import HttpRequest, HttpResponse
+
+from airport.models import RequestProfile
+from user.authentication import request_user
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+def _staff_user(request: HttpRequest) -> Optional[Any]:
+    user = request_user(request)
+    if user is not None and user.is_staff:
+        return user
+    return None
+
+
+class _LoadedStats:
+    """Dumped statistics in the form pstats.Stats loads from a profiler"""
+
+    def __init__(self, data: bytes) -> None:
+        self.stats = marshal.loads(data)
+
+    def create_stats(self) -> None:
+        pass
+
+
+def summary(profile: RequestProfile, limit: int = 40) -> str:
+    """The functions with the highest cumulative time"""
+    stream = io.StringIO()
+    stats = pstats.Stats(_LoadedStats(bytes(profile.stats)), stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return stream.getvalue()
+
+
+def _prune() -> None:
+    stale = list(
+        RequestProfile.objects.order_by("-created_at", "-id").values_list(
+            "id", flat=True
+        )[settings.PROFILE_KEEP:]
+    )
+    if stale:
+        RequestProfile.objects.filter(id__in=stale).delete()
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if PROFILE_HEADER in request.META:
+            if _staff_user(request) is not None:
+                return self._profile(request, sampled=False)
+        elif (
+            settings.PROFILE_SAMPLE_RATE
+            and random.random() < settings.PROFILE_SAMPLE_RATE
+        ):
+            return self._profile(request, sampled=True)
+        return self.get_response(request)
+
+    def _profile(self, request: HttpRequest, sampled: bool) -> HttpResponse:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Since Python 3.12 one profiler at a time per process.
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        profiler.create_stats()
+        # The view replaces request.user with the user DRF authenticated.
+        user = getattr(request, "user", None)
+        request_id = uuid.uuid4().hex
+        try:
+            RequestProfile.objects.create(
+                request_id=request_id,
+                method=request.method,
+                path=request.path[:255],
+                user_id=user.pk if user and user.is_authenticated else None,
+                sampled=sampled,
+                status_code=response.status_code,
+                duration_ms=duration_ms,
+                stats=marshal.dumps(profiler.stats),
+            )
+            _prune()
+        except DatabaseError:
+            logger.exception("Could not store the profile of %s", request)
+        else:
+            response[PROFILE_ID_HEADER] = request_id
+        return response
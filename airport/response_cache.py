@@ -0,0 +1,177 @@
+"""
+Rendered list responses kept with their compressed encodings.
+
+``CachedListMixin`` stores the JSON of a list response as a ``Payload``
+in Django's cache, keyed by the absolute URL (and the user for views
+whose results depend on it), so a hit is served without querying,
+serializing or compressing. Keys hold versions that committed changes
+bump, which retires the entries built from the old rows at once:
+
+* one per resource, bumped by changes to the rows its list shows, so a
+  new flight retires the flight and order lists alike;
+* one per user for orders, bumped by that user's orders and tickets, so
+  a booking retires the flight lists and the order list of the booking
+  user only. The availability of flights nested in other users' orders
+  may lag for up to ``RESPONSE_CACHE_SECONDS``.
+
+The cache must be shared between processes (``REDIS_URL``) for the bumps
+to reach every process; entries expire after ``RESPONSE_CACHE_SECONDS``
+in any case.
+"""
+import hashlib
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from airport.compression import Payload
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+VERSION_KEY = "airport:response-cache:version"
+RESOURCES = ("flight", "order")
+# Models shown by every cached list; tickets and orders are handled in
+# model_changed.
+SHARED_MODELS = (
+    AirplaneType,
+    Airplane,
+    Airport,
+    Crew,
+    Flight,
+    Route,
+)
+# Cheaper levels than the bootstrap payload, entries are rebuilt after
+# every booking.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def version_key(resource: str, user_id: Any = None) -> str:
+    """Version of the ``resource`` lists, or of one user's lists"""
+    if user_id is None:
+        return f"{VERSION_KEY}:{resource}"
+    return f"{VERSION_KEY}:{resource}:user:{user_id}"
+
+
+def _version(key: str) -> int:
+    version = cache.get(key)
+    if version is None:
+        # Not 1: an evicted version must not revive older entries.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(*keys: str) -> None:
+    """Bump the versions ``keys``, by default those of every resource"""
+    for key in keys or [version_key(resource) for resource in RESOURCES]:
+        try:
+            cache.incr(key)
+        except ValueError:
+            _version(key)
+
+
+def invalidate_on_commit(*keys: str) -> None:
+    """
+    Retire the entries now and once more after commit, a request may
+    cache the old rows before the change is visible.
+    """
+    invalidate(*keys)
+    transaction.on_commit(lambda: invalidate(*keys))
+
+
+def _order_user_id(ticket: Ticket) -> Any:
+    order = Ticket.order.field.get_cached_value(ticket, None)
+    if order is not None:
+        return order.user_id
+    # None, and so every order list, once the order is gone.
+    return (
+        Order.objects.filter(pk=ticket.order_id)
+        .values_list("user_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def model_changed(sender: Any, instance: Any, **kwargs) -> None:
+    if sender is Order:
+        invalidate_on_commit(version_key("order", instance.user_id))
+    elif sender is Ticket:
+        invalidate_on_commit(
+            version_key("flight"),
+            version_key("order", _order_user_id(instance)),
+        )
+    elif sender in SHARED_MODELS:
+        invalidate_on_commit()
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def crew_changed(sender: Any, action: str, **kwargs) -> None:
+    if action.startswith("post_"):
+        invalidate_on_commit()
+
+
+class CachedListMixin:
+    """Serve ``list`` from the response cache when it renders JSON"""
+
+    cache_per_user = False
+
+    def _response_cache_key(self, request: Request) -> Optional[str]:
+        if not settings.RESPONSE_CACHE_SECONDS:
+            return None
+        if request.accepted_renderer.format != "json":
+            return None
+        version = _version(version_key(self.basename))
+        user = "*"
+        if self.cache_per_user:
+            user = request.user.pk
+            user_key = version_key(self.basename, user)
+            version = f"{version}.{_version(user_key)}"
+        url = hashlib.sha256(request.build_absolute_uri().encode())
+        return (
+            f"airport:response:{version}:{self.basename}:"
+            f"{user}:{url.hexdigest()}"
+        )
+
+    def list(self, request: Request, *args, **kwargs) -> Any:
+        key = self._response_cache_key(request)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        payload = cache.get(key)
+        if payload is not None:
+            return payload.response(request)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        payload = self._payload(request, response)
+        cache.set(key, payload, settings.RESPONSE_CACHE_SECONDS)
+        # The rendered response keeps its ``data`` for the callers.
+        return payload.response(request, response)
+
+    def _payload(self, request: Request, response: Response) -> Payload:
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        return Payload(
+            response.render().content,
+            min_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+            gzip_level=GZIP_LEVEL,
+            brotli_quality=BROTLI_QUALITY,
+        )
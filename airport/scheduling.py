@@ -0,0 +1,310 @@
+"""
+Detection of crew members and airplanes assigned to overlapping flights.
+
+A flight occupies its airplane and crew during
+``[departure_time, arrival_time)``. Single flights are checked with one
+indexed query; whole schedules and imports are checked by sweeping each
+airplane's or crew member's flights in departure order, which is
+O(n log n + conflicts) instead of a query per pair.
+
+Schedule templates are expanded into flights here as well, since every
+expansion is checked for such conflicts before it is inserted.
+"""
+import datetime
+import heapq
+import itertools
+import zoneinfo
+from typing import Any, Iterable, Iterator, Optional
+
+from django.db import transaction
+from django.db.models import QuerySet
+from rest_framework.exceptions import ValidationError
+
+from airport.analytics import departure_day, mark_changed
+from airport.models import Airplane, Crew, Flight, ScheduleTemplate
+from airport.response_cache import invalidate_on_commit
+
+CrewFlight = Flight.crew.through
+BATCH_SIZE = 1000
+
+
+def overlapping_assignments(
+    crew_ids: Iterable[int],
+    departure_time: Any,
+    arrival_time: Any,
+    exclude_flight_id: Optional[int] = None,
+) -> QuerySet:
+    """Assignments of ``crew_ids`` to flights overlapping the interval"""
+    assignments = CrewFlight.objects.filter(
+        crew_id__in=list(crew_ids),
+        flight__departure_time__lt=arrival_time,
+        flight__arrival_time__gt=departure_time,
+    )
+    if exclude_flight_id is not None:
+        assignments = assignments.exclude(flight_id=exclude_flight_id)
+    return assignments.select_related("crew", "flight").order_by(
+        "crew_id", "flight__departure_time"
+    )
+
+
+def overlapping_flights(
+    airplane_id: int,
+    departure_time: Any,
+    arrival_time: Any,
+    exclude_flight_id: Optional[int] = None,
+) -> QuerySet[Flight]:
+    """Flights of the airplane overlapping the interval"""
+    flights = Flight.objects.filter(
+        airplane_id=airplane_id,
+        departure_time__lt=arrival_time,
+        arrival_time__gt=departure_time,
+    )
+    if exclude_flight_id is not None:
+        flights = flights.exclude(id=exclude_flight_id)
+    return flights.order_by("departure_time")
+
+
+def sweep_conflicts(
+    assignments: Iterable[tuple],
+) -> Iterator[tuple]:
+    """
+    Yield ``(key, flight_id, other_flight_id)`` for every pair of
+    overlapping flights sharing a key (crew member or airplane).
+    ``assignments`` are ``(key, flight_id, departure_time, arrival_time)``
+    tuples sorted by key and departure time.
+    """
+    for key, flights in itertools.groupby(
+        assignments, key=lambda assignment: assignment[0]
+    ):
+        # Flights still in the air, keyed by arrival time.
+        active = []
+        for order, assignment in enumerate(flights):
+            _, flight_id, departure_time, arrival_time = assignment
+            while active and active[0][0] <= departure_time:
+                heapq.heappop(active)
+            for _, _, other_flight_id in active:
+                yield key, other_flight_id, flight_id
+            heapq.heappush(active, (arrival_time, order, flight_id))
+
+
+def schedule_conflicts(flights: QuerySet[Flight]) -> Iterator[tuple]:
+    """Overlapping crew assignments among ``flights``"""
+    assignments = (
+        CrewFlight.objects.filter(flight__in=flights)
+        .order_by("crew_id", "flight__departure_time")
+        .values_list(
+            "crew_id",
+            "flight_id",
+            "flight__departure_time",
+            "flight__arrival_time",
+        )
+    )
+    return sweep_conflicts(assignments.iterator(chunk_size=5000))
+
+
+def airplane_schedule_conflicts(
+    flights: QuerySet[Flight],
+) -> Iterator[tuple]:
+    """Flights among ``flights`` that share an airplane and overlap"""
+    assignments = flights.order_by(
+        "airplane_id", "departure_time"
+    ).values_list("airplane_id", "id", "departure_time", "arrival_time")
+    return sweep_conflicts(assignments.iterator(chunk_size=5000))
+
+
+def _batch_conflicts(stored: Iterable[tuple], new: list) -> list:
+    assignments = [
+        (key, ("stored", flight_id), departure_time, arrival_time)
+        for key, flight_id, departure_time, arrival_time in stored
+    ] + new
+    assignments.sort(key=lambda assignment: (assignment[0], assignment[2]))
+
+    conflicts = []
+    for key, first, second in sweep_conflicts(assignments):
+        if isinstance(first, int):
+            conflicts.append((key, first, second))
+        if isinstance(second, int):
+            conflicts.append((key, second, first))
+    return conflicts
+
+
+def airplane_import_conflicts(flights: list) -> list:
+    """
+    Airplane conflicts of unsaved ``flights``, among themselves and with
+    the stored schedule, as ``(airplane_id, index, other)`` where
+    ``index`` is the position of a new flight in ``flights`` and ``other``
+    is the position of another new flight or the id of a stored flight
+    (``("stored", id)``). Needs one query whatever the number of flights.
+    """
+    if not flights:
+        return []
+
+    stored = Flight.objects.filter(
+        airplane_id__in={flight.airplane_id for flight in flights},
+        departure_time__lt=max(flight.arrival_time for flight in flights),
+        arrival_time__gt=min(flight.departure_time for flight in flights),
+    ).values_list("airplane_id", "id", "departure_time", "arrival_time")
+    return _batch_conflicts(
+        stored,
+        [
+            (
+                flight.airplane_id,
+                index,
+                flight.departure_time,
+                flight.arrival_time,
+            )
+            for index, flight in enumerate(flights)
+        ],
+    )
+
+
+def crew_import_conflicts(flights: list, crews: list) -> list:
+    """
+    Like ``airplane_import_conflicts`` for the crew members of unsaved
+    ``flights``, ``crews`` holding the crew ids of every flight. Conflicts
+    are keyed by crew id.
+    """
+    crew_ids = {crew_id for crew in crews for crew_id in crew}
+    if not flights or not crew_ids:
+        return []
+
+    stored = CrewFlight.objects.filter(
+        crew_id__in=crew_ids,
+        flight__departure_time__lt=max(
+            flight.arrival_time for flight in flights
+        ),
+        flight__arrival_time__gt=min(
+            flight.departure_time for flight in flights
+        ),
+    ).values_list(
+        "crew_id",
+        "flight_id",
+        "flight__departure_time",
+        "flight__arrival_time",
+    )
+    return _batch_conflicts(
+        stored,
+        [
+            (crew_id, index, flight.departure_time, flight.arrival_time)
+            for index, (flight, crew) in enumerate(zip(flights, crews))
+            for crew_id in crew
+        ],
+    )
+
+
+def template_departures(template: ScheduleTemplate) -> Iterator[tuple]:
+    """
+    ``(departure_time, arrival_time)`` of every flight of ``template``,
+    local times converted to aware datetimes in the template's time zone.
+    """
+    time_zone = zoneinfo.ZoneInfo(template.time_zone)
+    day = template.valid_from
+    while day <= template.valid_until:
+        if str(day.isoweekday()) in template.weekdays:
+            arrival_day = day + datetime.timedelta(
+                days=template.arrival_day_offset
+            )
+            yield (
+                datetime.datetime.combine(
+                    day, template.departure_time, tzinfo=time_zone
+                ),
+                datetime.datetime.combine(
+                    arrival_day, template.arrival_time, tzinfo=time_zone
+                ),
+            )
+        day += datetime.timedelta(days=1)
+
+
+def expand_template(template: ScheduleTemplate) -> list:
+    """
+    Create the missing flights of ``template`` and their crew links with
+    a few bulk inserts in one transaction. Flights that already exist are
+    left alone, so expanding again only fills gaps. Raises
+    ``ValidationError`` when the new flights would double-book the
+    airplane or a crew member.
+    """
+    with transaction.atomic():
+        # Serializes concurrent expansions of the same template.
+        template = ScheduleTemplate.objects.select_for_update().get(
+            pk=template.pk
+        )
+        departures = list(template_departures(template))
+        if not departures:
+            return []
+
+        existing = set(
+            template.flights.filter(
+                departure_time__gte=departures[0][0],
+                departure_time__lte=departures[-1][0],
+            ).values_list("departure_time", flat=True)
+        )
+        flights = [
+            Flight(
+                route_id=template.route_id,
+                airplane_id=template.airplane_id,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+                schedule_template=template,
+            )
+            for departure_time, arrival_time in departures
+            if departure_time not in existing
+        ]
+        crew_ids = list(template.crew.values_list("id", flat=True))
+        # Serializes with other writers booking the same airplane or crew,
+        # in the order the flight serializers lock them.
+        list(
+            Airplane.objects.select_for_update()
+            .filter(id=template.airplane_id)
+            .order_by("id")
+        )
+        list(
+            Crew.objects.select_for_update()
+            .filter(id__in=crew_ids)
+            .order_by("id")
+        )
+        errors = {}
+        for flight_errors in import_conflict_errors(
+            flights, [crew_ids] * len(flights)
+        ):
+            for field, messages in flight_errors.items():
+                errors.setdefault(field, []).extend(messages)
+        if errors:
+            raise ValidationError(errors)
+
+        Flight.objects.bulk_create(flights, batch_size=BATCH_SIZE)
+        CrewFlight.objects.bulk_create(
+            [
+                CrewFlight(flight_id=flight.id, crew_id=crew_id)
+                for flight in flights
+                for crew_id in crew_ids
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        # bulk_create sends no post_save signal.
+        mark_changed(
+            departure_day(flight.departure_time) for flight in flights
+        )
+        invalidate_on_commit()
+        return flights
+
+
+def import_conflict_errors(flights: list, crews: list) -> list:
+    """
+    Airplane and crew double-bookings of unsaved ``flights`` as one error
+    dict per flight, empty for flights without conflicts.
+    """
+    errors = [{} for _ in flights]
+    for field, conflicts in (
+        ("airplane", airplane_import_conflicts(flights)),
+        ("crew", crew_import_conflicts(flights, crews)),
+    ):
+        for key, index, other in conflicts:
+            other = (
+                f"flight {other[1]}" if isinstance(other, tuple)
+                else f"the flight at {flights[other].departure_time}"
+            )
+            errors[index].setdefault(field, []).append(
+                f"{field.capitalize()} {key} of the flight at "
+                f"{flights[index].departure_time} overlaps {other}."
+            )
+    return errors
@@ -0,0 +1,281 @@
+"""
+Live seat availability of a flight as a Server-Sent Events stream.
+
+Ticket changes are published once to ``broker``, an in-process pub/sub
+that hands the formatted event to the queue of every client watching
+the flight. On PostgreSQL a ticket change is sent with ``NOTIFY`` in the
+saving transaction, so it is only delivered after commit, and every
+process LISTENs and feeds its own broker; other databases publish to the
+local broker after commit.
+
+The stream needs an ASGI server, under WSGI a response never ends.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from typing import Any, AsyncIterator, Optional
+
+import psycopg2
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from rest_framework.exceptions import AuthenticationFailed
+
+from airport.models import Flight, Ticket
+from user.authentication import CachedJWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "airport_seat_events"
+QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 15
+# Django 4.2 keeps streaming to clients that went away, so streams end
+# after a while and EventSource reconnects after RETRY_MILLISECONDS.
+MAX_STREAM_SECONDS = 300
+RETRY_MILLISECONDS = 1000
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+def format_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class SeatEventBroker:
+    """Fan-out of formatted events to the queues of a flight's watchers"""
+
+    def __init__(self) -> None:
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, flight_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(flight_id, set()).add(subscriber)
+        return queue
+
+    def unsubscribe(self, flight_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(flight_id, set())
+            for subscriber in list(subscribers):
+                if subscriber[1] is queue:
+                    subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(flight_id, None)
+
+    def watchers(self, flight_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(flight_id, ()))
+
+    def publish(self, flight_id: int, event: str, data: Any) -> None:
+        """Thread-safe, the event is formatted once for all watchers"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(flight_id, ()))
+        if not subscribers:
+            return
+
+        message = format_event(event, data)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, message)
+            except RuntimeError:
+                # The watcher's event loop is gone.
+                self.unsubscribe(flight_id, queue)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, message: str) -> None:
+        if queue.full():
+            # A watcher too slow to keep up reloads the seat map instead.
+            while not queue.empty():
+                queue.get_nowait()
+            message = RESYNC
+        queue.put_nowait(message)
+
+
+broker = SeatEventBroker()
+
+
+class NotificationListener:
+    """
+    Thread feeding the PostgreSQL notifications of all processes to
+    ``broker``, started with the first watcher of the process.
+    """
+
+    def __init__(self) -> None:
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="seat-events-listener", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        retry_seconds = 1
+        while True:
+            try:
+                self._listen()
+            except psycopg2.Error:
+                logger.exception("Seat event listener lost its connection")
+                time.sleep(retry_seconds)
+                retry_seconds = min(retry_seconds * 2, 30)
+
+    @staticmethod
+    def _listen() -> None:
+        database = settings.DATABASES["default"]
+        connection = psycopg2.connect(
+            dbname=database["NAME"],
+            user=database["USER"],
+            password=database["PASSWORD"],
+            host=database["HOST"],
+            port=database.get("PORT") or None,
+        )
+        connection.autocommit = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            while True:
+                if select.select([connection], [], [], 5) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    payload = json.loads(connection.notifies.pop(0).payload)
+                    broker.publish(
+                        payload["flight"], payload["event"], payload["data"]
+                    )
+        finally:
+            connection.close()
+
+
+listener = NotificationListener()
+
+
+def publish_seat_event(
+    using: str, flight_id: int, event: str, data: Any
+) -> None:
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        payload = json.dumps(
+            {"flight": flight_id, "event": event, "data": data}
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+    else:
+        transaction.on_commit(
+            lambda: broker.publish(flight_id, event, data), using=using
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(
+    instance: Ticket, created: bool, using: str, **kwargs: Any
+) -> None:
+    if created:
+        publish_seat_event(
+            using,
+            instance.flight_id,
+            "seat-taken",
+            {"row": instance.row, "seat": instance.seat},
+        )
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(instance: Ticket, using: str, **kwargs: Any) -> None:
+    publish_seat_event(
+        using,
+        instance.flight_id,
+        "seat-released",
+        {"row": instance.row, "seat": instance.seat},
+    )
+
+
+def _authenticate(request: HttpRequest) -> Optional[Any]:
+    """
+    User of the JWT in the Authorization header, or in ``?token=`` for
+    EventSource clients that cannot set headers.
+    """
+    authentication = CachedJWTAuthentication()
+    try:
+        result = authentication.authenticate(request)
+        if result is None and request.GET.get("token"):
+            token = authentication.get_validated_token(
+                request.GET["token"].encode()
+            )
+            result = (authentication.get_user(token), token)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+def _taken_seats(flight: Flight) -> list:
+    return [
+        {"row": row, "seat": seat}
+        for row, seat in Ticket.objects.filter(
+            flight=flight, departure_time=flight.departure_time
+        ).values_list("row", "seat")
+    ]
+
+
+async def _stream(flight: Flight) -> AsyncIterator[str]:
+    if connections["default"].vendor == "postgresql":
+        listener.ensure_started()
+    # Subscribe before reading the snapshot so no change falls in between.
+    queue = broker.subscribe(flight.id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        yield format_event(
+            "snapshot",
+            {
+                "rows": flight.airplane.rows,
+                "seats_in_row": flight.airplane.seats_in_row,
+                "taken": await sync_to_async(_taken_seats)(flight),
+            },
+        )
+        while loop.time() < deadline:
+            try:
+                yield await asyncio.wait_for(
+                    queue.get(),
+                    timeout=min(KEEPALIVE_SECONDS, deadline - loop.time()),
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        broker.unsubscribe(flight.id, queue)
+
+
+async def flight_seat_events(request: HttpRequest, pk: int) -> HttpResponse:
+    """Seat map snapshot followed by seat-taken/seat-released events"""
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=401,
+        )
+
+    flight = await Flight.objects.select_related("airplane").only(
+        "departure_time", "airplane__rows", "airplane__seats_in_row"
+    ).filter(pk=pk).afirst()
+    if flight is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    return StreamingHttpResponse(
+        _stream(flight),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
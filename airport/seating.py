@@ -0,0 +1,118 @@
+"""
+Seat suggestions for a group booking on one flight.
+
+The occupancy of a flight is kept as one bit mask per row (bit ``n`` set
+when seat ``n + 1`` is taken), built from the airplane's size and one
+query over the flight's tickets. Free blocks of a row are then found
+with a few shifts instead of scanning seat by seat.
+"""
+from typing import Optional
+
+from airport.models import Flight, Ticket
+
+
+class SeatMap:
+    def __init__(self, rows: int, seats_in_row: int, taken: list) -> None:
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        self.full_row = (1 << seats_in_row) - 1
+        self.taken = [0] * rows
+        for row, seat in taken:
+            if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+                self.taken[row - 1] |= 1 << (seat - 1)
+
+    @classmethod
+    def for_flight(cls, flight: Flight) -> "SeatMap":
+        taken = Ticket.objects.filter(
+            flight=flight, departure_time=flight.departure_time
+        ).values_list("row", "seat")
+        return cls(flight.airplane.rows, flight.airplane.seats_in_row, taken)
+
+    def free(self, row: int) -> int:
+        return ~self.taken[row - 1] & self.full_row
+
+    def free_count(self, row: int) -> int:
+        return bin(self.free(row)).count("1")
+
+    def free_runs(self, row: int) -> list:
+        """``(first_seat, length)`` of every run of free seats in a row"""
+        runs = []
+        free = self.free(row)
+        seat = 1
+        while free:
+            if free & 1:
+                length = 0
+                while free & 1:
+                    free >>= 1
+                    length += 1
+                runs.append((seat, length))
+                seat += length
+            else:
+                free >>= 1
+                seat += 1
+        return runs
+
+
+def _block_starts(free: int, size: int) -> int:
+    """Bits where ``size`` free seats in a row begin"""
+    if size > free.bit_length():
+        return 0
+    starts = free
+    for shift in range(1, size):
+        starts &= free >> shift
+    return starts
+
+
+def find_block(seat_map: SeatMap, size: int) -> Optional[list]:
+    """
+    Adjacent free seats in one row, taken from the smallest free run that
+    fits the group (so larger runs stay available for larger groups),
+    nearest to the front on ties.
+    """
+    best = None
+    for row in range(1, seat_map.rows + 1):
+        if not _block_starts(seat_map.free(row), size):
+            continue
+        for first_seat, length in seat_map.free_runs(row):
+            if length >= size and (best is None or length < best[0]):
+                best = (length, row, first_seat)
+    if best is None:
+        return None
+    _, row, first_seat = best
+    return [(row, seat) for seat in range(first_seat, first_seat + size)]
+
+
+def find_nearby_seats(seat_map: SeatMap, size: int) -> Optional[list]:
+    """
+    Seats spread over the fewest consecutive rows, filled from each
+    row's longest free runs so the group stays as close as possible.
+    """
+    for span in range(2, seat_map.rows + 1):
+        for first_row in range(1, seat_map.rows - span + 2):
+            rows = range(first_row, first_row + span)
+            if sum(seat_map.free_count(row) for row in rows) < size:
+                continue
+            seats = []
+            for row in rows:
+                runs = sorted(
+                    seat_map.free_runs(row), key=lambda run: -run[1]
+                )
+                for first_seat, length in runs:
+                    for seat in range(first_seat, first_seat + length):
+                        if len(seats) < size:
+                            seats.append((row, seat))
+            return seats
+    return None
+
+
+def suggest_seats(seat_map: SeatMap, size: int) -> tuple:
+    """``(seats, contiguous)`` for a group, ``([], False)`` when full"""
+    free_seats = sum(
+        seat_map.free_count(row) for row in range(1, seat_map.rows + 1)
+    )
+    if size > free_seats:
+        return [], False
+    block = find_block(seat_map, size)
+    if block is not None:
+        return block, True
+    return find_nearby_seats(seat_map, size) or [], False
@@ -1,9 +1,19 @@
 from typing import Any
 
+from django.conf import settings
 from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.validators import UniqueTogetherValidator
 
+from airport.analytics import departure_day, mark_changed
+from airport.bulk import (
+    BatchPrimaryKeyRelatedField,
+    BulkCreateListSerializer,
+)
+from airport.fieldsets import SparseFieldsetSerializerMixin
+from airport.geo import route_distance
+from airport.outbox import enqueue
 from airport.models import (
     AirplaneType,
     Airplane,
@@ -13,6 +23,12 @@ from airport.models import (
     Flight,
     Ticket,
     Order,
+    ScheduleTemplate,
+)
+from airport.scheduling import (
+    import_conflict_errors,
+    overlapping_assignments,
+    overlapping_flights,
 )
 
 
@@ -26,6 +42,8 @@ class AirplaneTypeSerializer(serializers.ModelSerializer):
 
 
 class CrewSerializer(serializers.ModelSerializer):
+    serializer_related_field = BatchPrimaryKeyRelatedField
+
     class Meta:
         model = Crew
         fields = (
@@ -33,9 +51,14 @@ class CrewSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
         )
+        list_serializer_class = BulkCreateListSerializer
+
 
+class AirportListSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
+    serializer_related_field = BatchPrimaryKeyRelatedField
 
-class AirportListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airport
         fields = (
@@ -43,10 +66,28 @@ class AirportListSerializer(serializers.ModelSerializer):
             "name",
             "closest_big_cite",
             "country",
+            "latitude",
+            "longitude",
         )
+        list_serializer_class = BulkCreateListSerializer
 
+    def validate(self, attrs: dict) -> dict:
+        coordinates = [
+            attrs.get(name, getattr(self.instance, name, None))
+            for name in ("latitude", "longitude")
+        ]
+        if coordinates.count(None) == 1:
+            raise ValidationError(
+                "Latitude and longitude must be given together."
+            )
+        return attrs
+
+
+class AirplaneSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
+    serializer_related_field = BatchPrimaryKeyRelatedField
 
-class AirplaneSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airplane
         fields = (
@@ -56,9 +97,12 @@ class AirplaneSerializer(serializers.ModelSerializer):
             "seats_in_row",
             "airplane_type"
         )
+        list_serializer_class = BulkCreateListSerializer
 
 
-class AirplaneListSerializer(serializers.ModelSerializer):
+class AirplaneListSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Airplane
         fields = ("id", "name", "rows", "seats_in_row", "image")
@@ -80,6 +124,13 @@ class AirplaneDetailSerializer(AirplaneSerializer):
             "capacity",
             "image"
         )
+        field_requirements = {
+            "airplane_type": {
+                "select": ["airplane_type"],
+                "only": ["airplane_type__name"],
+            },
+            "capacity": {"only": ["rows", "seats_in_row"]},
+        }
 
 
 class AirplaneImageSerializer(AirplaneSerializer):
@@ -87,11 +138,46 @@ class AirplaneImageSerializer(AirplaneSerializer):
         model = Airplane
         fields = ("id", "image")
 
+    def validate_image(self, image: Any) -> Any:
+        if image.size > settings.AIRPLANE_IMAGE_MAX_SIZE:
+            raise ValidationError(
+                f"Image file must not exceed "
+                f"{settings.AIRPLANE_IMAGE_MAX_SIZE} bytes."
+            )
+
+        # Django's ImageField leaves the Pillow image opened during
+        # validation on the file; its size is read from the header only.
+        width, height = image.image.size
+        max_dimension = settings.AIRPLANE_IMAGE_MAX_DIMENSION
+        if width > max_dimension or height > max_dimension:
+            raise ValidationError(
+                f"Image dimensions must not exceed "
+                f"{max_dimension}x{max_dimension} pixels."
+            )
+        return image
+
+
+class RouteSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
+    serializer_related_field = BatchPrimaryKeyRelatedField
 
-class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
         fields = ("id", "source", "destination", "distance")
+        list_serializer_class = BulkCreateListSerializer
+
+    def validate(self, attrs: dict) -> dict:
+        """Compute the distance from the airports when it is omitted"""
+        moved = "source" in attrs or "destination" in attrs
+        if attrs.get("distance") is None and (self.instance is None or moved):
+            source, destination = (
+                attrs.get(name, getattr(self.instance, name, None))
+                for name in ("source", "destination")
+            )
+            if source is not None and destination is not None:
+                attrs["distance"] = route_distance(source, destination)
+        return attrs
 
 
 class RouteListSerializer(RouteSerializer):
@@ -107,7 +193,15 @@ class RouteDetailSerializer(RouteSerializer):
     destination = AirportListSerializer(many=False, read_only=True)
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
+    serializer_related_field = BatchPrimaryKeyRelatedField
+    # Declared because DRF makes relations with a through model read-only.
+    crew = BatchPrimaryKeyRelatedField(
+        many=True, queryset=Crew.objects.all(), required=False
+    )
+
     class Meta:
         model = Flight
         fields = (
@@ -118,6 +212,173 @@ class FlightSerializer(serializers.ModelSerializer):
             "arrival_time",
             "crew"
         )
+        list_serializer_class = BulkCreateListSerializer
+
+    def _field_value(self, attrs: dict, name: str) -> Any:
+        if name in attrs:
+            return attrs[name]
+        if self.instance is None:
+            return None
+        if name == "crew":
+            return list(self.instance.crew.all())
+        return getattr(self.instance, name)
+
+    def validate_crew_schedule(self, attrs: dict) -> None:
+        crew = self._field_value(attrs, "crew")
+        departure_time = self._field_value(attrs, "departure_time")
+        arrival_time = self._field_value(attrs, "arrival_time")
+        if not crew or departure_time is None or arrival_time is None:
+            return
+
+        conflicts = overlapping_assignments(
+            [member.id for member in crew],
+            departure_time,
+            arrival_time,
+            exclude_flight_id=getattr(self.instance, "id", None),
+        )
+        errors = [
+            f"{assignment.crew} is already assigned to flight "
+            f"{assignment.flight_id} departing at "
+            f"{assignment.flight.departure_time.isoformat()}."
+            for assignment in conflicts
+        ]
+        if errors:
+            raise ValidationError({"crew": errors})
+
+    def validate_airplane_schedule(self, attrs: dict) -> None:
+        airplane = self._field_value(attrs, "airplane")
+        departure_time = self._field_value(attrs, "departure_time")
+        arrival_time = self._field_value(attrs, "arrival_time")
+        if airplane is None or departure_time is None or arrival_time is None:
+            return
+
+        conflict = overlapping_flights(
+            airplane.id,
+            departure_time,
+            arrival_time,
+            exclude_flight_id=getattr(self.instance, "id", None),
+        ).first()
+        if conflict is not None:
+            raise ValidationError(
+                {
+                    "airplane": f"{airplane} is already used by flight "
+                    f"{conflict.id} from "
+                    f"{conflict.departure_time.isoformat()} to "
+                    f"{conflict.arrival_time.isoformat()}."
+                }
+            )
+
+    def validate(self, attrs: dict) -> dict:
+        attrs = super().validate(attrs)
+        # Batches are checked together in batch_errors().
+        if not isinstance(self.parent, BulkCreateListSerializer):
+            self.validate_airplane_schedule(attrs)
+            self.validate_crew_schedule(attrs)
+        return attrs
+
+    def batch_errors(self, items: list) -> list:
+        flights = [
+            Flight(
+                airplane_id=item["airplane"].id,
+                departure_time=item["departure_time"],
+                arrival_time=item["arrival_time"],
+            )
+            for item in items
+        ]
+        return import_conflict_errors(
+            flights,
+            [[member.id for member in item.get("crew", [])] for item in items],
+        )
+
+    def lock_batch(self, items: list) -> None:
+        list(
+            Airplane.objects.select_for_update()
+            .filter(id__in={item["airplane"].id for item in items})
+            .order_by("id")
+        )
+        list(
+            Crew.objects.select_for_update()
+            .filter(
+                id__in={
+                    member.id
+                    for item in items
+                    for member in item.get("crew", [])
+                }
+            )
+            .order_by("id")
+        )
+        errors = self.batch_errors(items)
+        if any(errors):
+            raise ValidationError(errors)
+
+    def after_bulk_create(self, flights: list) -> None:
+        # bulk_create sends no post_save signal.
+        mark_changed(
+            departure_day(flight.departure_time) for flight in flights
+        )
+
+    def lock_schedule(self, validated_data: dict) -> None:
+        """
+        Lock the airplane and crew rows and check again inside the saving
+        transaction, so concurrent requests cannot both book them.
+        """
+        airplane = self._field_value(validated_data, "airplane")
+        if airplane is not None:
+            list(Airplane.objects.select_for_update().filter(id=airplane.id))
+        crew = self._field_value(validated_data, "crew") or []
+        list(
+            Crew.objects.select_for_update()
+            .filter(id__in=[member.id for member in crew])
+            .order_by("id")
+        )
+        self.validate_airplane_schedule(validated_data)
+        self.validate_crew_schedule(validated_data)
+
+    def create(self, validated_data: dict) -> Flight:
+        with transaction.atomic():
+            self.lock_schedule(validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance: Flight, validated_data: dict) -> Flight:
+        with transaction.atomic():
+            self.lock_schedule(validated_data)
+            return super().update(instance, validated_data)
+
+
+class ScheduleTemplateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ScheduleTemplate
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "weekdays",
+            "departure_time",
+            "arrival_time",
+            "arrival_day_offset",
+            "time_zone",
+            "valid_from",
+            "valid_until",
+            "crew",
+        )
+
+    def validate(self, attrs: dict) -> dict:
+        attrs = super().validate(attrs)
+        if attrs["valid_from"] > attrs["valid_until"]:
+            raise ValidationError(
+                {"valid_until": "valid_until must not precede valid_from."}
+            )
+        if (
+            not attrs.get("arrival_day_offset")
+            and attrs["arrival_time"] <= attrs["departure_time"]
+        ):
+            raise ValidationError(
+                {
+                    "arrival_time": "arrival_time must follow departure_time "
+                    "unless arrival_day_offset is set."
+                }
+            )
+        return attrs
 
 
 class FlightListSerializer(FlightSerializer):
@@ -144,6 +405,17 @@ class FlightListSerializer(FlightSerializer):
             "route",
             "tickets_available",
         )
+        field_requirements = {
+            "airplane_capacity": {
+                "select": ["airplane"],
+                "only": ["airplane__rows", "airplane__seats_in_row"],
+            },
+            "route": {
+                "select": ["route__source", "route__destination"],
+                "only": ["route__source__name", "route__destination__name"],
+            },
+            "tickets_available": {"annotate": ["tickets_available"]},
+        }
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -160,6 +432,14 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
+        # The model constraint also covers the partition key
+        # departure_time, which follows from the flight.
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Ticket.objects.all(),
+                fields=("flight", "row", "seat"),
+            )
+        ]
 
 
 class TicketListSerializer(TicketSerializer):
@@ -210,6 +490,17 @@ class FlightDetailSerializer(FlightSerializer):
             "route_destination",
             "taken_places",
         )
+        field_requirements = {
+            "airplane": {"select": ["airplane"], "only": ["airplane__name"]},
+            "route_source": {
+                "select": ["route__source"],
+                "only": ["route__source__name"],
+            },
+            "route_destination": {
+                "select": ["route__destination"],
+                "only": ["route__destination__name"],
+            },
+        }
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -229,8 +520,46 @@ class OrderSerializer(serializers.ModelSerializer):
             order = Order.objects.create(**validated_data)
             for ticket_data in tickets_data:
                 Ticket.objects.create(order=order, **ticket_data)
+            enqueue("order_confirmation", order_id=order.id)
             return order
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class FlightSideloadSerializer(FlightListSerializer):
+    route = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = Flight
+        fields = (
+            "id",
+            "departure_time",
+            "arrival_time",
+            "airplane_name",
+            "airplane_capacity",
+            "route",
+            "tickets_available",
+        )
+
+
+class OrderSideloadSerializer(OrderSerializer):
+    """Order whose tickets reference flights listed once in `included`"""
+
+    tickets = TicketSerializer(many=True, read_only=True)
+
+
+class LoadFactorSerializer(serializers.Serializer):
+    day = serializers.DateField()
+    route = serializers.IntegerField(required=False)
+    airplane_type = serializers.IntegerField(required=False, allow_null=True)
+    flights = serializers.IntegerField()
+    seats = serializers.IntegerField()
+    tickets_sold = serializers.IntegerField()
+    load_factor = serializers.SerializerMethodField()
+
+    def get_load_factor(self, row: dict) -> float:
+        if not row["seats"]:
+            return 0.0
+        return round(row["tickets_sold"] / row["seats"], 4)
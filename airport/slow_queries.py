@@ -0,0 +1,237 @@
+"""
+Slow-query log of the airport and user views.
+
+``SlowQueryMiddleware`` times every query the views of these apps run,
+through execute wrappers on each database connection. Queries slower
+than ``SLOW_QUERY_MS`` are logged with their normalized SQL, parameters,
+view and the innermost line of app code that ran them. Once the response
+is ready, they are stored as a ``SlowQuery`` for the admin, and a SELECT
+is queued as an outbox job (airport/outbox.py) that explains it with
+``EXPLAIN (ANALYZE, BUFFERS)`` on PostgreSQL (``EXPLAIN QUERY PLAN`` on
+SQLite) in the worker, so the request never waits for the query to run
+again.
+
+EXPLAIN ANALYZE still runs the query again, so a normalized query is
+stored and explained at most once every ``SLOW_QUERY_EXPLAIN_SECONDS``
+across processes, in a read-only transaction that is rolled back: a
+SELECT with side effects (``nextval()``, ``pg_notify()``) fails there or
+has them undone, and gets the plan of a plain EXPLAIN instead. Other
+statements are never run again, and only the parameters of SELECTs are
+stored, as those of writes hold user data such as password hashes.
+"""
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+from contextvars import ContextVar
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections, transaction
+from django.http import HttpRequest, HttpResponse
+
+from airport.models import SlowQuery
+from airport.outbox import enqueue
+
+logger = logging.getLogger(__name__)
+
+APPS = ("airport", "user")
+MAX_PARAMS_LENGTH = 2000
+
+_state = ContextVar("slow_query_state", default=None)
+
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(sql: str) -> str:
+    """The query with literals replaced and IN lists collapsed"""
+    sql = _LITERAL.sub("%s", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint(sql: str) -> str:
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()
+
+
+def _app_directories() -> tuple:
+    return tuple(str(Path(settings.BASE_DIR) / app) for app in APPS)
+
+
+def _caller() -> str:
+    """The innermost line of app code on the stack, besides this module"""
+    directories = _app_directories()
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(directories) and filename != __file__:
+            relative = Path(filename).relative_to(settings.BASE_DIR)
+            return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return ""
+
+
+class _Timer:
+    def __init__(self, alias: str, state: dict) -> None:
+        self.alias = alias
+        self.state = state
+
+    def __call__(
+        self,
+        execute: Callable,
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict,
+    ) -> Any:
+        if self.state["view"] is None:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= settings.SLOW_QUERY_MS:
+                self.state["queries"].append(
+                    (self.alias, sql, params, many, duration_ms, _caller())
+                )
+
+
+def is_select(sql: str) -> bool:
+    statement = sql.lstrip().upper()
+    return statement.startswith("SELECT") and " FOR UPDATE" not in statement
+
+
+def _rolled_back(alias: str, sql: str, params: Any) -> list:
+    """Rows of ``sql`` run read-only in a transaction that is rolled back"""
+    connection = connections[alias]
+    # A savepoint when a transaction was left open, which must survive a
+    # failing statement.
+    with transaction.atomic(using=alias):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET TRANSACTION READ ONLY")
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        transaction.set_rollback(True, using=alias)
+    return rows
+
+
+def explain(alias: str, sql: str, params: Any) -> str:
+    """Plan of a SELECT, or an empty string for anything else"""
+    if not is_select(sql):
+        return ""
+    vendor = connections[alias].vendor
+    if vendor == "postgresql":
+        prefixes = ("EXPLAIN (ANALYZE, BUFFERS) ", "EXPLAIN ")
+    elif vendor == "sqlite":
+        prefixes = ("EXPLAIN QUERY PLAN ",)
+    else:
+        return ""
+    for prefix in prefixes:
+        try:
+            rows = _rolled_back(alias, prefix + sql, params)
+        except DatabaseError as error:
+            failure = f"EXPLAIN failed: {error}"
+        else:
+            return "\n".join(
+                " ".join(str(value) for value in row) for row in rows
+            )
+    return failure
+
+
+def record(view: str, query: tuple) -> Optional[SlowQuery]:
+    alias, sql, params, many, duration_ms, caller = query
+    key = fingerprint(sql)
+    logger.warning(
+        "Slow query (%.1f ms) in %s at %s: %s",
+        duration_ms,
+        view,
+        caller,
+        normalize(sql),
+    )
+    if not cache.add(
+        f"slow-query:{key}", True, settings.SLOW_QUERY_EXPLAIN_SECONDS
+    ):
+        return None
+    with transaction.atomic():
+        slow_query = SlowQuery.objects.create(
+            fingerprint=key,
+            sql=normalize(sql),
+            params=repr(params)[:MAX_PARAMS_LENGTH] if is_select(sql) else "",
+            duration_ms=duration_ms,
+            database=alias,
+            view=view[:255],
+            caller=caller[:255],
+        )
+        if not many and is_select(sql):
+            _queue_explain(slow_query, sql, params)
+    return slow_query
+
+
+def _queue_explain(slow_query: SlowQuery, sql: str, params: Any) -> None:
+    try:
+        # Dates, decimals and UUIDs become strings the database casts back.
+        params = json.loads(json.dumps(params, cls=DjangoJSONEncoder))
+    except TypeError:
+        logger.info("Cannot queue the parameters of %s", slow_query)
+        return
+    enqueue(
+        "explain_slow_query",
+        slow_query_id=slow_query.id,
+        database=slow_query.database,
+        sql=sql,
+        params=params,
+    )
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if settings.SLOW_QUERY_MS <= 0:
+            return self.get_response(request)
+
+        state = {"view": None, "queries": []}
+        token = _state.set(state)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(
+                            _Timer(alias, state)
+                        )
+                    )
+                response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        for query in state["queries"]:
+            try:
+                record(state["view"], query)
+            except DatabaseError:
+                logger.exception("Could not store a slow query")
+        return response
+
+    def process_view(
+        self, request: HttpRequest, view_func: Callable, *args
+    ) -> None:
+        state = _state.get()
+        if state is None or not view_func.__module__.startswith(
+            tuple(f"{app}." for app in APPS)
+        ):
+            return None
+        view = getattr(view_func, "cls", view_func).__name__
+        if request.resolver_match and request.resolver_match.url_name:
+            view = f"{view} ({request.resolver_match.url_name})"
+        state["view"] = view
+        return None
@@ -0,0 +1,156 @@
+"""
+Nearest airports from an in-memory KD-tree.
+
+Airports are indexed as points on the unit sphere, where the straight
+chord between two points grows with their great-circle distance, so a
+Euclidean KD-tree answers nearest-K and within-radius queries exactly
+without scanning the table. The serialized airports are kept next to the
+tree, a query does not touch the database.
+
+Every process keeps its own index. Saving or deleting an airport drops
+the index of the saving process; for other changes (batch creates, other
+processes) the row count and latest ``updated_at`` of the airport table
+are compared with those the index was built from at most every
+``NEAREST_AIRPORT_RECHECK_SECONDS``.
+"""
+import threading
+import time
+from typing import Any, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from scipy.spatial import cKDTree
+
+from airport.geo import EARTH_RADIUS_KM, haversine_km
+from airport.models import Airport
+from airport.serializers import AirportListSerializer
+
+
+def unit_vectors(latitudes: Any, longitudes: Any) -> np.ndarray:
+    latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.radians(np.asarray(longitudes, dtype=np.float64))
+    return np.column_stack(
+        (
+            np.cos(latitudes) * np.cos(longitudes),
+            np.cos(latitudes) * np.sin(longitudes),
+            np.sin(latitudes),
+        )
+    )
+
+
+def chord_length(distance_km: float) -> float:
+    angle = min(distance_km / EARTH_RADIUS_KM, np.pi)
+    return 2 * np.sin(angle / 2)
+
+
+def fingerprint() -> tuple:
+    result = Airport.objects.aggregate(
+        count=Count("id"), updated_at=Max("updated_at")
+    )
+    return result["count"], result["updated_at"]
+
+
+class AirportIndex:
+    def __init__(self, airports: list, version: tuple) -> None:
+        self.version = version
+        self.airports = AirportListSerializer(airports, many=True).data
+        self.latitudes = np.array(
+            [airport.latitude for airport in airports], dtype=np.float64
+        )
+        self.longitudes = np.array(
+            [airport.longitude for airport in airports], dtype=np.float64
+        )
+        self.tree = cKDTree(unit_vectors(self.latitudes, self.longitudes))
+
+    @classmethod
+    def build(cls) -> "AirportIndex":
+        version = fingerprint()
+        airports = list(
+            Airport.objects.exclude(latitude=None)
+            .exclude(longitude=None)
+            .order_by("id")
+        )
+        return cls(airports, version)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        count: int,
+        radius_km: Optional[float] = None,
+    ) -> list:
+        """
+        Up to ``count`` airports closest to the point, within
+        ``radius_km`` if given, with their distance, closest first.
+        """
+        size = len(self.airports)
+        if not size or count < 1:
+            return []
+        point = unit_vectors([latitude], [longitude])[0]
+
+        if radius_km is None:
+            _, indexes = self.tree.query(point, k=min(count, size))
+            indexes = np.atleast_1d(indexes)
+        else:
+            indexes = np.array(
+                self.tree.query_ball_point(point, chord_length(radius_km)),
+                dtype=np.int64,
+            )
+
+        distances = haversine_km(
+            latitude,
+            longitude,
+            self.latitudes[indexes],
+            self.longitudes[indexes],
+        )
+        order = np.argsort(distances, kind="stable")[:count]
+        return [
+            {
+                **self.airports[index],
+                "distance": round(float(distance), 1),
+            }
+            for index, distance in zip(
+                indexes[order].tolist(), distances[order].tolist()
+            )
+        ]
+
+
+_lock = threading.Lock()
+_index = None
+_checked_at = 0.0
+
+
+def airport_index() -> AirportIndex:
+    global _index, _checked_at
+
+    index = _index
+    if (
+        index is not None
+        and time.monotonic() - _checked_at
+        < settings.NEAREST_AIRPORT_RECHECK_SECONDS
+    ):
+        return index
+
+    with _lock:
+        index = _index
+        if index is None or index.version != fingerprint():
+            index = _index = AirportIndex.build()
+        _checked_at = time.monotonic()
+    return index
+
+
+def clear_index() -> None:
+    global _index
+    _index = None
+
+
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+def airport_changed(sender: Any, **kwargs) -> None:
+    # Again after commit, a rebuild in between still reads the old rows.
+    clear_index()
+    transaction.on_commit(clear_index)
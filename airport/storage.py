@@ -0,0 +1,72 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Filesystem storage that names files after the SHA-256 of their content.
+
+    The requested name only contributes its directory and extension: the
+    upload is streamed into a temporary file while being hashed and then
+    moved to ``<directory>/<hash[:2]>/<hash><ext>``. Uploading content that
+    is already stored discards the temporary copy and reuses the existing
+    file, so identical images are kept on disk only once.
+    """
+
+    temporary_suffix = ".part"
+
+    def _save(self, name: str, content) -> str:
+        directory, filename = posixpath.split(name)
+        _, ext = os.path.splitext(filename)
+
+        temporary_directory = self.path(directory)
+        os.makedirs(temporary_directory, exist_ok=True)
+        fd, temporary_path = tempfile.mkstemp(
+            dir=temporary_directory, suffix=self.temporary_suffix
+        )
+
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as temporary_file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temporary_file.write(chunk)
+
+            content_hash = digest.hexdigest()
+            name = posixpath.join(
+                directory, content_hash[:2], f"{content_hash}{ext.lower()}"
+            )
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+            if os.path.exists(full_path):
+                os.remove(temporary_path)
+                # A fresh mtime keeps the reused file out of the deletion
+                # of a concurrently released image (Airplane.release_image).
+                os.utime(full_path)
+            else:
+                os.replace(temporary_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        return name
+
+    def get_available_name(self, name: str, max_length=None) -> str:
+        # The final name is derived from the content in ``_save``, so the
+        # requested name never has to be made unique.
+        return name
+
+
+airplane_image_storage = ContentAddressedStorage()
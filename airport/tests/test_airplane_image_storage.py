@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airplane
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def sample_airplane(**params):
+    defaults = {
+        "name": "name",
+        "rows": 10,
+        "seats_in_row": 9,
+    }
+    defaults.update(params)
+
+    return Airplane.objects.create(**defaults)
+
+
+def image_upload_url(airplane_id):
+    return reverse("airport:airplane-upload-image", args=[airplane_id])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class AirplaneImageStorageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+
+    def upload(self, airplane, color="red", size=(10, 10)):
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            img = Image.new("RGB", size, color=color)
+            img.save(ntf, format="JPEG")
+            ntf.seek(0)
+            return self.client.post(
+                image_upload_url(airplane.id),
+                {"image": ntf},
+                format="multipart"
+            )
+
+    def test_same_image_is_stored_once(self):
+        airplane1 = sample_airplane(name="first")
+        airplane2 = sample_airplane(name="second")
+
+        self.upload(airplane1)
+        self.upload(airplane2)
+        airplane1.refresh_from_db()
+        airplane2.refresh_from_db()
+
+        self.assertEqual(airplane1.image.name, airplane2.image.name)
+        self.assertTrue(os.path.exists(airplane1.image.path))
+        self.assertEqual(Airplane.image_reference_count(airplane1.image.name), 2)
+
+    @override_settings(AIRPLANE_IMAGE_GRACE_SECONDS=0)
+    def test_replaced_image_is_released_when_unreferenced(self):
+        airplane1 = sample_airplane(name="first")
+        airplane2 = sample_airplane(name="second")
+        self.upload(airplane1)
+        self.upload(airplane2)
+        airplane1.refresh_from_db()
+        shared_path = airplane1.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(airplane1, color="blue")
+        self.assertTrue(os.path.exists(shared_path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(airplane2, color="blue")
+        self.assertFalse(os.path.exists(shared_path))
+
+    @override_settings(AIRPLANE_IMAGE_GRACE_SECONDS=0)
+    def test_deleted_airplane_releases_image(self):
+        airplane = sample_airplane()
+        self.upload(airplane)
+        airplane.refresh_from_db()
+        path = airplane.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            airplane.delete()
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_recent_image_left_to_gc(self):
+        airplane = sample_airplane()
+        self.upload(airplane)
+        airplane.refresh_from_db()
+        path = airplane.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            airplane.delete()
+
+        self.assertTrue(os.path.exists(path))
+
+    @override_settings(AIRPLANE_IMAGE_GRACE_SECONDS=0)
+    def test_release_follows_transaction_outcome(self):
+        airplane = sample_airplane()
+        self.upload(airplane)
+        airplane.refresh_from_db()
+        path = airplane.image.path
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Airplane.objects.get(pk=airplane.pk).delete()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(
+            Airplane.image_reference_count(airplane.image.name), 1
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                airplane.delete()
+
+        self.assertFalse(os.path.exists(path))
+
+    @override_settings(AIRPLANE_IMAGE_MAX_DIMENSION=20)
+    def test_upload_too_large_dimensions(self):
+        airplane = sample_airplane()
+
+        res = self.upload(airplane, size=(30, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(AIRPLANE_IMAGE_MAX_SIZE=10)
+    def test_upload_too_large_file(self):
+        airplane = sample_airplane()
+
+        res = self.upload(airplane)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_gc_removes_unreferenced_files(self):
+        airplane = sample_airplane()
+        self.upload(airplane)
+        airplane.refresh_from_db()
+        path = airplane.image.path
+        Airplane.objects.filter(id=airplane.id).update(image=None)
+
+        call_command("gc_airplane_images", grace_seconds=0, stdout=open(os.devnull, "w"))
+
+        self.assertFalse(os.path.exists(path))
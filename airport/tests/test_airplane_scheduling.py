@@ -0,0 +1,155 @@
+import datetime
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, Airport, Flight, Route
+from airport.scheduling import airplane_import_conflicts
+
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+def at(hour):
+    return datetime.datetime(2022, 6, 2, hour, tzinfo=datetime.timezone.utc)
+
+
+class AirplaneConflictTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@myproject.com", "password", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.route = Route.objects.create(
+            source=Airport.objects.create(name="source"),
+            destination=Airport.objects.create(name="destination"),
+        )
+        self.airplane = Airplane.objects.create(
+            name="airplane", rows=10, seats_in_row=9
+        )
+        self.flight = self.sample_flight(10, 14)
+
+    def sample_flight(self, departure, arrival):
+        return Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=at(departure),
+            arrival_time=at(arrival),
+        )
+
+    def payload(self, departure, arrival):
+        return {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "departure_time": at(departure).isoformat(),
+            "arrival_time": at(arrival).isoformat(),
+        }
+
+    def test_overlapping_flight_rejected(self):
+        res = self.client.post(FLIGHT_URL, self.payload(13, 15))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(self.flight.id), res.data["airplane"][0])
+
+    def test_back_to_back_flight_allowed(self):
+        res = self.client.post(FLIGHT_URL, self.payload(14, 16))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_update_does_not_conflict_with_itself(self):
+        url = reverse("airport:flight-detail", args=[self.flight.id])
+
+        res = self.client.put(url, self.payload(11, 15))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_import_conflicts_among_new_and_stored_flights(self):
+        flights = [
+            Flight(
+                airplane_id=self.airplane.id,
+                departure_time=at(departure),
+                arrival_time=at(arrival),
+            )
+            for departure, arrival in ((6, 9), (8, 10), (13, 16))
+        ]
+
+        self.assertEqual(
+            sorted(airplane_import_conflicts(flights), key=str),
+            sorted(
+                [
+                    (self.airplane.id, 0, 1),
+                    (self.airplane.id, 1, 0),
+                    (self.airplane.id, 2, ("stored", self.flight.id)),
+                ],
+                key=str,
+            ),
+        )
+
+    def test_audit_command(self):
+        call_command("audit_airplane_conflicts", stdout=StringIO())
+
+        other = self.sample_flight(12, 16)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("audit_airplane_conflicts", stdout=out)
+        self.assertIn(
+            f"flight {self.flight.id} overlaps flight {other.id}",
+            out.getvalue(),
+        )
+
+    def test_audit_command_checks_import_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as file:
+            json.dump([self.payload(15, 17), self.payload(16, 18)], file)
+            file.flush()
+            out = StringIO()
+
+            with self.assertRaises(CommandError):
+                call_command(
+                    "audit_airplane_conflicts",
+                    import_file=file.name,
+                    stdout=out,
+                )
+
+        self.assertIn("entry 1 overlaps entry 0", out.getvalue())
+
+    def audit_import(self, entries):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as file:
+            json.dump(entries, file)
+            file.flush()
+            out = StringIO()
+            call_command(
+                "audit_airplane_conflicts", import_file=file.name, stdout=out
+            )
+        return out.getvalue()
+
+    def test_audit_import_takes_naive_times_as_local(self):
+        entry = {
+            "airplane": self.airplane.id,
+            "departure_time": "2022-06-02T12:00",
+            "arrival_time": "2022-06-02T13:00",
+        }
+
+        with self.assertRaisesMessage(CommandError, "1 airplane conflict"):
+            self.audit_import([entry])
+
+        entry["departure_time"] = "2022-06-02T15:00"
+        entry["arrival_time"] = "2022-06-02T16:00"
+        self.assertIn("No airplane conflicts", self.audit_import([entry]))
+
+    def test_audit_import_names_invalid_entry(self):
+        valid = self.payload(15, 17)
+        for entry, message in (
+            ({**valid, "departure_time": "tomorrow"}, "an invalid departure"),
+            ({"airplane": self.airplane.id}, "no departure_time"),
+        ):
+            with self.assertRaisesMessage(
+                CommandError, f"Entry 1 has {message}"
+            ):
+                self.audit_import([valid, entry])
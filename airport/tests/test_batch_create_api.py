@@ -0,0 +1,147 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, Airport, Crew, Flight, Route
+
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+def at(day, hour):
+    return datetime.datetime(
+        2022, 6, day, hour, tzinfo=datetime.timezone.utc
+    ).isoformat()
+
+
+class BatchCreateApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@myproject.com", "password", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_single_object_still_accepted(self):
+        res = self.client.post(AIRPORT_URL, {"name": "Boryspil"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["name"], "Boryspil")
+
+    def test_create_airports_in_batch(self):
+        payload = [{"name": f"airport_{number}"} for number in range(20)]
+
+        # Throttle bucket, savepoint, insert and savepoint release.
+        with self.assertNumQueries(4):
+            res = self.client.post(AIRPORT_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 20)
+        self.assertEqual(Airport.objects.count(), 20)
+
+    def test_related_objects_resolved_in_one_query(self):
+        airports = [
+            Airport.objects.create(name=f"airport_{number}")
+            for number in range(10)
+        ]
+        payload = [
+            {"source": source.id, "destination": destination.id}
+            for source in airports
+            for destination in airports
+            if source != destination
+        ]
+
+        # One more query than for airports, loading both endpoints.
+        with self.assertNumQueries(5):
+            res = self.client.post(ROUTE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Route.objects.count(), 90)
+
+    def test_errors_reported_per_item(self):
+        airport = Airport.objects.create(name="airport")
+        payload = [
+            {"source": airport.id, "destination": airport.id},
+            {"source": airport.id, "destination": 999},
+            {"source": "abc", "destination": airport.id},
+        ]
+
+        res = self.client.post(ROUTE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn("destination", res.data[1])
+        self.assertIn("source", res.data[2])
+        self.assertFalse(Route.objects.exists())
+
+    @override_settings(AIRPORT_MAX_BATCH_SIZE=2)
+    def test_batch_size_limited(self):
+        payload = [{"name": f"airport_{number}"} for number in range(3)]
+
+        res = self.client.post(AIRPORT_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Airport.objects.exists())
+
+    def test_create_flights_with_crew_in_batch(self):
+        route = Route.objects.create(
+            source=Airport.objects.create(name="source"),
+            destination=Airport.objects.create(name="destination"),
+        )
+        airplane = Airplane.objects.create(
+            name="airplane", rows=10, seats_in_row=9
+        )
+        crew = [
+            Crew.objects.create(first_name=f"first_{number}", last_name="x")
+            for number in range(2)
+        ]
+        payload = [
+            {
+                "route": route.id,
+                "airplane": airplane.id,
+                "departure_time": at(day, 8),
+                "arrival_time": at(day, 10),
+                "crew": [member.id for member in crew],
+            }
+            for day in range(1, 11)
+        ]
+
+        res = self.client.post(FLIGHT_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Flight.objects.count(), 10)
+        self.assertEqual(Flight.crew.through.objects.count(), 20)
+        self.assertEqual(
+            res.data[0]["crew"], [member.id for member in crew]
+        )
+
+    def test_flight_conflicts_reported_per_item(self):
+        route = Route.objects.create(
+            source=Airport.objects.create(name="source"),
+            destination=Airport.objects.create(name="destination"),
+        )
+        airplane = Airplane.objects.create(
+            name="airplane", rows=10, seats_in_row=9
+        )
+        payload = [
+            {
+                "route": route.id,
+                "airplane": airplane.id,
+                "departure_time": at(1, hour),
+                "arrival_time": at(1, hour + 2),
+            }
+            for hour in (8, 9, 12)
+        ]
+
+        res = self.client.post(FLIGHT_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("airplane", res.data[0])
+        self.assertIn("airplane", res.data[1])
+        self.assertEqual(res.data[2], {})
+        self.assertFalse(Flight.objects.exists())
@@ -0,0 +1,109 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import bootstrap
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Route,
+)
+
+BOOTSTRAP_URL = reverse("airport:bootstrap")
+
+
+class BootstrapApiTests(TestCase):
+    def setUp(self):
+        bootstrap.clear_cache()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.airplane_type = AirplaneType.objects.create(name="Boeing")
+        Airplane.objects.create(
+            name="airplane",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=self.airplane_type,
+        )
+        self.route = Route.objects.create(
+            source=Airport.objects.create(name="Kyiv"),
+            destination=Airport.objects.create(name="Lviv"),
+        )
+        Crew.objects.create(first_name="first", last_name="last")
+
+    def tearDown(self):
+        bootstrap.clear_cache()
+
+    def test_auth_required(self):
+        self.client.force_authenticate(None)
+
+        res = self.client.get(BOOTSTRAP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bundles_reference_data(self):
+        res = self.client.get(BOOTSTRAP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = json.loads(res.content)
+        self.assertEqual(
+            set(data),
+            {"airplane_types", "airports", "routes", "crew", "airplanes"},
+        )
+        self.assertEqual(data["airplane_types"][0]["name"], "Boeing")
+        self.assertEqual(data["routes"][0]["source"], "Kyiv")
+        self.assertEqual(len(data["airports"]), 2)
+        self.assertEqual(len(data["airplanes"]), 1)
+        self.assertEqual(len(data["crew"]), 1)
+
+    def test_gzip_served_when_accepted(self):
+        plain = self.client.get(BOOTSTRAP_URL)
+
+        res = self.client.get(BOOTSTRAP_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertEqual(res["ETag"], plain["ETag"])
+
+    def test_unchanged_data_is_not_rebuilt(self):
+        self.client.get(BOOTSTRAP_URL)
+
+        # The throttle bucket and the fingerprint.
+        with self.assertNumQueries(2):
+            self.client.get(BOOTSTRAP_URL)
+
+    def test_etag_revalidation(self):
+        etag = self.client.get(BOOTSTRAP_URL)["ETag"]
+
+        res = self.client.get(BOOTSTRAP_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    def test_changes_rebuild_payload(self):
+        etag = self.client.get(BOOTSTRAP_URL)["ETag"]
+
+        self.airplane_type.name = "Airbus"
+        self.airplane_type.save()
+        res = self.client.get(BOOTSTRAP_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        data = json.loads(res.content)
+        self.assertEqual(data["airplane_types"][0]["name"], "Airbus")
+
+        etag = res["ETag"]
+        self.route.delete()
+        res = self.client.get(BOOTSTRAP_URL)
+
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(json.loads(res.content)["routes"], [])
@@ -0,0 +1,161 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Route,
+)
+
+CHANGES_URL = reverse("airport:changes-list")
+
+
+def sample_flight(number):
+    route = Route.objects.create(
+        source=Airport.objects.create(name=f"source_{number}"),
+        destination=Airport.objects.create(name=f"destination_{number}"),
+    )
+    airplane = Airplane.objects.create(
+        name=f"airplane_{number}",
+        rows=10,
+        seats_in_row=9,
+        airplane_type=AirplaneType.objects.create(name=f"type_{number}"),
+    )
+    return Flight.objects.create(
+        route=route,
+        airplane=airplane,
+        departure_time=f"2022-06-{number + 1:02d}T14:00:00Z",
+        arrival_time=f"2022-06-{number + 1:02d}T21:00:00Z",
+    )
+
+
+def keys(changes):
+    return [(change["type"], change["id"]) for change in changes]
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangeFeedApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(0)
+
+    def test_auth_required(self):
+        self.client.force_authenticate(None)
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_feed_without_cursor_returns_every_row(self):
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(keys(res.data["changes"])),
+            sorted([
+                ("airport", self.flight.route.source_id),
+                ("airport", self.flight.route.destination_id),
+                ("airplane", self.flight.airplane_id),
+                ("route", self.flight.route_id),
+                ("flight", self.flight.id),
+            ]),
+        )
+        self.assertFalse(res.data["has_more"])
+        flight = res.data["changes"][-1]
+        self.assertEqual(flight["type"], "flight")
+        self.assertEqual(flight["data"]["route"], self.flight.route_id)
+
+    def test_since_returns_only_later_changes(self):
+        cursor = self.client.get(CHANGES_URL).data["cursor"]
+        self.flight.arrival_time = "2022-06-01T22:00:00Z"
+        self.flight.save()
+
+        res = self.client.get(CHANGES_URL, {"since": cursor})
+
+        self.assertEqual(keys(res.data["changes"]), [("flight", self.flight.id)])
+        self.assertNotEqual(res.data["cursor"], cursor)
+
+    def test_unchanged_feed_keeps_cursor(self):
+        cursor = self.client.get(CHANGES_URL).data["cursor"]
+
+        res = self.client.get(CHANGES_URL, {"since": cursor})
+
+        self.assertEqual(res.data["changes"], [])
+        self.assertEqual(res.data["cursor"], cursor)
+
+    def test_pages_cover_feed_once(self):
+        for number in range(1, 4):
+            sample_flight(number)
+        everything = keys(self.client.get(CHANGES_URL).data["changes"])
+
+        pages = []
+        cursor = None
+        while True:
+            params = {"limit": 3}
+            if cursor:
+                params["since"] = cursor
+            res = self.client.get(CHANGES_URL, params)
+            pages.extend(keys(res.data["changes"]))
+            cursor = res.data["cursor"]
+            if not res.data["has_more"]:
+                break
+
+        self.assertEqual(len(everything), 20)
+        self.assertEqual(pages, everything)
+
+    def test_delete_leaves_tombstones(self):
+        cursor = self.client.get(CHANGES_URL).data["cursor"]
+        route_id = self.flight.route_id
+        Airport.objects.get(pk=self.flight.route.source_id).delete()
+
+        res = self.client.get(CHANGES_URL, {"since": cursor})
+
+        self.assertCountEqual(
+            keys(res.data["changes"]),
+            [
+                ("airport", self.flight.route.source_id),
+                ("route", route_id),
+                ("flight", self.flight.id),
+            ],
+        )
+        self.assertTrue(all(change["deleted"] for change in res.data["changes"]))
+
+    def test_crew_change_marks_flight_changed(self):
+        cursor = self.client.get(CHANGES_URL).data["cursor"]
+        crew = Crew.objects.create(first_name="first", last_name="last")
+        crew.flight_set.add(self.flight)
+
+        res = self.client.get(CHANGES_URL, {"since": cursor})
+
+        self.assertEqual(keys(res.data["changes"]), [("flight", self.flight.id)])
+        self.assertEqual(res.data["changes"][0]["data"]["crew"], [crew.id])
+
+        cursor = res.data["cursor"]
+        crew.delete()
+
+        res = self.client.get(CHANGES_URL, {"since": cursor})
+
+        self.assertEqual(keys(res.data["changes"]), [("flight", self.flight.id)])
+        self.assertEqual(res.data["changes"][0]["data"]["crew"], [])
+
+    def test_invalid_cursor_rejected(self):
+        res = self.client.get(CHANGES_URL, {"since": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=60)
+    def test_recent_changes_held_back(self):
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.data["changes"], [])
+        self.assertIsNone(res.data["cursor"])
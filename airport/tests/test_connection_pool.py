@@ -0,0 +1,157 @@
+import threading
+import time
+from unittest import mock
+
+import psycopg2
+import psycopg2.extensions
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+
+from Aiport_API_Service.db_backends.postgresql_pool.base import (
+    connection_usable,
+)
+from Aiport_API_Service.db_backends.postgresql_pool.pool import (
+    ConnectionPool,
+)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.created = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.created.append(connection)
+        return connection
+
+    def pool(self, **kwargs):
+        return ConnectionPool(self.connect, **kwargs)
+
+    def test_invalid_sizes_rejected(self):
+        for sizes in ({"min_size": 3, "max_size": 2}, {"max_size": 0}):
+            with self.assertRaises(ValueError):
+                self.pool(**sizes)
+
+    def test_min_size_opened_and_reused(self):
+        pool = self.pool(min_size=2, max_size=3)
+
+        self.assertEqual(len(self.created), 2)
+        connection = pool.getconn()
+        pool.putconn(connection)
+
+        self.assertIs(pool.getconn(), connection)
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = self.pool(min_size=0, max_size=1, timeout=0.05)
+        pool.getconn()
+
+        with self.assertRaises(OperationalError):
+            pool.getconn()
+
+        stats = pool.stats()
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_waiting_checkout_gets_returned_connection(self):
+        pool = self.pool(min_size=0, max_size=1, timeout=5)
+        connection = pool.getconn()
+        received = []
+        waiter = threading.Thread(
+            target=lambda: received.append(pool.getconn())
+        )
+        waiter.start()
+        # Give the waiter time to block on the exhausted pool.
+        time.sleep(0.05)
+
+        pool.putconn(connection)
+        waiter.join(5)
+
+        self.assertEqual(received, [connection])
+        self.assertEqual(pool.stats()["waits"], 1)
+
+    def test_broken_connection_frees_its_slot(self):
+        pool = self.pool(min_size=0, max_size=1, timeout=0.05)
+        connection = pool.getconn()
+        connection.closed = 2
+
+        pool.putconn(connection)
+
+        self.assertEqual(pool.stats()["size"], 0)
+        self.assertIsNot(pool.getconn(), connection)
+
+    def test_discarded_connection_closed(self):
+        pool = self.pool(min_size=0, max_size=1)
+        connection = pool.getconn()
+
+        pool.putconn(connection, discard=True)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_unusable_idle_connection_replaced_on_checkout(self):
+        pool = self.pool(
+            min_size=1,
+            max_size=1,
+            check=lambda connection: connection is not self.created[0],
+        )
+        stale = self.created[0]
+
+        connection = pool.getconn()
+
+        self.assertIsNot(connection, stale)
+        self.assertTrue(stale.closed)
+        stats = pool.stats()
+        self.assertEqual(stats["replaced"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(
+            mock.Mock(side_effect=psycopg2.OperationalError),
+            min_size=0,
+            max_size=1,
+        )
+
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.getconn()
+
+        self.assertEqual(pool.stats()["size"], 0)
+
+
+class ConnectionUsableTests(SimpleTestCase):
+    def connection(self, status=psycopg2.extensions.TRANSACTION_STATUS_IDLE):
+        connection = mock.MagicMock(closed=0)
+        connection.info.transaction_status = status
+        return connection
+
+    def test_closed_or_in_transaction_not_usable(self):
+        closed = self.connection()
+        closed.closed = 1
+
+        self.assertFalse(connection_usable(closed, ping=False))
+        self.assertFalse(
+            connection_usable(
+                self.connection(
+                    psycopg2.extensions.TRANSACTION_STATUS_INERROR
+                ),
+                ping=False,
+            )
+        )
+        self.assertTrue(connection_usable(self.connection(), ping=False))
+
+    def test_ping_detects_dead_server(self):
+        connection = self.connection()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = psycopg2.OperationalError
+
+        self.assertFalse(connection_usable(connection, ping=True))
+        self.assertTrue(connection_usable(self.connection(), ping=True))
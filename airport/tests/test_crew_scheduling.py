@@ -0,0 +1,127 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, Airport, Crew, Flight, Route
+from airport.scheduling import sweep_conflicts
+
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+def at(hour):
+    return datetime.datetime(2022, 6, 2, hour, tzinfo=datetime.timezone.utc)
+
+
+class SweepConflictsTests(TestCase):
+    def test_overlapping_flights_of_same_crew(self):
+        assignments = [
+            (1, 10, at(8), at(12)),
+            (1, 11, at(9), at(10)),
+            (1, 12, at(11), at(13)),
+            (1, 13, at(13), at(14)),
+            (2, 14, at(8), at(12)),
+        ]
+
+        self.assertEqual(
+            list(sweep_conflicts(assignments)),
+            [(1, 10, 11), (1, 10, 12)],
+        )
+
+
+class CrewConflictApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@myproject.com", "password", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.route = Route.objects.create(
+            source=Airport.objects.create(name="source"),
+            destination=Airport.objects.create(name="destination"),
+        )
+        self.airplane = Airplane.objects.create(
+            name="airplane", rows=10, seats_in_row=9
+        )
+        self.crew = Crew.objects.create(first_name="Test", last_name="Crew")
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=at(10),
+            arrival_time=at(14),
+        )
+        self.flight.crew.add(self.crew)
+
+    def payload(self, departure, arrival):
+        airplane = Airplane.objects.create(
+            name="other airplane", rows=10, seats_in_row=9
+        )
+        return {
+            "route": self.route.id,
+            "airplane": airplane.id,
+            "departure_time": at(departure).isoformat(),
+            "arrival_time": at(arrival).isoformat(),
+            "crew": [self.crew.id],
+        }
+
+    def test_overlapping_flight_rejected(self):
+        res = self.client.post(FLIGHT_URL, self.payload(12, 16))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(self.flight.id), res.data["crew"][0])
+
+    def test_back_to_back_flight_allowed(self):
+        res = self.client.post(FLIGHT_URL, self.payload(14, 16))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_update_does_not_conflict_with_itself(self):
+        url = reverse("airport:flight-detail", args=[self.flight.id])
+
+        res = self.client.patch(
+            url, {"arrival_time": at(15).isoformat()}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_moving_flight_onto_crew_schedule_rejected(self):
+        other = Flight.objects.create(
+            route=self.route,
+            airplane=Airplane.objects.create(
+                name="other airplane", rows=10, seats_in_row=9
+            ),
+            departure_time=at(16),
+            arrival_time=at(18),
+        )
+        other.crew.add(self.crew)
+        url = reverse("airport:flight-detail", args=[other.id])
+
+        res = self.client.patch(
+            url, {"departure_time": at(13).isoformat()}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_audit_command_reports_conflicts(self):
+        call_command("audit_crew_conflicts", stdout=StringIO())
+
+        other = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=at(12),
+            arrival_time=at(16),
+        )
+        other.crew.add(self.crew)
+        out = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("audit_crew_conflicts", stdout=out)
+        self.assertIn(
+            f"flight {self.flight.id} overlaps flight {other.id}",
+            out.getvalue(),
+        )
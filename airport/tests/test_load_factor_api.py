@@ -0,0 +1,196 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.analytics import load_factor_rows, refresh_load_factors
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Flight,
+    LoadFactorChange,
+    Order,
+    Route,
+    RouteLoadFactor,
+    Ticket,
+)
+
+LOAD_FACTOR_URL = reverse("airport:load_factor-list")
+
+
+def sample_route(number):
+    return Route.objects.create(
+        source=Airport.objects.create(name=f"source_{number}"),
+        destination=Airport.objects.create(name=f"destination_{number}"),
+    )
+
+
+def sample_flight(route, airplane, day):
+    return Flight.objects.create(
+        route=route,
+        airplane=airplane,
+        departure_time=f"{day}T14:00:00Z",
+        arrival_time=f"{day}T21:00:00Z",
+    )
+
+
+class LoadFactorApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.airplane_type = AirplaneType.objects.create(name="Boeing")
+        self.airplane = Airplane.objects.create(
+            name="airplane",
+            rows=2,
+            seats_in_row=5,
+            airplane_type=self.airplane_type,
+        )
+        self.route = sample_route(1)
+        self.order = Order.objects.create(user=self.user)
+
+    def sell(self, flight, count):
+        for seat in range(1, count + 1):
+            Ticket.objects.create(
+                row=1, seat=seat, flight=flight, order=self.order
+            )
+
+    def test_load_factor_per_route_and_day(self):
+        first = sample_flight(self.route, self.airplane, "2022-06-02")
+        second = sample_flight(self.route, self.airplane, "2022-06-02")
+        self.sell(first, 4)
+        self.sell(second, 1)
+        refresh_load_factors()
+
+        res = self.client.get(LOAD_FACTOR_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["day"], "2022-06-02")
+        self.assertEqual(res.data[0]["route"], self.route.id)
+        self.assertEqual(res.data[0]["flights"], 2)
+        self.assertEqual(res.data[0]["seats"], 20)
+        self.assertEqual(res.data[0]["tickets_sold"], 5)
+        self.assertEqual(res.data[0]["load_factor"], 0.25)
+
+    def test_group_by_airplane_type(self):
+        sample_flight(self.route, self.airplane, "2022-06-02")
+        sample_flight(sample_route(2), self.airplane, "2022-06-02")
+        refresh_load_factors()
+
+        res = self.client.get(LOAD_FACTOR_URL, {"group_by": "airplane_type"})
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["airplane_type"], self.airplane_type.id)
+        self.assertEqual(res.data[0]["seats"], 20)
+        self.assertNotIn("route", res.data[0])
+
+    def test_filter_by_dates_and_route(self):
+        sample_flight(self.route, self.airplane, "2022-06-01")
+        sample_flight(self.route, self.airplane, "2022-06-02")
+        sample_flight(sample_route(2), self.airplane, "2022-06-02")
+        refresh_load_factors()
+
+        res = self.client.get(
+            LOAD_FACTOR_URL,
+            {
+                "date_from": "2022-06-02",
+                "date_to": "2022-06-02",
+                "route": self.route.id,
+            },
+        )
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["day"], "2022-06-02")
+
+    def test_invalid_filters_rejected(self):
+        for params in (
+            {"date_from": "bad"},
+            {"date_to": "2022-13-01"},
+            {"route": "x"},
+        ):
+            res = self.client.get(LOAD_FACTOR_URL, params)
+
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, params
+            )
+            self.assertIn(next(iter(params)), res.data)
+
+    def test_refresh_recomputes_changed_days_only(self):
+        first = sample_flight(self.route, self.airplane, "2022-06-02")
+        second = sample_flight(self.route, self.airplane, "2022-06-03")
+        refresh_load_factors()
+        RouteLoadFactor.objects.filter(day="2022-06-03").update(
+            tickets_sold=99
+        )
+
+        self.sell(first, 2)
+        refresh_load_factors()
+
+        sold = dict(RouteLoadFactor.objects.values_list("day", "tickets_sold"))
+        self.assertEqual([sold[day] for day in sorted(sold)], [2, 99])
+        self.assertFalse(LoadFactorChange.objects.exists())
+
+        self.sell(second, 1)
+        refresh_load_factors()
+        sold = dict(RouteLoadFactor.objects.values_list("day", "tickets_sold"))
+        self.assertEqual([sold[day] for day in sorted(sold)], [2, 1])
+
+    def test_moving_flight_refreshes_both_days(self):
+        flight = sample_flight(self.route, self.airplane, "2022-06-02")
+        self.sell(flight, 3)
+        refresh_load_factors()
+
+        flight.departure_time = "2022-06-05T14:00:00Z"
+        flight.save()
+        refresh_load_factors()
+
+        self.assertEqual(
+            [
+                (day.isoformat(), sold)
+                for day, sold in RouteLoadFactor.objects.values_list(
+                    "day", "tickets_sold"
+                )
+            ],
+            [("2022-06-05", 3)],
+        )
+
+    def test_full_rebuild_matches_naive_aggregate(self):
+        for day in ("2022-06-02", "2022-06-03"):
+            self.sell(sample_flight(self.route, self.airplane, day), 2)
+        RouteLoadFactor.objects.create(
+            day="2022-01-01", route=self.route, flights=1, seats=1,
+            tickets_sold=1,
+        )
+
+        refresh_load_factors(full=True)
+
+        self.assertEqual(
+            sorted(
+                RouteLoadFactor.objects.values_list(
+                    "day", "route", "airplane_type", "seats", "tickets_sold"
+                )
+            ),
+            sorted(
+                (
+                    row["day"],
+                    row["route"],
+                    row["airplane__airplane_type"],
+                    row["seats"],
+                    row["tickets_sold"],
+                )
+                for row in load_factor_rows(Flight.objects.all())
+            ),
+        )
+
+    def test_load_factor_forbidden_for_non_staff(self):
+        user = get_user_model().objects.create_user("user@test.com", "pass")
+        self.client.force_authenticate(user)
+
+        res = self.client.get(LOAD_FACTOR_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import spatial
+from airport.models import Airport
+
+NEAREST_URL = reverse("airport:airport-nearest")
+
+# Kyiv city centre.
+KYIV = {"latitude": 50.4501, "longitude": 30.5234}
+
+
+def names(res):
+    return [airport["name"] for airport in res.data]
+
+
+class NearestAirportApiTests(TestCase):
+    def setUp(self):
+        spatial.clear_index()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        for name, latitude, longitude in (
+            ("KBP", 50.345, 30.8947),
+            ("IEV", 50.4017, 30.4519),
+            ("LWO", 49.8125, 23.9561),
+            ("JFK", 40.6413, -73.7781),
+            ("NRT", 35.772, 140.3929),
+        ):
+            Airport.objects.create(
+                name=name, latitude=latitude, longitude=longitude
+            )
+        Airport.objects.create(name="Unknown")
+
+    def tearDown(self):
+        spatial.clear_index()
+
+    def test_nearest_airports_closest_first(self):
+        res = self.client.get(NEAREST_URL, {**KYIV, "count": 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(names(res), ["IEV", "KBP", "LWO"])
+        self.assertAlmostEqual(res.data[0]["distance"], 7.7, delta=0.5)
+
+    def test_radius_limits_results(self):
+        res = self.client.get(NEAREST_URL, {**KYIV, "radius": 50})
+
+        self.assertEqual(names(res), ["IEV", "KBP"])
+
+    def test_across_antimeridian(self):
+        res = self.client.get(
+            NEAREST_URL, {"latitude": 35, "longitude": -179, "count": 1}
+        )
+
+        self.assertEqual(names(res), ["NRT"])
+
+    def test_index_rebuilt_after_airport_change(self):
+        self.client.get(NEAREST_URL, KYIV)
+
+        Airport.objects.create(name="Centre", **KYIV)
+        res = self.client.get(NEAREST_URL, {**KYIV, "count": 1})
+
+        self.assertEqual(names(res), ["Centre"])
+        self.assertEqual(res.data[0]["distance"], 0)
+
+        Airport.objects.get(name="Centre").delete()
+        res = self.client.get(NEAREST_URL, {**KYIV, "count": 1})
+
+        self.assertEqual(names(res), ["IEV"])
+
+    def test_warm_index_does_not_query_airports(self):
+        self.client.get(NEAREST_URL, KYIV)
+
+        # Only the throttle bucket.
+        with self.assertNumQueries(1):
+            self.client.get(NEAREST_URL, KYIV)
+
+    def test_invalid_parameters_rejected(self):
+        for params in (
+            {"latitude": 50},
+            {"latitude": 91, "longitude": 0},
+            {**KYIV, "count": "many"},
+            {**KYIV, "radius": -1},
+        ):
+            res = self.client.get(NEAREST_URL, params)
+
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, params
+            )
@@ -0,0 +1,145 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.group_commit import (
+    ABANDONED,
+    BatchUnavailable,
+    OrderBatcher,
+    PendingSave,
+    save_batch,
+)
+from airport.models import Airplane, Airport, Flight, Order, Route
+from airport.serializers import OrderSerializer
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def sample_flight():
+    route = Route.objects.create(
+        source=Airport.objects.create(name="Kyiv"),
+        destination=Airport.objects.create(name="Lviv"),
+    )
+    airplane = Airplane.objects.create(
+        name="airplane", rows=10, seats_in_row=6
+    )
+    return Flight.objects.create(
+        route=route,
+        airplane=airplane,
+        departure_time="2022-06-02T14:00:00Z",
+        arrival_time="2022-06-02T21:00:00Z",
+    )
+
+
+def pending_order(flight, seat, user):
+    serializer = OrderSerializer(
+        data={"tickets": [{"row": 1, "seat": seat, "flight": flight.id}]}
+    )
+    serializer.is_valid(raise_exception=True)
+    return PendingSave(serializer, user=user)
+
+
+class SaveBatchTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.flight = sample_flight()
+
+    def test_seat_conflict_rolls_back_only_its_order(self):
+        batch = [
+            pending_order(self.flight, 1, self.user),
+            pending_order(self.flight, 1, self.user),
+            pending_order(self.flight, 2, self.user),
+        ]
+
+        save_batch(batch)
+
+        self.assertIsNone(batch[0].error)
+        self.assertIsNotNone(batch[1].error)
+        self.assertIsNone(batch[2].error)
+        self.assertEqual(
+            set(Order.objects.values_list("id", flat=True)),
+            {batch[0].serializer.instance.id, batch[2].serializer.instance.id},
+        )
+
+
+@mock.patch("airport.group_commit.pin_client_to_primary", mock.Mock())
+class OrderBatcherTests(SimpleTestCase):
+    @mock.patch("airport.group_commit.RESULT_TIMEOUT_SECONDS", 0.01)
+    def test_order_still_queued_abandoned(self):
+        batcher = OrderBatcher()
+        batcher._ensure_thread = mock.Mock()
+
+        with self.assertRaises(BatchUnavailable):
+            batcher.save(mock.Mock())
+
+        pending = batcher._queue.get_nowait()
+        self.assertEqual(pending.state, ABANDONED)
+        self.assertEqual(batcher._take([pending]), [])
+
+    @mock.patch("airport.group_commit.RESULT_TIMEOUT_SECONDS", 0.2)
+    def test_taken_order_awaited_past_timeout(self):
+        batcher = OrderBatcher()
+
+        def commit():
+            pending = batcher._queue.get()
+            batcher._take([pending])
+            time.sleep(0.5)
+            pending.serializer.instance = "order"
+            pending.done.set()
+
+        batcher._ensure_thread = lambda: threading.Thread(
+            target=commit, daemon=True
+        ).start()
+
+        self.assertEqual(batcher.save(mock.Mock()), "order")
+
+
+@override_settings(ORDER_GROUP_COMMIT=True)
+class GroupCommitApiTests(TransactionTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def tearDown(self):
+        cache.clear()
+
+    def order_seat(self, seat):
+        return self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": seat, "flight": self.flight.id}]},
+            format="json",
+        )
+
+    def test_order_committed_by_batcher(self):
+        res = self.order_seat(1)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.get().id, res.data["id"])
+        self.assertEqual(res.data["tickets"][0]["seat"], 1)
+        self.assertIn("replica_pin", res.cookies)
+
+    def test_taken_seat_rejected(self):
+        self.order_seat(1)
+
+        res = self.order_seat(1)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 1)
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airport,
+    Route,
+    Airplane,
+    Flight,
+    Order,
+    Ticket,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def sample_flight(number):
+    source = Airport.objects.create(name=f"source_{number}")
+    destination = Airport.objects.create(name=f"destination_{number}")
+    route = Route.objects.create(source=source, destination=destination)
+    airplane = Airplane.objects.create(
+        name=f"airplane_{number}", rows=10, seats_in_row=9
+    )
+    return Flight.objects.create(
+        route=route,
+        airplane=airplane,
+        departure_time="2022-06-02T14:00:00Z",
+        arrival_time="2022-06-02T21:00:00Z",
+    )
+
+
+class OrderHistoryApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_orders(self, count):
+        for number in range(count):
+            flight = sample_flight(number)
+            order = Order.objects.create(user=self.user)
+            for seat in range(1, 4):
+                Ticket.objects.create(
+                    row=1, seat=seat, flight=flight, order=order
+                )
+
+    def test_order_list_shows_route_and_availability(self):
+        self.create_orders(1)
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        flight = res.data["results"][0]["tickets"][0]["flight"]
+        self.assertEqual(flight["route"], "source_0 - destination_0")
+        self.assertEqual(flight["tickets_available"], 87)
+
+    def test_ticket_with_drifted_departure_time_keeps_flight(self):
+        self.create_orders(1)
+        Ticket.objects.update(departure_time="2022-06-03T14:00:00Z")
+
+        res = self.client.get(ORDER_URL)
+
+        flight = res.data["results"][0]["tickets"][0]["flight"]
+        self.assertEqual(flight["route"], "source_0 - destination_0")
+
+    def test_order_list_query_count_does_not_grow_with_page(self):
+        # Throttle bucket, count, orders, tickets and flights.
+        self.create_orders(1)
+        with self.assertNumQueries(5):
+            self.client.get(ORDER_URL, {"page_size": 1})
+
+        self.create_orders(9)
+        with self.assertNumQueries(5):
+            res = self.client.get(ORDER_URL, {"page_size": 10})
+
+        self.assertEqual(len(res.data["results"]), 10)
+
+    def test_sideloaded_order_list_includes_flights_once(self):
+        flight = sample_flight(0)
+        order = Order.objects.create(user=self.user)
+        for seat in range(1, 7):
+            Ticket.objects.create(row=1, seat=seat, flight=flight, order=order)
+
+        res = self.client.get(ORDER_URL, {"sideload": "true"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tickets = res.data["results"][0]["tickets"]
+        self.assertEqual(len(tickets), 6)
+        self.assertTrue(all(ticket["flight"] == flight.id for ticket in tickets))
+
+        included = res.data["included"]
+        self.assertEqual(list(included["flights"]), [flight.id])
+        self.assertEqual(included["flights"][flight.id]["route"], flight.route_id)
+        self.assertEqual(included["flights"][flight.id]["tickets_available"], 84)
+        self.assertEqual(list(included["routes"]), [flight.route_id])
+        self.assertEqual(
+            set(included["airports"]),
+            {flight.route.source_id, flight.route.destination_id}
+        )
+
+    def test_sideloaded_order_list_query_count(self):
+        self.create_orders(5)
+
+        with self.assertNumQueries(5):
+            self.client.get(ORDER_URL, {"sideload": "true"})
@@ -0,0 +1,188 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import outbox
+from airport.models import Airplane, Airport, Flight, OutboxJob, Route
+
+ORDER_URL = reverse("airport:order-list")
+STATS_URL = reverse("airport:outbox-stats")
+
+calls = []
+
+
+@outbox.handler("test_flaky")
+def flaky(fail):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError("boom")
+
+
+def sample_flight():
+    route = Route.objects.create(
+        source=Airport.objects.create(name="Kyiv"),
+        destination=Airport.objects.create(name="Lviv"),
+    )
+    airplane = Airplane.objects.create(
+        name="airplane", rows=10, seats_in_row=6
+    )
+    return Flight.objects.create(
+        route=route,
+        airplane=airplane,
+        departure_time="2022-06-02T14:00:00Z",
+        arrival_time="2022-06-02T21:00:00Z",
+    )
+
+
+class OrderOutboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def tearDown(self):
+        # Placing an order pins the test client to the primary.
+        cache.clear()
+
+    @override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+        DEFAULT_FROM_EMAIL="orders@airport.test",
+    )
+    def test_order_confirmation_sent_by_worker(self):
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 2, "flight": self.flight.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        job = OutboxJob.objects.get()
+        self.assertEqual(job.kind, "order_confirmation")
+        self.assertEqual(job.payload, {"order_id": res.data["id"]})
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command("run_worker", "--once", stdout=StringIO())
+
+        self.assertFalse(OutboxJob.objects.exists())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["test@test.com"])
+        self.assertEqual(mail.outbox[0].from_email, "orders@airport.test")
+        self.assertIn("Kyiv - Lviv", mail.outbox[0].body)
+        self.assertIn("row 1, seat 2", mail.outbox[0].body)
+
+    def test_rejected_order_leaves_no_job(self):
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 99, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(OutboxJob.objects.exists())
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_BACKOFF_SECONDS=10)
+class OutboxTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_job_rolled_back_with_transaction(self):
+        try:
+            with transaction.atomic():
+                outbox.enqueue("test_flaky", fail=False)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertFalse(OutboxJob.objects.exists())
+
+    def test_unknown_kind_rejected(self):
+        with self.assertRaises(ValueError):
+            outbox.enqueue("no_such_job")
+
+    def test_claimed_job_leased(self):
+        job = outbox.enqueue("test_flaky", fail=False)
+
+        self.assertEqual(outbox.claim(10), [job])
+        self.assertEqual(outbox.claim(10), [])
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+
+    def test_future_job_not_claimed(self):
+        OutboxJob.objects.create(
+            kind="test_flaky",
+            payload={"fail": False},
+            run_at=timezone.now() + datetime.timedelta(minutes=1),
+        )
+
+        self.assertEqual(outbox.claim(10), [])
+
+    def test_failed_job_retried_with_backoff_then_kept(self):
+        job = outbox.enqueue("test_flaky", fail=True)
+
+        self.assertFalse(outbox.run_job(outbox.claim(1)[0]))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, OutboxJob.PENDING)
+        self.assertIn("boom", job.last_error)
+        self.assertGreater(
+            job.run_at, timezone.now() + datetime.timedelta(seconds=9)
+        )
+
+        OutboxJob.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        outbox.run_job(outbox.claim(1)[0])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, OutboxJob.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(calls, [True, True])
+        self.assertEqual(outbox.claim(1), [])
+
+    def test_queue_stats(self):
+        outbox.enqueue("test_flaky", fail=False)
+        OutboxJob.objects.create(
+            kind="test_flaky",
+            payload={"fail": False},
+            run_at=timezone.now() + datetime.timedelta(minutes=1),
+        )
+        OutboxJob.objects.update(
+            created_at=timezone.now() - datetime.timedelta(seconds=30)
+        )
+
+        stats = outbox.queue_stats()
+
+        self.assertEqual(stats["pending"], 2)
+        self.assertEqual(stats["due"], 1)
+        self.assertEqual(stats["failed"], 0)
+        self.assertGreaterEqual(stats["lag_seconds"], 30)
+
+    def test_stats_endpoint_for_staff_only(self):
+        client = APIClient()
+        user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        client.force_authenticate(user)
+
+        self.assertEqual(
+            client.get(STATS_URL).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+        user.is_staff = True
+        res = client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["pending"], 0)
@@ -0,0 +1,87 @@
+import marshal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import RequestProfile
+from airport.profiling import summary
+
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+
+    def get_as(self, user, **headers):
+        token = AccessToken.for_user(user)
+        return self.client.get(
+            AIRPORT_URL, HTTP_AUTHORIZATION=f"Bearer {token}", **headers
+        )
+
+    def test_staff_request_profiled_on_header(self):
+        res = self.get_as(self.staff, HTTP_X_PROFILE="1")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(res["X-Profile-Id"], profile.request_id)
+        self.assertEqual(profile.path, AIRPORT_URL)
+        self.assertEqual(profile.user, self.staff)
+        self.assertFalse(profile.sampled)
+        self.assertTrue(marshal.loads(bytes(profile.stats)))
+        self.assertIn("function calls", summary(profile))
+
+    def test_header_ignored_for_other_users(self):
+        res = self.get_as(self.user, HTTP_X_PROFILE="1")
+        self.client.get(AIRPORT_URL, HTTP_X_PROFILE="1")
+
+        self.assertNotIn("X-Profile-Id", res)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_not_profiled_without_header(self):
+        self.get_as(self.staff)
+
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_KEEP=2)
+    def test_sampled_requests_profiled_and_pruned(self):
+        for _ in range(3):
+            self.get_as(self.user)
+
+        self.assertEqual(RequestProfile.objects.count(), 2)
+        profile = RequestProfile.objects.first()
+        self.assertTrue(profile.sampled)
+        self.assertEqual(profile.user, self.user)
+
+    def test_admin_lists_and_downloads_profiles(self):
+        self.get_as(self.staff, HTTP_X_PROFILE="1")
+        profile = RequestProfile.objects.get()
+        self.staff.is_superuser = True
+        self.staff.save()
+        self.client.force_login(self.staff)
+
+        res = self.client.get(
+            reverse("admin:airport_requestprofile_changelist")
+        )
+        self.assertContains(res, f"{profile.request_id}.prof")
+
+        res = self.client.get(
+            reverse("admin:airport_requestprofile_change", args=[profile.pk])
+        )
+        self.assertContains(res, "cumulative")
+
+        res = self.client.get(
+            reverse("admin:airport_requestprofile_download", args=[profile.pk])
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, bytes(profile.stats))
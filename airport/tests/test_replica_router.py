@@ -0,0 +1,152 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import ResolverMatch
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Aiport_API_Service.db_router import (
+    PIN_COOKIE_NAME,
+    _read_alias,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    selector,
+)
+from airport.models import Flight, Order
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica_1", "replica_2"],
+    REPLICA_SELECTION="round_robin",
+)
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        selector._unavailable_until.clear()
+
+    def route(self, request, view=None):
+        used = {}
+
+        def get_response(request):
+            if view:
+                view()
+            used["alias"] = self.router.db_for_read(Flight)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return used["alias"], response
+
+    @mock.patch.object(selector, "is_available", return_value=True)
+    def test_safe_requests_rotate_over_replicas(self, _):
+        aliases = {self.route(self.factory.get("/"))[0] for _ in range(4)}
+
+        self.assertEqual(aliases, {"replica_1", "replica_2"})
+
+    @mock.patch.object(selector, "is_available", return_value=True)
+    def test_unsafe_requests_use_primary(self, _):
+        alias, _ = self.route(self.factory.post("/"))
+
+        self.assertIsNone(alias)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertIsNone(self.router.db_for_read(Flight))
+        self.assertEqual(self.router.db_for_write(Flight), "default")
+
+    @mock.patch.object(selector, "is_available", return_value=False)
+    def test_unavailable_replicas_fall_back_to_primary(self, _):
+        alias, _ = self.route(self.factory.get("/"))
+
+        self.assertIsNone(alias)
+        self.assertIn("replica_1", selector._unavailable_until)
+
+    def auth(self, user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"}
+
+    @mock.patch.object(selector, "is_available", return_value=True)
+    def test_client_is_pinned_to_primary_after_order(self, _):
+        request = self.factory.post("/")
+        request.user = self.user
+        _, response = self.route(
+            request, view=lambda: Order.objects.create(user=self.user)
+        )
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE_NAME] = response.cookies[
+            PIN_COOKIE_NAME
+        ].value
+        alias, _ = self.route(request)
+        self.assertIsNone(alias)
+
+    @mock.patch.object(selector, "is_available", return_value=True)
+    def test_pin_follows_user_not_address(self, _):
+        other = get_user_model().objects.create_user(
+            "other@test.com", "testpass"
+        )
+        request = self.factory.post("/", REMOTE_ADDR="10.0.0.1")
+        request.user = self.user
+        self.route(request, view=lambda: Order.objects.create(user=self.user))
+
+        # Neither request sends the pin cookie back.
+        alias, _ = self.route(
+            self.factory.get("/", REMOTE_ADDR="10.0.0.1", **self.auth(other))
+        )
+        self.assertIsNotNone(alias)
+
+        alias, _ = self.route(
+            self.factory.get(
+                "/", REMOTE_ADDR="10.0.0.2", **self.auth(self.user)
+            )
+        )
+        self.assertIsNone(alias)
+
+    def failing_request(self, used):
+        def view(request):
+            used.append(self.router.db_for_read(Flight))
+            return HttpResponse()
+
+        request = self.factory.get("/")
+        request.resolver_match = ResolverMatch(view, (), {})
+        return request
+
+    @mock.patch("Aiport_API_Service.db_router._replica_broken")
+    def test_failed_replica_request_retried_on_primary(self, broken):
+        broken.return_value = True
+        used = []
+        request = self.failing_request(used)
+        middleware = ReplicaRoutingMiddleware(lambda request: None)
+        token = _read_alias.set("replica_1")
+        try:
+            with mock.patch("Aiport_API_Service.db_router.connections"):
+                response = middleware.process_exception(
+                    request, OperationalError("replica went away")
+                )
+        finally:
+            _read_alias.reset(token)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(used, [None])
+        self.assertIn("replica_1", selector._unavailable_until)
+
+    @mock.patch(
+        "Aiport_API_Service.db_router._replica_broken", return_value=False
+    )
+    def test_other_errors_not_retried(self, _):
+        used = []
+        middleware = ReplicaRoutingMiddleware(lambda request: None)
+        token = _read_alias.set("replica_1")
+        try:
+            response = middleware.process_exception(
+                self.failing_request(used), OperationalError("primary")
+            )
+        finally:
+            _read_alias.reset(token)
+
+        self.assertIsNone(response)
+        self.assertEqual(used, [])
@@ -0,0 +1,184 @@
+import gzip
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.compression import accepted_encodings, brotli
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+def sample_flight(number):
+    route = Route.objects.create(
+        source=Airport.objects.create(name=f"source_{number}"),
+        destination=Airport.objects.create(name=f"destination_{number}"),
+    )
+    airplane = Airplane.objects.create(
+        name=f"airplane_{number}",
+        rows=10,
+        seats_in_row=9,
+        airplane_type=AirplaneType.objects.create(name=f"type_{number}"),
+    )
+    return Flight.objects.create(
+        route=route,
+        airplane=airplane,
+        departure_time=f"2022-06-{number + 1:02d}T14:00:00Z",
+        arrival_time=f"2022-06-{number + 1:02d}T21:00:00Z",
+    )
+
+
+class AcceptedEncodingsTests(SimpleTestCase):
+    def test_quality_zero_refuses_coding(self):
+        self.assertEqual(
+            accepted_encodings("gzip;q=0.5, br;q=0, identity"),
+            {"gzip", "identity"},
+        )
+
+    def test_wildcard_accepts_every_coding(self):
+        self.assertEqual(accepted_encodings("*"), {"*", "br", "gzip"})
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=0)
+class ResponseCacheApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.flights = [sample_flight(number) for number in range(3)]
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_repeated_list_served_from_cache(self):
+        first = self.client.get(FLIGHT_URL)
+
+        # Only the throttle bucket.
+        with self.assertNumQueries(1):
+            res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, first.content)
+        self.assertEqual(res["ETag"], first["ETag"])
+
+    def test_query_string_is_part_of_key(self):
+        self.client.get(FLIGHT_URL)
+
+        res = self.client.get(FLIGHT_URL, {"route": self.flights[0].route_id})
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_gzip_served_without_recompressing(self):
+        plain = self.client.get(FLIGHT_URL)
+
+        res = self.client.get(FLIGHT_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_preferred(self):
+        plain = self.client.get(FLIGHT_URL)
+
+        res = self.client.get(FLIGHT_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(res["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(res.content), plain.content)
+
+    @override_settings(RESPONSE_COMPRESSION_MIN_SIZE=10 ** 6)
+    def test_small_body_not_compressed(self):
+        res = self.client.get(FLIGHT_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertFalse(res.has_header("Content-Encoding"))
+        self.assertEqual(len(res.data), 3)
+
+    def test_booking_invalidates_flight_list(self):
+        self.client.get(FLIGHT_URL)
+
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flights[0].id}]},
+            format="json",
+        )
+        res = self.client.get(FLIGHT_URL)
+
+        available = {
+            flight["id"]: flight["tickets_available"] for flight in res.data
+        }
+        self.assertEqual(available[self.flights[0].id], 89)
+
+    def test_order_list_cached_per_user(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, flight=self.flights[0], order=order
+        )
+        self.client.get(ORDER_URL)
+
+        other = get_user_model().objects.create_user(
+            "other@test.com", "testpass"
+        )
+        self.client.force_authenticate(other)
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.data["results"], [])
+
+    def test_booking_retires_only_own_order_list(self):
+        other = get_user_model().objects.create_user(
+            "other@test.com", "testpass"
+        )
+        Order.objects.create(user=other)
+        self.client.force_authenticate(other)
+        self.client.get(ORDER_URL)
+        self.client.force_authenticate(self.user)
+        self.client.get(ORDER_URL)
+
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flights[0].id}]},
+            format="json",
+        )
+        res = self.client.get(ORDER_URL)
+        self.assertEqual(len(res.data["results"]), 1)
+
+        self.client.force_authenticate(other)
+        # Only the throttle bucket.
+        with self.assertNumQueries(1):
+            self.client.get(ORDER_URL)
+
+    def test_flight_change_retires_order_lists(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, flight=self.flights[0], order=order
+        )
+        self.client.get(ORDER_URL)
+
+        self.flights[0].airplane.name = "renamed"
+        self.flights[0].airplane.save()
+        res = self.client.get(ORDER_URL)
+
+        flight = res.data["results"][0]["tickets"][0]["flight"]
+        self.assertEqual(flight["airplane_name"], "renamed")
+
+    @override_settings(RESPONSE_CACHE_SECONDS=0)
+    def test_cache_can_be_disabled(self):
+        self.client.get(FLIGHT_URL)
+
+        with self.assertNumQueries(4):
+            self.client.get(FLIGHT_URL)
@@ -0,0 +1,148 @@
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.geo import haversine_km, route_distances
+from airport.models import Airport, Route
+
+ROUTE_URL = reverse("airport:route-list")
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+def sample_airports():
+    return (
+        Airport.objects.create(name="JFK", latitude=40.6413, longitude=-73.7781),
+        Airport.objects.create(name="LAX", latitude=33.9416, longitude=-118.4085),
+        Airport.objects.create(name="KBP", latitude=50.345, longitude=30.8947),
+    )
+
+
+class HaversineTests(SimpleTestCase):
+    def test_known_distance(self):
+        self.assertAlmostEqual(
+            haversine_km(40.6413, -73.7781, 33.9416, -118.4085), 3974, delta=5
+        )
+
+    def test_antipodes(self):
+        self.assertAlmostEqual(
+            haversine_km(0, 0, 0, 180), np.pi * 6371.0088, places=3
+        )
+
+    def test_vectorized_matches_scalar(self):
+        rows = [
+            (1, 40.6413, -73.7781, 33.9416, -118.4085),
+            (2, 50.345, 30.8947, 40.6413, -73.7781),
+            (3, None, None, 40.6413, -73.7781),
+        ]
+
+        ids, distances = route_distances(rows)
+
+        self.assertEqual(ids.tolist(), [1, 2])
+        self.assertEqual(
+            distances.tolist(),
+            [
+                round(float(haversine_km(*row[1:])))
+                for row in rows[:2]
+            ],
+        )
+
+
+class RouteDistanceApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.jfk, self.lax, self.kbp = sample_airports()
+
+    def test_distance_computed_when_omitted(self):
+        res = self.client.post(
+            ROUTE_URL, {"source": self.jfk.id, "destination": self.lax.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertAlmostEqual(res.data["distance"], 3974, delta=5)
+
+    def test_given_distance_kept(self):
+        res = self.client.post(
+            ROUTE_URL,
+            {
+                "source": self.jfk.id,
+                "destination": self.lax.id,
+                "distance": 4000,
+            },
+        )
+
+        self.assertEqual(res.data["distance"], 4000)
+
+    def test_no_distance_without_coordinates(self):
+        airport = Airport.objects.create(name="Unknown")
+
+        res = self.client.post(
+            ROUTE_URL, {"source": self.jfk.id, "destination": airport.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(res.data["distance"])
+
+    def test_batch_create_computes_distances(self):
+        res = self.client.post(
+            ROUTE_URL,
+            [
+                {"source": self.jfk.id, "destination": self.lax.id},
+                {"source": self.kbp.id, "destination": self.jfk.id},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(all(route["distance"] for route in res.data))
+
+    def test_airport_coordinates_given_together(self):
+        res = self.client.post(AIRPORT_URL, {"name": "Half", "latitude": 10})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ComputeRouteDistancesCommandTests(TestCase):
+    def setUp(self):
+        self.jfk, self.lax, self.kbp = sample_airports()
+        self.missing = Route.objects.create(
+            source=self.jfk, destination=self.lax
+        )
+        self.typed = Route.objects.create(
+            source=self.kbp, destination=self.jfk, distance=100
+        )
+
+    def test_fills_missing_distances(self):
+        call_command("compute_route_distances", stdout=StringIO())
+
+        self.missing.refresh_from_db()
+        self.typed.refresh_from_db()
+        self.assertAlmostEqual(self.missing.distance, 3974, delta=5)
+        self.assertEqual(self.typed.distance, 100)
+
+    def test_overwrite_recomputes_every_route(self):
+        call_command(
+            "compute_route_distances", "--overwrite", stdout=StringIO()
+        )
+
+        self.typed.refresh_from_db()
+        self.assertGreater(self.typed.distance, 7000)
+
+    def test_validate_reports_without_writing(self):
+        out = StringIO()
+
+        call_command("compute_route_distances", "--validate", stdout=out)
+
+        self.assertIn(f"Route {self.typed.id}: distance 100 km", out.getvalue())
+        self.assertIn("1 of 1 route distance(s) differ", out.getvalue())
+        self.missing.refresh_from_db()
+        self.assertIsNone(self.missing.distance)
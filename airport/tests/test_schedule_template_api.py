@@ -0,0 +1,167 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    Airport,
+    Crew,
+    Flight,
+    Route,
+    ScheduleTemplate,
+)
+
+SCHEDULE_TEMPLATE_URL = reverse("airport:scheduletemplate-list")
+
+
+def expand_url(template_id):
+    return reverse("airport:scheduletemplate-expand", args=[template_id])
+
+
+class ScheduleTemplateApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@myproject.com", "password", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.route = Route.objects.create(
+            source=Airport.objects.create(name="source"),
+            destination=Airport.objects.create(name="destination"),
+        )
+        self.airplane = Airplane.objects.create(
+            name="airplane", rows=10, seats_in_row=9
+        )
+        self.crew = Crew.objects.create(first_name="Test", last_name="Crew")
+
+    def sample_template(self, **params):
+        defaults = {
+            "route": self.route,
+            "airplane": self.airplane,
+            # Tuesdays and Thursdays.
+            "weekdays": "24",
+            "departure_time": datetime.time(22, 0),
+            "arrival_time": datetime.time(1, 30),
+            "arrival_day_offset": 1,
+            "time_zone": "Europe/Kyiv",
+            "valid_from": datetime.date(2024, 3, 1),
+            "valid_until": datetime.date(2024, 3, 31),
+        }
+        defaults.update(params)
+        template = ScheduleTemplate.objects.create(**defaults)
+        template.crew.add(self.crew)
+        return template
+
+    def test_create_template(self):
+        payload = {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "weekdays": "135",
+            "departure_time": "08:00",
+            "arrival_time": "10:00",
+            "valid_from": "2024-03-01",
+            "valid_until": "2024-03-31",
+            "crew": [self.crew.id],
+        }
+
+        res = self.client.post(SCHEDULE_TEMPLATE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["time_zone"], "UTC")
+
+    def test_create_template_rejects_invalid_pattern(self):
+        payload = {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "weekdays": "8",
+            "departure_time": "10:00",
+            "arrival_time": "08:00",
+            "time_zone": "Mars/Olympus",
+            "valid_from": "2024-03-01",
+            "valid_until": "2024-03-31",
+        }
+
+        res = self.client.post(SCHEDULE_TEMPLATE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("weekdays", res.data)
+        self.assertIn("time_zone", res.data)
+
+    def test_expand_creates_flights_with_crew(self):
+        template = self.sample_template()
+
+        res = self.client.post(expand_url(template.id))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 8)
+        flights = Flight.objects.filter(schedule_template=template)
+        self.assertEqual(flights.count(), 8)
+        self.assertEqual(
+            Flight.crew.through.objects.filter(
+                flight__schedule_template=template, crew=self.crew
+            ).count(),
+            8,
+        )
+        self.assertTrue(
+            all(
+                flight.departure_time.astimezone(
+                    datetime.timezone.utc
+                ).isoweekday() in (2, 4)
+                for flight in flights
+            )
+        )
+
+    def test_expand_follows_local_time_across_dst(self):
+        template = self.sample_template(valid_until=datetime.date(2024, 4, 5))
+
+        self.client.post(expand_url(template.id))
+
+        departures = list(
+            Flight.objects.filter(schedule_template=template)
+            .order_by("departure_time")
+            .values_list("departure_time", flat=True)
+        )
+        # 22:00 in Kyiv is 20:00 UTC in winter and 19:00 UTC in summer.
+        self.assertEqual(departures[0].hour, 20)
+        self.assertEqual(departures[-1].hour, 19)
+
+    def test_expand_is_idempotent(self):
+        template = self.sample_template()
+        self.client.post(expand_url(template.id))
+        Flight.objects.filter(schedule_template=template).order_by(
+            "departure_time"
+        ).first().delete()
+
+        res = self.client.post(expand_url(template.id))
+
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(
+            Flight.objects.filter(schedule_template=template).count(), 8
+        )
+
+    def test_expand_rejects_double_booking(self):
+        first = self.sample_template()
+        self.client.post(expand_url(first.id))
+        second = self.sample_template(weekdays="4")
+
+        res = self.client.post(expand_url(second.id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("airplane", res.data)
+        self.assertIn("crew", res.data)
+        self.assertFalse(
+            Flight.objects.filter(schedule_template=second).exists()
+        )
+
+    def test_expand_forbidden_for_non_staff(self):
+        template = self.sample_template()
+        user = get_user_model().objects.create_user("user@test.com", "pass")
+        self.client.force_authenticate(user)
+
+        res = self.client.post(expand_url(template.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Airplane, Airport, Flight, Order, Route, Ticket
+from airport.seat_events import broker
+
+
+def events_url(flight_id):
+    return reverse("airport:flight-seat-events", args=[flight_id])
+
+
+def parse(message):
+    if isinstance(message, bytes):
+        message = message.decode()
+    lines = dict(
+        line.split(": ", 1) for line in message.strip().splitlines()
+    )
+    return lines["event"], json.loads(lines["data"])
+
+
+class SeatEventBrokerTests(TestCase):
+    async def test_publish_from_other_thread_reaches_watchers(self):
+        first = broker.subscribe(1)
+        second = broker.subscribe(1)
+        other_flight = broker.subscribe(2)
+        try:
+            thread = threading.Thread(
+                target=broker.publish,
+                args=(1, "seat-taken", {"row": 1, "seat": 2}),
+            )
+            thread.start()
+            thread.join()
+
+            for queue in (first, second):
+                message = await asyncio.wait_for(queue.get(), timeout=1)
+                self.assertEqual(
+                    parse(message), ("seat-taken", {"row": 1, "seat": 2})
+                )
+            self.assertTrue(other_flight.empty())
+        finally:
+            for flight_id, queue in (
+                (1, first), (1, second), (2, other_flight)
+            ):
+                broker.unsubscribe(flight_id, queue)
+        self.assertEqual(broker.watchers(1), 0)
+
+    async def test_slow_watcher_gets_resync(self):
+        queue = broker.subscribe(1)
+        try:
+            for seat in range(queue.maxsize + 1):
+                broker.publish(1, "seat-taken", {"row": 1, "seat": seat})
+            await asyncio.sleep(0)
+
+            self.assertEqual(queue.qsize(), 1)
+            self.assertEqual(parse(queue.get_nowait())[0], "resync")
+        finally:
+            broker.unsubscribe(1, queue)
+
+
+class SeatEventStreamTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.flight = Flight.objects.create(
+            route=Route.objects.create(
+                source=Airport.objects.create(name="source"),
+                destination=Airport.objects.create(name="destination"),
+            ),
+            airplane=Airplane.objects.create(
+                name="airplane", rows=3, seats_in_row=4
+            ),
+            departure_time="2022-06-02T14:00:00Z",
+            arrival_time="2022-06-02T21:00:00Z",
+        )
+        self.order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, flight=self.flight, order=self.order
+        )
+
+    async def test_snapshot_then_deltas(self):
+        res = await self.async_client.get(
+            events_url(self.flight.id), {"token": self.token}
+        )
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        stream = res.streaming_content
+
+        self.assertEqual(await anext(stream), b"retry: 1000\n\n")
+        event, data = parse(await anext(stream))
+        self.assertEqual(event, "snapshot")
+        self.assertEqual(data["taken"], [{"row": 1, "seat": 1}])
+
+        def book_seat():
+            with self.captureOnCommitCallbacks(execute=True):
+                Ticket.objects.create(
+                    row=2, seat=3, flight=self.flight, order=self.order
+                )
+
+        await sync_to_async(book_seat)()
+
+        self.assertEqual(
+            parse(await asyncio.wait_for(anext(stream), timeout=1)),
+            ("seat-taken", {"row": 2, "seat": 3}),
+        )
+
+    async def test_stream_ends_and_unsubscribes(self):
+        with mock.patch("airport.seat_events.MAX_STREAM_SECONDS", 0.1):
+            res = await self.async_client.get(
+                events_url(self.flight.id), {"token": self.token}
+            )
+            messages = [message async for message in res.streaming_content]
+
+        self.assertEqual(len(messages), 3)
+        self.assertEqual(broker.watchers(self.flight.id), 0)
+
+    async def test_requires_authentication(self):
+        res = await self.async_client.get(events_url(self.flight.id))
+
+        self.assertEqual(res.status_code, 401)
+
+    async def test_unknown_flight(self):
+        res = await self.async_client.get(
+            events_url(999), headers={"authorization": f"Bearer {self.token}"}
+        )
+
+        self.assertEqual(res.status_code, 404)
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, Airport, Flight, Order, Route, Ticket
+from airport.seating import SeatMap, suggest_seats
+
+
+def suggestion_url(flight_id):
+    return reverse("airport:flight-seat-suggestion", args=[flight_id])
+
+
+class SeatMapTests(TestCase):
+    def test_smallest_fitting_run_preferred(self):
+        # Row 1: seats 1-6 free; row 2: seats 3-6 free.
+        seat_map = SeatMap(2, 6, [(2, 1), (2, 2)])
+
+        seats, contiguous = suggest_seats(seat_map, 4)
+
+        self.assertTrue(contiguous)
+        self.assertEqual(seats, [(2, 3), (2, 4), (2, 5), (2, 6)])
+
+    def test_falls_back_to_nearby_rows(self):
+        taken = [(1, 1), (1, 4), (2, 1), (2, 4), (3, 1), (3, 4)]
+        seat_map = SeatMap(3, 4, taken)
+
+        seats, contiguous = suggest_seats(seat_map, 3)
+
+        self.assertFalse(contiguous)
+        self.assertEqual(seats, [(1, 2), (1, 3), (2, 2)])
+
+    def test_full_flight(self):
+        seat_map = SeatMap(1, 2, [(1, 1), (1, 2)])
+
+        self.assertEqual(suggest_seats(seat_map, 1), ([], False))
+
+    def test_group_larger_than_free_seats(self):
+        seat_map = SeatMap(30, 6, [(1, 1)])
+
+        self.assertEqual(suggest_seats(seat_map, 180), ([], False))
+        self.assertEqual(suggest_seats(seat_map, 10 ** 9), ([], False))
+
+
+class SeatSuggestionApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = Flight.objects.create(
+            route=Route.objects.create(
+                source=Airport.objects.create(name="source"),
+                destination=Airport.objects.create(name="destination"),
+            ),
+            airplane=Airplane.objects.create(
+                name="airplane", rows=3, seats_in_row=4
+            ),
+            departure_time="2022-06-02T14:00:00Z",
+            arrival_time="2022-06-02T21:00:00Z",
+        )
+        order = Order.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(
+                row=1, seat=seat, flight=self.flight, order=order
+            )
+
+    def test_suggests_block_around_taken_seats(self):
+        # Throttle bucket, flight with airplane and taken seats.
+        with self.assertNumQueries(3):
+            res = self.client.get(
+                suggestion_url(self.flight.id), {"size": 2}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["contiguous"])
+        self.assertEqual(
+            res.data["seats"], [{"row": 1, "seat": 3}, {"row": 1, "seat": 4}]
+        )
+
+    def test_invalid_size(self):
+        res = self.client.get(suggestion_url(self.flight.id), {"size": "x"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_not_enough_seats(self):
+        res = self.client.get(suggestion_url(self.flight.id), {"size": 11})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_size_above_capacity_rejected_before_loading_seats(self):
+        # Throttle bucket and flight with airplane only.
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                suggestion_url(self.flight.id), {"size": 10 ** 9}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["size"], "The airplane has only 12 seats."
+        )
+
+    def test_unknown_flight(self):
+        res = self.client.get(suggestion_url(999), {"size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,136 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.models import Airport, OutboxJob, SlowQuery
+from airport.slow_queries import explain, normalize
+
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+class NormalizeTests(SimpleTestCase):
+    def test_literals_and_in_lists_replaced(self):
+        self.assertEqual(
+            normalize(
+                "SELECT *  FROM airport_airport\n"
+                "WHERE id IN (%s, %s, %s) AND name = 'Kyiv' LIMIT 21"
+            ),
+            "SELECT * FROM airport_airport "
+            "WHERE id IN (...) AND name = %s LIMIT %s",
+        )
+
+
+class ExplainTests(SimpleTestCase):
+    @mock.patch("airport.slow_queries.connections")
+    @mock.patch("airport.slow_queries._rolled_back")
+    def test_plain_explain_when_not_read_only(self, rolled_back, connections):
+        connections.__getitem__.return_value.vendor = "postgresql"
+        rolled_back.side_effect = [
+            DatabaseError("cannot execute nextval() in a read-only "
+                          "transaction"),
+            [("Result  (cost=0.00..0.01 rows=1 width=8)",)],
+        ]
+
+        plan = explain("default", "SELECT nextval('seq')", ())
+
+        self.assertEqual(plan, "Result  (cost=0.00..0.01 rows=1 width=8)")
+        self.assertEqual(
+            [call.args[1] for call in rolled_back.call_args_list],
+            [
+                "EXPLAIN (ANALYZE, BUFFERS) SELECT nextval('seq')",
+                "EXPLAIN SELECT nextval('seq')",
+            ],
+        )
+
+    def test_writes_not_explained(self):
+        self.assertEqual(
+            explain("default", "UPDATE airport_airport SET name = %s", ()),
+            "",
+        )
+
+
+@override_settings(SLOW_QUERY_MS=0.000001, SLOW_QUERY_EXPLAIN_SECONDS=60)
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        Airport.objects.create(name="Kyiv")
+
+    def tearDown(self):
+        cache.clear()
+
+    def airport_query(self):
+        return SlowQuery.objects.get(sql__contains='FROM "airport_airport"')
+
+    def test_view_queries_logged_and_explained_by_worker(self):
+        with self.assertLogs("airport.slow_queries", "WARNING"):
+            self.client.get(AIRPORT_URL)
+
+        query = self.airport_query()
+        self.assertEqual(query.view, "AirportViewSet (airport-list)")
+        self.assertEqual(query.database, "default")
+        self.assertTrue(query.sql.startswith("SELECT"))
+        self.assertTrue(query.params.startswith("("))
+        self.assertEqual(query.plan, "")
+        self.assertTrue(
+            OutboxJob.objects.filter(
+                kind="explain_slow_query",
+                payload__slow_query_id=query.id,
+            ).exists()
+        )
+
+        call_command("run_worker", "--once", stdout=StringIO())
+
+        query.refresh_from_db()
+        self.assertIn("airport_airport", query.plan)
+        self.assertFalse(OutboxJob.objects.exists())
+
+    def test_explained_once_per_interval(self):
+        with self.assertLogs("airport.slow_queries", "WARNING"):
+            self.client.get(AIRPORT_URL)
+        count = SlowQuery.objects.count()
+
+        with self.assertLogs("airport.slow_queries", "WARNING"):
+            self.client.get(AIRPORT_URL)
+
+        self.assertEqual(SlowQuery.objects.count(), count)
+
+    def test_writes_not_explained_and_params_not_stored(self):
+        self.user.is_staff = True
+        with self.assertLogs("airport.slow_queries", "WARNING"):
+            self.client.post(AIRPORT_URL, {"name": "Lviv"})
+
+        insert = SlowQuery.objects.get(
+            sql__startswith='INSERT INTO "airport_airport"'
+        )
+        self.assertEqual(insert.plan, "")
+        self.assertEqual(insert.params, "")
+        self.assertFalse(
+            OutboxJob.objects.filter(
+                payload__slow_query_id=insert.id
+            ).exists()
+        )
+        self.assertEqual(insert.view, "AirportViewSet (airport-list)")
+
+    def test_other_views_not_timed(self):
+        with self.assertNoLogs("airport.slow_queries", "WARNING"):
+            self.client.get("/api/doc/swagger/")
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_disabled(self):
+        with self.assertNoLogs("airport.slow_queries", "WARNING"):
+            self.client.get(AIRPORT_URL)
+
+        self.assertFalse(SlowQuery.objects.exists())
@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Route,
+)
+from airport.serializers import (
+    AirplaneDetailSerializer,
+    FlightDetailSerializer,
+    FlightListSerializer,
+    RouteDetailSerializer,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+AIRPLANE_URL = reverse("airport:airplane-list")
+
+
+def detail_url(flight_id):
+    return reverse("airport:flight-detail", args=[flight_id])
+
+
+def sample_flight(number):
+    route = Route.objects.create(
+        source=Airport.objects.create(name=f"source_{number}"),
+        destination=Airport.objects.create(name=f"destination_{number}"),
+    )
+    airplane = Airplane.objects.create(
+        name=f"airplane_{number}",
+        rows=10,
+        seats_in_row=9,
+        airplane_type=AirplaneType.objects.create(name=f"type_{number}"),
+    )
+    flight = Flight.objects.create(
+        route=route,
+        airplane=airplane,
+        departure_time=f"2022-06-{number + 1:02d}T14:00:00Z",
+        arrival_time=f"2022-06-{number + 1:02d}T21:00:00Z",
+    )
+    flight.crew.add(
+        Crew.objects.create(first_name=f"first_{number}", last_name="last")
+    )
+    return flight
+
+
+class SparseFieldsetApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.flights = [sample_flight(number) for number in range(3)]
+
+    def test_fields_limits_response(self):
+        res = self.client.get(FLIGHT_URL, {"fields": "id,departure_time"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data[0]), {"id", "departure_time"})
+
+    def test_exclude_drops_fields(self):
+        res = self.client.get(
+            detail_url(self.flights[0].id), {"exclude": "crew,taken_places"}
+        )
+
+        self.assertNotIn("crew", res.data)
+        self.assertNotIn("taken_places", res.data)
+        self.assertEqual(res.data["airplane"], "airplane_0")
+
+    def test_unknown_field_rejected(self):
+        res = self.client.get(FLIGHT_URL, {"fields": "id,unknown"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lean_request_selects_fewer_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(FLIGHT_URL, {"fields": "id,departure_time"})
+
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertNotIn("JOIN", sql)
+        self.assertNotIn("arrival_time", sql)
+        self.assertNotIn("COUNT", sql)
+
+    def test_every_field_alone_matches_full_response(self):
+        flight = self.flights[0]
+        for serializer, url in (
+            (FlightListSerializer, FLIGHT_URL),
+            (FlightDetailSerializer, detail_url(flight.id)),
+            (
+                AirplaneDetailSerializer,
+                reverse("airport:airplane-detail", args=[flight.airplane_id]),
+            ),
+            (
+                RouteDetailSerializer,
+                reverse("airport:route-detail", args=[flight.route_id]),
+            ),
+        ):
+            full = self.client.get(url).data
+            full = full[0] if isinstance(full, list) else full
+            for name in serializer().fields:
+                # Throttle bucket, flights and at most one prefetch.
+                with self.assertNumQueries(
+                    3 if name in ("crew", "taken_places") else 2
+                ):
+                    res = self.client.get(url, {"fields": name})
+                data = res.data[0] if isinstance(res.data, list) else res.data
+                self.assertEqual(data, {name: full[name]})
+
+    def test_airplane_fields(self):
+        res = self.client.get(AIRPLANE_URL, {"fields": "name,rows"})
+
+        self.assertEqual(set(res.data[0]), {"name", "rows"})
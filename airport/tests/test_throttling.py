@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from django.contrib.auth.models import AnonymousUser
+
+from airport.models import ThrottleBucket
+from airport.throttling import SharedAnonRateThrottle, store
+
+
+class TokenBucketStoreTests(TestCase):
+    def test_bucket_allows_capacity_then_denies(self):
+        results = [store.consume("key", 3, 60)[1] for _ in range(4)]
+
+        self.assertEqual(results, [True, True, True, False])
+        self.assertEqual(ThrottleBucket.objects.count(), 1)
+
+    def test_bucket_refills_over_time(self):
+        with mock.patch("airport.throttling.time.time", return_value=1000):
+            for _ in range(3):
+                store.consume("key", 3, 60)
+            self.assertFalse(store.consume("key", 3, 60)[1])
+
+        with mock.patch("airport.throttling.time.time", return_value=1020):
+            tokens, allowed = store.consume("key", 3, 60)
+
+        self.assertTrue(allowed)
+        self.assertAlmostEqual(tokens, 0)
+
+    def test_buckets_are_per_key(self):
+        store.consume("first", 1, 60)
+
+        self.assertTrue(store.consume("second", 1, 60)[1])
+        self.assertFalse(store.consume("first", 1, 60)[1])
+
+    def test_prune_idle_buckets(self):
+        with mock.patch("airport.throttling.time.time", return_value=1000):
+            store.consume("old", 1, 60)
+        store.consume("new", 1, 60)
+
+        store.prune(3600)
+
+        self.assertEqual(
+            list(ThrottleBucket.objects.values_list("key", flat=True)),
+            ["new"]
+        )
+
+
+class SharedRateThrottleTests(TestCase):
+    def test_throttle_wait_after_denial(self):
+        request = APIRequestFactory().get("/")
+        request.user = AnonymousUser()
+        throttle = SharedAnonRateThrottle()
+        throttle.num_requests, throttle.duration = 1, 60
+
+        self.assertTrue(throttle.allow_request(request, None))
+        self.assertFalse(throttle.allow_request(request, None))
+        self.assertGreater(throttle.wait(), 0)
+        self.assertLessEqual(throttle.wait(), 60)
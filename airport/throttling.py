@@ -0,0 +1,94 @@
+import time
+from typing import Any
+
+from django.db import connections, router
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+from airport.models import ThrottleBucket
+
+
+class TokenBucketStore:
+    """
+    Token buckets kept in the database, so every worker process sees the
+    same counters.
+
+    A bucket holds up to ``capacity`` tokens and regains ``capacity``
+    tokens per ``duration`` seconds; each request takes one. Refilling and
+    taking a token happen in a single upsert of the key's row, which keeps
+    the cost per request constant and the check atomic across processes.
+    """
+
+    def consume(self, key: str, capacity: int, duration: int) -> tuple:
+        """Take a token for ``key``, return (tokens left, allowed)"""
+        connection = connections[router.db_for_write(ThrottleBucket)]
+        qn = connection.ops.quote_name
+        table = qn(ThrottleBucket._meta.db_table)
+        tokens = f"{table}.{qn('tokens')}"
+        updated_at = f"{table}.{qn('updated_at')}"
+
+        refilled = (
+            f"CASE WHEN {tokens} + (%(now)s - {updated_at}) * %(rate)s "
+            f"> %(capacity)s THEN %(capacity)s "
+            f"ELSE {tokens} + (%(now)s - {updated_at}) * %(rate)s END"
+        )
+        sql = (
+            f"INSERT INTO {table} "
+            f"({qn('key')}, {qn('tokens')}, {qn('allowed')}, "
+            f"{qn('updated_at')}) "
+            f"VALUES (%(key)s, %(capacity)s - 1, TRUE, %(now)s) "
+            f"ON CONFLICT ({qn('key')}) DO UPDATE SET "
+            f"{qn('tokens')} = CASE WHEN {refilled} >= 1 "
+            f"THEN {refilled} - 1 ELSE {refilled} END, "
+            f"{qn('allowed')} = {refilled} >= 1, "
+            f"{qn('updated_at')} = %(now)s "
+            f"RETURNING {qn('tokens')}, {qn('allowed')}"
+        )
+        params = {
+            "key": key,
+            "capacity": float(capacity),
+            "rate": capacity / duration,
+            "now": time.time(),
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            tokens_left, allowed = cursor.fetchone()
+        return tokens_left, bool(allowed)
+
+    @staticmethod
+    def prune(idle_seconds: float) -> int:
+        """Delete buckets that have been full for a while"""
+        deleted, _ = ThrottleBucket.objects.filter(
+            updated_at__lt=time.time() - idle_seconds
+        ).delete()
+        return deleted
+
+
+store = TokenBucketStore()
+
+
+class SharedRateThrottleMixin:
+    """Replace the per-process request history of DRF throttles"""
+
+    def allow_request(self, request: Any, view: Any) -> bool:
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.tokens, allowed = store.consume(
+            self.key, self.num_requests, self.duration
+        )
+        return allowed
+
+    def wait(self) -> float:
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class SharedAnonRateThrottle(SharedRateThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class SharedUserRateThrottle(SharedRateThrottleMixin, UserRateThrottle):
+    pass
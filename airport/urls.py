@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from airport.seat_events import flight_seat_events
 from airport.views import (
     AirplaneTypeViewSet,
     AirplaneViewSet,
@@ -9,6 +10,11 @@ from airport.views import (
     RouteViewSet,
     FlightViewSet,
     OrderViewSet,
+    LoadFactorViewSet,
+    ScheduleTemplateViewSet,
+    ChangeFeedViewSet,
+    BootstrapView,
+    OutboxStatsView,
 )
 
 router = routers.DefaultRouter()
@@ -18,8 +24,20 @@ router.register("crew", CrewViewSet)
 router.register("airport", AirportViewSet)
 router.register("router", RouteViewSet)
 router.register("flight", FlightViewSet)
+router.register("schedule_template", ScheduleTemplateViewSet)
 router.register("order", OrderViewSet)
+router.register("load_factor", LoadFactorViewSet, basename="load_factor")
+router.register("changes", ChangeFeedViewSet, basename="changes")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("bootstrap/", BootstrapView.as_view(), name="bootstrap"),
+    path("outbox/stats/", OutboxStatsView.as_view(), name="outbox-stats"),
+    path(
+        "flight/<int:pk>/seat-events/",
+        flight_seat_events,
+        name="flight-seat-events",
+    ),
+    path("", include(router.urls)),
+]
 
 app_name = "airport"
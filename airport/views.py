@@ -1,18 +1,45 @@
-from datetime import datetime
-from typing import Type, Any
-
-from django.db.models import F, Count, QuerySet
+from datetime import datetime, timedelta
+from typing import Any, Callable, Type
+
+from django.db.models import (
+    F,
+    Count,
+    QuerySet,
+    Prefetch,
+    Sum,
+    prefetch_related_objects,
+)
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
 
+from airport.bootstrap import bootstrap_payload
+from airport.bulk import BulkCreateModelMixin
+from airport.changes import (
+    InvalidCursor,
+    TOMBSTONE_RANK,
+    TRACKED_MODELS,
+    changes_since,
+    decode_cursor,
+    encode_cursor,
+)
+from airport.fieldsets import FIELDSET_PARAMETERS, SparseFieldsetMixin
+from airport.group_commit import save_order
+from airport.outbox import queue_stats
 from airport.permissions import IsAdminOrIfAuthenticatedReadOnly
+from airport.response_cache import CachedListMixin
 from airport.models import (
     AirplaneType,
     Airplane,
@@ -20,7 +47,11 @@ from airport.models import (
     Airport,
     Route,
     Flight,
-    Order
+    Order,
+    RouteLoadFactor,
+    ScheduleTemplate,
+    Ticket,
+    Tombstone,
 )
 from airport.serializers import (
     AirplaneTypeSerializer,
@@ -36,9 +67,17 @@ from airport.serializers import (
     FlightSerializer,
     OrderSerializer,
     OrderListSerializer,
+    OrderSideloadSerializer,
+    FlightSideloadSerializer,
     AirplaneImageSerializer,
     AirplaneListSerializer,
+    LoadFactorSerializer,
+    ScheduleTemplateSerializer,
 )
+from airport.scheduling import expand_template
+from airport.seating import SeatMap, suggest_seats
+from airport.geo import MAX_DISTANCE_KM
+from airport.spatial import airport_index
 
 
 class AirplaneTypeViewSet(
@@ -52,7 +91,7 @@ class AirplaneTypeViewSet(
 
 
 class CrewViewSet(
-    mixins.CreateModelMixin,
+    BulkCreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
@@ -67,8 +106,18 @@ def search_in_file_by_name(queryset: QuerySet, name: str) -> QuerySet:
     return queryset
 
 
+def annotate_tickets_available(queryset: QuerySet[Flight]) -> QuerySet:
+    return queryset.annotate(
+        tickets_available=(
+            F("airplane__rows") * F("airplane__seats_in_row")
+            - Count("tickets")
+        )
+    )
+
+
 class AirportViewSet(
-    mixins.CreateModelMixin,
+    SparseFieldsetMixin,
+    BulkCreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
@@ -78,7 +127,7 @@ class AirportViewSet(
 
     def get_queryset(self) -> QuerySet[Airport]:
         name = self.request.query_params.get("name")
-        queryset = search_in_file_by_name(self.queryset, name)
+        queryset = search_in_file_by_name(self.get_base_queryset(), name)
 
         return queryset
 
@@ -89,15 +138,76 @@ class AirportViewSet(
                 description="Filter by name",
                 required=False,
                 type=OpenApiTypes.STR,
-            )
+            ),
+            *FIELDSET_PARAMETERS,
         ]
     )
     def list(self, request) -> None:
         return super().list(request)
 
+    def _number_param(
+        self, name: str, low: float, high: float, convert: Type = float
+    ) -> Any:
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            value = convert(value)
+        except ValueError:
+            raise ValidationError({name: "A number is required."})
+        if not low <= value <= high:
+            raise ValidationError({name: f"Must be between {low} and {high}."})
+        return value
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="latitude",
+                description="Latitude of the point in degrees",
+                required=True,
+                type=OpenApiTypes.FLOAT,
+            ),
+            OpenApiParameter(
+                name="longitude",
+                description="Longitude of the point in degrees",
+                required=True,
+                type=OpenApiTypes.FLOAT,
+            ),
+            OpenApiParameter(
+                name="count",
+                description="Number of airports (5 by default, 100 max)",
+                required=False,
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                name="radius",
+                description="Only airports within this many km",
+                required=False,
+                type=OpenApiTypes.FLOAT,
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(methods=["GET"], detail=False)
+    def nearest(self, request: Any) -> Response:
+        """Closest airports to a point with their distance in km"""
+        latitude = self._number_param("latitude", -90, 90)
+        longitude = self._number_param("longitude", -180, 180)
+        if latitude is None or longitude is None:
+            raise ValidationError(
+                "The latitude and longitude parameters are required."
+            )
+        count = self._number_param("count", 1, 100, int) or 5
+        radius = self._number_param("radius", 0, MAX_DISTANCE_KM)
+
+        return Response(
+            airport_index().nearest(latitude, longitude, count, radius)
+        )
+
 
 class AirplaneViewSet(
-    mixins.CreateModelMixin,
+    SparseFieldsetMixin,
+    BulkCreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
@@ -114,7 +224,7 @@ class AirplaneViewSet(
         name = self.request.query_params.get("name")
         airplane_type = self.request.query_params.get("airplane_type")
 
-        queryset = search_in_file_by_name(self.queryset, name)
+        queryset = search_in_file_by_name(self.get_base_queryset(), name)
 
         if airplane_type:
             airplane_type_ids = self._params_to_ints(airplane_type)
@@ -138,6 +248,7 @@ class AirplaneViewSet(
                 required=False,
                 type={"type": "list", "items": {"type": "number"}},
             ),
+            *FIELDSET_PARAMETERS,
         ]
     )
     def list(self, request: Any) -> None:
@@ -175,11 +286,12 @@ class AirplaneViewSet(
                 status=status.HTTP_200_OK
             )
 
-        return Response(serializer.data, status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
 
 
 class RouteViewSet(
-    mixins.CreateModelMixin,
+    SparseFieldsetMixin,
+    BulkCreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
@@ -187,6 +299,13 @@ class RouteViewSet(
     queryset = Route.objects.select_related("destination", "source")
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_queryset(self) -> QuerySet[Route]:
+        return self.get_base_queryset()
+
+    @extend_schema(parameters=FIELDSET_PARAMETERS)
+    def list(self, request: Any) -> None:
+        return super().list(request)
+
     def get_serializer_class(
             self,
     ) -> Type[RouteListSerializer | RouteDetailSerializer | RouteSerializer]:
@@ -199,29 +318,34 @@ class RouteViewSet(
         return RouteSerializer
 
 
-class FlightViewSet(viewsets.ModelViewSet):
-    queryset = (
+class FlightViewSet(
+    SparseFieldsetMixin,
+    CachedListMixin,
+    BulkCreateModelMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = annotate_tickets_available(
         Flight.objects.all()
         .select_related("airplane", "route__source", "route__destination")
         .prefetch_related("crew", "tickets")
-        .annotate(
-            tickets_available=(
-                F("airplane__rows") * F("airplane__seats_in_row")
-                - Count("tickets")
-            )
-        )
     )
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    queryset_annotations = {"tickets_available": annotate_tickets_available}
 
     def get_queryset(self) -> QuerySet:
         date = self.request.query_params.get("departure_time")
         route_id_str = self.request.query_params.get("route")
 
-        queryset = self.queryset
+        queryset = self.get_base_queryset()
 
         if date:
-            date = datetime.strptime(date, "%Y-%m-%d").date()
-            queryset = queryset.filter(departure_time__date=date)
+            # A range on the column itself (unlike departure_time__date)
+            # lets PostgreSQL prune the flight partitions.
+            start = timezone.make_aware(datetime.strptime(date, "%Y-%m-%d"))
+            queryset = queryset.filter(
+                departure_time__gte=start,
+                departure_time__lt=start + timedelta(days=1),
+            )
 
         if route_id_str:
             queryset = queryset.filter(route_id=int(route_id_str))
@@ -242,6 +366,7 @@ class FlightViewSet(viewsets.ModelViewSet):
                 required=False,
                 type=OpenApiTypes.INT,
             ),
+            *FIELDSET_PARAMETERS,
         ]
     )
     def list(self, request: Any) -> None:
@@ -262,6 +387,69 @@ class FlightViewSet(viewsets.ModelViewSet):
 
         return FlightSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="size",
+                description="Number of seats for the group (ex. ?size=4)",
+                required=True,
+                type=OpenApiTypes.INT,
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(methods=["GET"], detail=True, url_path="seat-suggestion")
+    def seat_suggestion(self, request: Any, pk=None) -> Response:
+        """Best free seats for a group, adjacent in one row if possible"""
+        try:
+            size = int(request.query_params.get("size", ""))
+        except ValueError:
+            size = 0
+        if size < 1:
+            raise ValidationError({"size": "A positive integer is required."})
+
+        flight = get_object_or_404(
+            Flight.objects.select_related("airplane").only(
+                "departure_time", "airplane__rows", "airplane__seats_in_row"
+            ),
+            pk=pk,
+        )
+        capacity = flight.airplane.rows * flight.airplane.seats_in_row
+        if size > capacity:
+            raise ValidationError(
+                {"size": f"The airplane has only {capacity} seats."}
+            )
+        seats, contiguous = suggest_seats(SeatMap.for_flight(flight), size)
+        if not seats:
+            raise ValidationError({"size": "Not enough free seats."})
+
+        return Response(
+            {
+                "contiguous": contiguous,
+                "seats": [{"row": row, "seat": seat} for row, seat in seats],
+            }
+        )
+
+
+class ScheduleTemplateViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet,
+):
+    queryset = ScheduleTemplate.objects.prefetch_related("crew")
+    serializer_class = ScheduleTemplateSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    @extend_schema(request=None, responses={201: OpenApiTypes.OBJECT})
+    @action(methods=["POST"], detail=True)
+    def expand(self, request: Any, pk=None) -> Response:
+        """Create the template's missing flights"""
+        flights = expand_template(self.get_object())
+        return Response(
+            {"created": len(flights)}, status=status.HTTP_201_CREATED
+        )
+
 
 class OrderPagination(PageNumberPagination):
     page_size = 5
@@ -270,6 +458,7 @@ class OrderPagination(PageNumberPagination):
 
 
 class OrderViewSet(
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     GenericViewSet,
@@ -277,23 +466,317 @@ class OrderViewSet(
     queryset = Order.objects.all()
     pagination_class = OrderPagination
     permission_classes = (IsAuthenticated,)
+    cache_per_user = True
 
     def get_queryset(self) -> QuerySet:
         queryset = self.queryset.filter(user=self.request.user)
 
         if self.action == "list":
-            queryset = queryset.prefetch_related(
-                "tickets__flight__airplane",
-                "tickets__flight__route",
-            )
+            queryset = queryset.prefetch_related("tickets")
         return queryset
 
+    @staticmethod
+    def _prefetch_flights(orders: list) -> None:
+        """
+        Load the flights of a page of orders together with route endpoints
+        and availability in one query. Filtering by the tickets' departure
+        times lets PostgreSQL skip flight partitions of other months.
+        """
+        tickets = [
+            ticket for order in orders for ticket in order.tickets.all()
+        ]
+        flights = annotate_tickets_available(
+            Flight.objects.select_related(
+                "airplane",
+                "route__source",
+                "route__destination",
+            )
+        )
+        prefetch_related_objects(
+            tickets,
+            Prefetch(
+                "flight",
+                queryset=flights.filter(
+                    departure_time__in={
+                        ticket.departure_time for ticket in tickets
+                    }
+                ),
+            ),
+        )
+        # A ticket whose departure time drifted from its flight's was
+        # missed by the partition filter, load those flights by id.
+        missed = [
+            ticket
+            for ticket in tickets
+            if Ticket.flight.field.get_cached_value(ticket) is None
+        ]
+        if missed:
+            found = flights.in_bulk({ticket.flight_id for ticket in missed})
+            for ticket in missed:
+                ticket.flight = found.get(ticket.flight_id)
+
+    def _sideload_requested(self) -> bool:
+        return self.request.query_params.get("sideload") == "true"
+
     def get_serializer_class(
             self,
-    ) -> Type[OrderListSerializer | OrderSerializer]:
+    ) -> Type[
+        OrderListSerializer
+        | OrderSideloadSerializer
+        | OrderSerializer
+    ]:
         if self.action == "list":
+            if self._sideload_requested():
+                return OrderSideloadSerializer
             return OrderListSerializer
         return OrderSerializer
 
+    @staticmethod
+    def _included(orders: list) -> dict:
+        """Flights, routes and airports referenced by a page of orders"""
+        flights = {
+            ticket.flight.id: ticket.flight
+            for order in orders
+            for ticket in order.tickets.all()
+        }
+        routes = {flight.route.id: flight.route for flight in flights.values()}
+        airports = {
+            airport.id: airport
+            for route in routes.values()
+            for airport in (route.source, route.destination)
+        }
+        flights_data = FlightSideloadSerializer(
+            flights.values(), many=True
+        ).data
+        routes_data = RouteSerializer(routes.values(), many=True).data
+        airports_data = AirportListSerializer(
+            airports.values(), many=True
+        ).data
+        return {
+            "flights": {flight["id"]: flight for flight in flights_data},
+            "routes": {route["id"]: route for route in routes_data},
+            "airports": {
+                airport["id"]: airport for airport in airports_data
+            },
+        }
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="sideload",
+                description=(
+                    "Reference flights by id and list flights, routes and "
+                    "airports once in `included` (ex. ?sideload=true)"
+                ),
+                required=False,
+                type=OpenApiTypes.BOOL,
+            ),
+        ]
+    )
+    def list(self, request: Any, *args, **kwargs) -> Response:
+        return super().list(request, *args, **kwargs)
+
+    def paginate_queryset(self, queryset: QuerySet) -> list:
+        self._page = super().paginate_queryset(queryset)
+        self._prefetch_flights(self._page)
+        return self._page
+
+    def get_paginated_response(self, data: Any) -> Response:
+        response = super().get_paginated_response(data)
+        if self._sideload_requested():
+            response.data["included"] = self._included(self._page)
+        return response
+
     def perform_create(self, serializer: Any) -> None:
-        serializer.save(user=self.request.user)
+        save_order(serializer, user=self.request.user)
+
+
+class LoadFactorViewSet(mixins.ListModelMixin, GenericViewSet):
+    """Daily load factor from the summary kept by airport/analytics.py"""
+
+    queryset = RouteLoadFactor.objects.all()
+    serializer_class = LoadFactorSerializer
+    permission_classes = (IsAdminUser,)
+
+    def _param(self, name: str, parse: Callable, expected: str) -> Any:
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: f"Expected {expected}."})
+        return parsed
+
+    def get_queryset(self) -> QuerySet:
+        params = self.request.query_params
+        group = (
+            "airplane_type"
+            if params.get("group_by") == "airplane_type"
+            else "route"
+        )
+        queryset = self.queryset
+
+        date_from = self._param("date_from", parse_date, "YYYY-MM-DD")
+        if date_from:
+            queryset = queryset.filter(day__gte=date_from)
+        date_to = self._param("date_to", parse_date, "YYYY-MM-DD")
+        if date_to:
+            queryset = queryset.filter(day__lte=date_to)
+        route = self._param("route", int, "a route id")
+        if route is not None:
+            queryset = queryset.filter(route_id=route)
+
+        return (
+            queryset.order_by("day", group)
+            .values("day", group)
+            .annotate(
+                flights=Sum("flights"),
+                seats=Sum("seats"),
+                tickets_sold=Sum("tickets_sold"),
+            )
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="group_by",
+                description="route (default) or airplane_type",
+                required=False,
+                type=OpenApiTypes.STR,
+            ),
+            OpenApiParameter(
+                name="date_from",
+                description="First departure day",
+                required=False,
+                type=OpenApiTypes.DATE,
+            ),
+            OpenApiParameter(
+                name="date_to",
+                description="Last departure day",
+                required=False,
+                type=OpenApiTypes.DATE,
+            ),
+            OpenApiParameter(
+                name="route",
+                description="Filter by route id",
+                required=False,
+                type=OpenApiTypes.INT,
+            ),
+        ]
+    )
+    def list(self, request: Any, *args, **kwargs) -> Response:
+        return super().list(request, *args, **kwargs)
+
+
+class ChangeFeedViewSet(GenericViewSet):
+    """Changes after ``?since=<cursor>``, see airport/changes.py"""
+
+    queryset = Tombstone.objects.all()
+    permission_classes = (IsAuthenticated,)
+    default_limit = 100
+    max_limit = 1000
+    querysets = {
+        Airport: Airport.objects.all(),
+        Airplane: Airplane.objects.all(),
+        Route: Route.objects.all(),
+        Flight: Flight.objects.prefetch_related("crew"),
+    }
+    serializers = {
+        Airport: AirportListSerializer,
+        Airplane: AirplaneSerializer,
+        Route: RouteSerializer,
+        Flight: FlightSerializer,
+    }
+
+    def _limit(self) -> int:
+        try:
+            limit = int(
+                self.request.query_params.get("limit", self.default_limit)
+            )
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+        if limit < 1:
+            raise ValidationError({"limit": "Must be positive."})
+        return min(limit, self.max_limit)
+
+    def _change(self, key: tuple, row: Any) -> dict:
+        moment, rank, pk = key
+        if rank == TOMBSTONE_RANK:
+            return {
+                "type": row.model,
+                "id": row.object_id,
+                "deleted": True,
+                "updated_at": moment,
+                "data": None,
+            }
+        model = TRACKED_MODELS[rank]
+        return {
+            "type": model._meta.model_name,
+            "id": pk,
+            "deleted": False,
+            "updated_at": moment,
+            "data": self.serializers[model](row).data,
+        }
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                description="Cursor returned by the previous page "
+                "(ex. ?since=WyIyMDI0...), omit to read every row",
+                required=False,
+                type=OpenApiTypes.STR,
+            ),
+            OpenApiParameter(
+                name="limit",
+                description="Changes per page (100 by default, 1000 max)",
+                required=False,
+                type=OpenApiTypes.INT,
+            ),
+        ]
+    )
+    def list(self, request: Any) -> Response:
+        since = request.query_params.get("since")
+        try:
+            cursor = decode_cursor(since) if since else None
+        except InvalidCursor:
+            raise ValidationError({"since": "Invalid cursor."})
+
+        changes, has_more = changes_since(
+            cursor, self._limit(), self.querysets
+        )
+        if changes:
+            since = encode_cursor(changes[-1][0])
+        return Response(
+            {
+                "changes": [self._change(*change) for change in changes],
+                "cursor": since,
+                "has_more": has_more,
+            }
+        )
+
+
+class BootstrapView(APIView):
+    """
+    Airplane types, airports, routes, crew and airplanes in one
+    precompressed response, see airport/bootstrap.py
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request: Any) -> HttpResponse:
+        return bootstrap_payload().response(request)
+
+
+class OutboxStatsView(APIView):
+    """Depth and lag of the background job queue, see airport/outbox.py"""
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request: Any) -> Response:
+        return Response(queue_stats())
@@ -0,0 +1,162 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CLAIMS = ("is_staff", "is_active")
+
+
+class LRUCache:
+    """Thread-safe mapping that forgets its least recently used keys"""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+verified_tokens = LRUCache(settings.JWT_VERIFIED_TOKEN_CACHE_SIZE)
+cached_users = LRUCache(settings.JWT_USER_CACHE_SIZE)
+
+
+def forget_user(user_id: Any) -> None:
+    """Drop a user from the per-process cache after it has been changed"""
+    cached_users.pop(str(user_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(instance: Any, **kwargs: Any) -> None:
+    forget_user(instance.pk)
+
+
+def clear_caches() -> None:
+    verified_tokens.clear()
+    cached_users.clear()
+
+
+def request_user(request: HttpRequest) -> Optional[Any]:
+    """
+    The user a plain Django request authenticates as with the DRF
+    authentication classes, for middleware running before the view.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user
+    drf_request = Request(request)
+    for authentication in drf_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication().authenticate(drf_request)
+        except APIException:
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that avoids loading the user on every request.
+
+    Tokens whose signature was already verified are kept in an LRU until
+    they expire. The user is cached per process for ``JWT_USER_CACHE_TTL``
+    seconds, which is enough for the permission checks and for filtering
+    by ``request.user``. It is built from the signed ``is_staff`` and
+    ``is_active`` claims while the token is younger than that TTL and
+    loaded from the database afterwards, so demoting or deactivating a
+    user takes effect within the TTL although the token is still valid.
+    Views that need other user fields must load the row themselves.
+    """
+
+    def get_validated_token(self, raw_token: bytes) -> Any:
+        validated_token = verified_tokens.get(raw_token)
+        if validated_token is not None:
+            if validated_token.get("exp", 0) > time.time():
+                return validated_token
+            verified_tokens.pop(raw_token)
+
+        validated_token = super().get_validated_token(raw_token)
+        verified_tokens.set(raw_token, validated_token)
+        return validated_token
+
+    def get_user(self, validated_token: Any) -> Any:
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        key = str(user_id)
+        cached = cached_users.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            user = cached[1]
+        else:
+            user = None
+            if (
+                validated_token.get("iat", 0) + settings.JWT_USER_CACHE_TTL
+                > time.time()
+            ):
+                user = self._user_from_claims(validated_token)
+            if user is None:
+                user = super().get_user(validated_token)
+            cached_users.set(
+                key, (time.monotonic() + settings.JWT_USER_CACHE_TTL, user)
+            )
+
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        # Every request gets its own instance to mutate.
+        return copy.copy(user)
+
+    def _user_from_claims(self, validated_token: Any) -> Optional[Any]:
+        if not all(claim in validated_token for claim in USER_CLAIMS):
+            return None
+
+        user = get_user_model()(
+            **{
+                api_settings.USER_ID_FIELD: validated_token[
+                    api_settings.USER_ID_CLAIM
+                ]
+            },
+            **{claim: validated_token[claim] for claim in USER_CLAIMS},
+        )
+        user._state.adding = False
+        return user
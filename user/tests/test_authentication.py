@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.authentication import cached_users, clear_caches
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+ME_URL = reverse("user:manage")
+AIRPLANE_TYPE_URL = reverse("airport:airplanetype-list")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpass"
+        )
+
+    def authenticate(self, email="test@test.com", password="testpass"):
+        res = self.client.post(TOKEN_URL, {"email": email, "password": password})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+
+    def test_authenticated_request_does_not_load_user(self):
+        self.authenticate()
+
+        # The throttle bucket and the airplane types, no user lookup.
+        with self.assertNumQueries(2):
+            res = self.client.get(AIRPLANE_TYPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_staff_claim_grants_write_access(self):
+        get_user_model().objects.create_user(
+            email="admin@test.com", password="testpass", is_staff=True
+        )
+        self.authenticate("admin@test.com")
+
+        res = self.client.post(AIRPLANE_TYPE_URL, {"name": "Boeing"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_non_staff_claim_is_read_only(self):
+        self.authenticate()
+
+        res = self.client.post(AIRPLANE_TYPE_URL, {"name": "Boeing"})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_token_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+
+        res = self.client.get(AIRPLANE_TYPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_invalidates_cached_user(self):
+        self.authenticate()
+        self.client.get(ME_URL)
+        self.assertIsNotNone(cached_users.get(str(self.user.id)))
+
+        res = self.client.patch(ME_URL, {"email": "new@test.com"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(cached_users.get(str(self.user.id)))
+        self.assertEqual(self.client.get(ME_URL).data["email"], "new@test.com")
+
+    @override_settings(JWT_USER_CACHE_TTL=0)
+    def test_deactivation_takes_effect_before_token_expires(self):
+        self.authenticate()
+        self.assertEqual(
+            self.client.get(AIRPLANE_TYPE_URL).status_code, status.HTTP_200_OK
+        )
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(AIRPLANE_TYPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_USER_CACHE_TTL=0)
+    def test_demotion_takes_effect_before_token_expires(self):
+        admin = get_user_model().objects.create_user(
+            email="admin@test.com", password="testpass", is_staff=True
+        )
+        self.authenticate("admin@test.com")
+
+        admin.is_staff = False
+        admin.save()
+
+        res = self.client.post(AIRPLANE_TYPE_URL, {"name": "Boeing"})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_saving_user_forgets_cached_user(self):
+        self.authenticate()
+        self.client.get(ME_URL)
+
+        self.user.save()
+
+        self.assertIsNone(cached_users.get(str(self.user.id)))